@@ -1,46 +1,135 @@
+import time
+_import_started = time.perf_counter()
+
 from flask import Flask, jsonify
+from werkzeug.middleware.proxy_fix import ProxyFix
+import click
 from flask_cors import CORS
 from applications.model import User, Role
-from applications.database import db
+from applications.database import db, configure_engines
 from applications.config import Config
 from flask_restful import Api
 from flask_security import Security, SQLAlchemyUserDatastore
-from werkzeug.security import generate_password_hash
 from applications.user_datastore import user_datastore
+from applications.score_writer import score_writer
+from applications.enrollment import enrollment_queue
+from applications.response_cache import catalog_cache
+from applications.quiz_payload import quiz_payloads
+from applications.leaderboard import leaderboards
+from applications.attempt_sessions import attempt_sessions
+from applications.search import search_index
+from applications.grading import answer_keys
+from applications.hashing import hashing_pool, login_throttle
+from applications.migrations import installed_version, LATEST_VERSION
+from applications.commands import register_commands, bootstrap
+from applications.startup import startup_profile
+from applications.instrumentation import instrumentation
+from applications.read_routing import read_router
+from applications.log_pipeline import log_pipeline, attempt_details
+from applications.permissions import permission_registry
+from applications.encoding import response_encoding
+import logging
+
+startup_profile.record("imports", time.perf_counter() - _import_started)
+
+
+def check_schema(app):
+    """Verify the schema version; only a development setup (AUTO_BOOTSTRAP) creates it here."""
+    version = installed_version()
+    if version >= LATEST_VERSION:
+        return
+    if not app.config.get("AUTO_BOOTSTRAP"):
+        message = f"Database schema is at version {version}, expected {LATEST_VERSION}. Run `flask bootstrap` first."
+        if click.get_current_context(silent=True) is not None:
+            # Loaded by the flask CLI, most likely to run that very command
+            logging.warning(message)
+            return
+        raise RuntimeError(message)
+    logging.info(f"Schema at version {version}; bootstrapping the database (AUTO_BOOTSTRAP)")
+    bootstrap(app.config["ADMIN_EMAIL"], app.config["ADMIN_PASSWORD"])
+
+
+def register_metrics_collectors():
+    """Export the stats of the in-process caches, pools and queues on /metrics."""
+    from applications.auth_api import token_cache
+
+    instrumentation.register_collector("token_cache", token_cache.stats)
+    instrumentation.register_collector("hashing_pool", hashing_pool.stats)
+    instrumentation.register_collector("login_throttle", login_throttle.stats)
+    instrumentation.register_collector("score_writer", score_writer.stats)
+    instrumentation.register_collector("catalog_cache", catalog_cache.stats)
+    instrumentation.register_collector("quiz_payload_cache", quiz_payloads.stats)
+    instrumentation.register_collector("logging", log_pipeline.stats)
+    instrumentation.register_collector("read_routing", read_router.stats)
+    instrumentation.register_collector("attempt_sessions", attempt_sessions.stats)
+    instrumentation.register_collector("search_index", search_index.stats)
+    instrumentation.register_collector("permissions", permission_registry.stats)
+    instrumentation.register_collector("response_encoding", response_encoding.stats)
+    instrumentation.register_collector("startup", startup_profile.stats)
+
 
 def create_app():
+    started = time.perf_counter()
     app = Flask(__name__)
     app.config.from_object(Config)
+    if app.config["PROXY_FIX_X_FOR"]:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["PROXY_FIX_X_FOR"])
+
+    # Structured logging written by a background thread; request threads only enqueue records
+    log_pipeline.init_app(app)
+    attempt_details.init_app(app)
+
     db.init_app(app)
+    configure_engines(app)  # SQLite PRAGMAs of the DB_PROFILE
+    read_router.init_app(app)  # GET requests read from the read-only engine when one is configured
 
     # Enable CORS
     CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
 
     # Initialize Flask-RESTful API
     api = Api(app, prefix='/api/v1')
+    response_encoding.init_app(app, api)  # JSON/MessagePack by Accept, gzip/brotli by Accept-Encoding
     app.security = Security(app, user_datastore)
 
-    with app.app_context():
-        # Create database tables
-        db.create_all()
-
-        # Create default roles
-        try:
-            admin_role = user_datastore.find_or_create_role(name='admin', description='Administrator')
-            user_role = user_datastore.find_or_create_role(name='user', description='Quiz User')
-
-            # Create default admin user
-            if not user_datastore.find_user(email="admin@quizmaster.com"):
-                admin_password_hash = generate_password_hash("admin123")
-                user_datastore.create_user(
-                    email="admin@quizmaster.com",
-                    username="admin",
-                    password=admin_password_hash,
-                    roles=[admin_role]
-                )
-            db.session.commit()
-        except Exception as e:
-            print(f"Error during default admin and role creation: {e}")
+    startup_profile.record("app_setup", time.perf_counter() - started)
+
+    # Schema creation, migrations and seeding live in `flask bootstrap`; workers only check the version
+    with startup_profile.phase("schema_check"), app.app_context():
+        check_schema(app)
+
+    started = time.perf_counter()
+
+    # Share catalog cache invalidations between workers on this host
+    catalog_cache.init_app(app)
+    quiz_payloads.init_app(app)
+    search_index.init_app(app)
+    answer_keys.init_app(app)
+
+    # Role -> permission bitmasks for token claims (recompiled when a Role changes)
+    permission_registry.init_app(app)
+
+    # Bounded password hashing pool and failed-login throttling
+    hashing_pool.init_app(app)
+    login_throttle.init_app(app)
+
+    # Background runner for bulk enrollment uploads (hashes outside the request)
+    enrollment_queue.init_app(app)
+
+    # Keep per-quiz leaderboards current as scores are committed
+    leaderboards.init_app(app)
+
+    # Server-side attempt sessions (time limits enforced against the server clock)
+    attempt_sessions.init_app(app)
+
+    # Start the write-behind score queue (no-op unless SCORE_WRITE_BEHIND is set)
+    score_writer.init_app(app)
+
+    # Server-Timing headers and /metrics (no-op unless INSTRUMENTATION_ENABLED is set)
+    instrumentation.init_app(app, api)
+    register_metrics_collectors()
+
+    # flask bootstrap / flask migrate / flask audit-queries
+    register_commands(app)
 
     # Add global error handling
     @app.errorhandler(404)
@@ -51,40 +140,80 @@ def create_app():
     def internal_error(error):
         return jsonify({"error": "An unexpected error occurred"}), 500
 
+    startup_profile.record("extensions", time.perf_counter() - started)
     return app, api
 
 
 app, api = create_app()
 
-# Import and register API resources
-from applications.auth_api import Login, Register, Logout
-from applications.quizmanagement_api import (
-    AllSubjects,
-    ChapterManagement,
-    QuestionManagement,
-    QuizManagement,
-    ScoreManagement,
-    QuizDetails,
-    SubmitQuiz
-)
-
-# Auth API endpoints
-api.add_resource(Login, '/login')
-api.add_resource(Register, '/register')
-api.add_resource(Logout, '/logout')
-
-# Subject, Chapter, Quiz, Question, and Score Management endpoints
-api.add_resource(AllSubjects, '/subjects', '/subjects/<int:subject_id>')
-api.add_resource(ChapterManagement, '/chapters', '/chapters/<int:chapter_id>', '/chapters/subject/<int:subject_id>')
-
-api.add_resource(QuizManagement, '/quizzes', '/quizzes/<int:quiz_id>')
-api.add_resource(QuestionManagement, '/questions', '/questions/<int:question_id>', '/quizzes/<quiz_id>/questions')
-
-api.add_resource(SubmitQuiz, '/quizzes','/quizzes/<int:quiz_id>/submit')
-
-# Additional routes if needed
-
-api.add_resource(ScoreManagement, '/scores')
+with startup_profile.phase("resources"):
+    # Import and register API resources. These stay eager: api.add_resource needs
+    # the classes to build its views, and the modules are cheap (~20 ms in total)
+    # next to the model/Flask-Security imports above, which create_app needs anyway
+    # for the schema check and the init_app hooks. numpy is the only import
+    # deferred (startup.lazy_import), until grading, item analysis or search first uses it.
+    from applications.auth_api import Login, Register, Logout, TokenCacheStats, HashingPoolStats
+    from applications.quizmanagement_api import (
+        AllSubjects,
+        CatalogTree,
+        ChapterManagement,
+        QuestionManagement,
+        QuizManagement,
+        ScoreManagement,
+        QuizDetails,
+        SubmitQuiz
+    )
+    from applications.leaderboard_api import QuizLeaderboard, QuizStatistics, QuizRank, QuizItemAnalysis
+    from applications.question_bulk_api import BulkQuestionImport, QuestionExport
+    from applications.attempt_api import StartAttempt, AttemptState
+    from applications.search_api import Search, SimilarQuestions, DuplicateQuestions
+    from applications.progress_api import UserProgressSummary
+    from applications.enrollment_api import BulkEnrollment
+
+    # Auth API endpoints
+    api.add_resource(Login, '/login')
+    api.add_resource(Register, '/register')
+    api.add_resource(Logout, '/logout')
+    api.add_resource(TokenCacheStats, '/auth/token-cache')
+    api.add_resource(HashingPoolStats, '/auth/hashing')
+    api.add_resource(BulkEnrollment, '/users/bulk', '/users/bulk/<string:job_id>')
+
+    # Subject, Chapter, Quiz, Question, and Score Management endpoints
+    api.add_resource(AllSubjects, '/subjects', '/subjects/<int:subject_id>')
+    api.add_resource(CatalogTree, '/catalog')
+    api.add_resource(ChapterManagement, '/chapters', '/chapters/<int:chapter_id>', '/chapters/subject/<int:subject_id>')
+
+    api.add_resource(QuizManagement, '/quizzes', '/quizzes/<int:quiz_id>')
+    api.add_resource(QuestionManagement, '/questions', '/questions/<int:question_id>', '/quizzes/<quiz_id>/questions')
+    api.add_resource(BulkQuestionImport, '/questions/bulk')
+    api.add_resource(QuestionExport, '/questions/export')
+
+    # Search and near-duplicate questions
+    api.add_resource(Search, '/search')
+    api.add_resource(SimilarQuestions, '/questions/<int:question_id>/similar')
+    api.add_resource(DuplicateQuestions, '/questions/duplicates')
+
+    api.add_resource(QuizDetails, '/quizzes/<int:quiz_id>/details')
+    api.add_resource(SubmitQuiz, '/quizzes','/quizzes/<int:quiz_id>/submit')
+
+    # Server-timed attempts: start, then autosave and resume until submitted through SubmitQuiz
+    api.add_resource(StartAttempt, '/quizzes/<int:quiz_id>/attempts')
+    api.add_resource(AttemptState, '/attempts/<string:attempt_id>')
+
+    # Leaderboards and statistics
+    api.add_resource(QuizLeaderboard, '/quizzes/<int:quiz_id>/leaderboard')
+    api.add_resource(QuizStatistics, '/quizzes/<int:quiz_id>/stats')
+    api.add_resource(QuizRank, '/quizzes/<int:quiz_id>/rank')
+    api.add_resource(QuizItemAnalysis, '/quizzes/<int:quiz_id>/item-analysis')
+
+    # Per-user progress
+    api.add_resource(UserProgressSummary, '/users/me/progress', '/users/<int:user_id>/progress')
+
+    # Additional routes if needed
+
+    api.add_resource(ScoreManagement, '/scores')
+
+startup_profile.ready()
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,74 @@
+from flask_restful import Resource
+from flask import request
+from applications.model import Quiz
+from applications.database import db
+from applications.encoding import timestamp
+from applications.attempt_sessions import attempt_sessions, AttemptError, time_limit_seconds
+from applications.quiz_payload import quiz_payloads, STUDENT_DETAILS
+from applications.quizmanagement_api import auth_token_required
+import logging
+
+
+# Start (or resume) a server-timed attempt
+class StartAttempt(Resource):
+    @auth_token_required
+    def post(self, quiz_id):
+        """Open an attempt: the server records the start time and this attempt's question order."""
+        try:
+            quiz = db.session.query(Quiz.time_limit, Quiz.duration).filter(Quiz.id == quiz_id).first()
+            if quiz is None:
+                return {"message": "Quiz not found."}, 404
+            payload = quiz_payloads.get(quiz_id)
+            if not payload.questions:
+                return {"message": "No questions found for this quiz."}, 404
+
+            session, resumed = attempt_sessions.start(
+                request.user["user_id"], quiz_id, [question["id"] for question in payload.questions],
+                time_limit_seconds(quiz)
+            )
+            positions = {question["id"]: index for index, question in enumerate(payload.questions)}
+            order = [positions[question_id] for question_id in session.question_ids if question_id in positions]
+            return {
+                **session.document(),
+                "resumed": resumed,
+                "quiz": payload.quiz,
+                "questions": payload.document(STUDENT_DETAILS, (order, {}))["questions"]
+            }, 200 if resumed else 201
+        except AttemptError as e:
+            return {"message": str(e)}, e.status
+        except Exception as e:
+            logging.error(f"Error starting attempt: {e}")
+            return {"error": str(e)}, 500
+
+
+# Attempt state and answer autosave
+class AttemptState(Resource):
+    @auth_token_required
+    def get(self, attempt_id):
+        """Remaining time, question order and autosaved answers of an attempt in progress."""
+        try:
+            return attempt_sessions.get(attempt_id, request.user["user_id"]).document(), 200
+        except AttemptError as e:
+            return {"message": str(e)}, e.status
+        except Exception as e:
+            return {"error": str(e)}, 500
+
+    @auth_token_required
+    def put(self, attempt_id):
+        """Autosave partial answers ({"answers": {question_id: option}}); kept in memory until submission."""
+        try:
+            answers = (request.get_json(silent=True) or {}).get("answers")
+            if not isinstance(answers, dict):
+                return {"message": "answers must be an object of question_id: option."}, 400
+            session = attempt_sessions.autosave(attempt_id, request.user["user_id"], answers)
+            remaining = session.remaining()
+            return {
+                "attempt_id": session.attempt_id,
+                "saved_at": timestamp(session.saved_at),
+                "answered": len(session.answers),
+                "remaining_seconds": round(remaining, 1) if remaining is not None else None
+            }, 200
+        except AttemptError as e:
+            return {"message": str(e)}, e.status
+        except Exception as e:
+            return {"error": str(e)}, 500
@@ -0,0 +1,370 @@
+from applications.encoding import timestamp
+import json
+import logging
+import math
+import os
+import random
+import secrets
+import sqlite3
+import threading
+import time
+
+
+class AttemptError(Exception):
+    """An attempt operation that cannot be carried out; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+
+class TimingWheel:
+    """Hashed timing wheel of (key, deadline) entries.
+
+    Scheduling is O(1); ``advance`` visits only the slots of the ticks that
+    passed since the last call, so expiring N sessions costs O(N) rather than a
+    scan of everything tracked. Deadlines further out than one revolution stay
+    in their slot until the revolution they belong to comes round.
+    """
+
+    def __init__(self, slots=512, tick=1.0, now=None):
+        self.tick = tick
+        self._slots = [dict() for _ in range(slots)]  # slot -> {key: deadline tick}
+        self._current = self._tick_of(time.time() if now is None else now)
+
+    def _tick_of(self, timestamp):
+        return int(timestamp // self.tick)
+
+    def schedule(self, key, deadline):
+        """Report ``key`` once ``deadline`` (epoch seconds) has passed.
+
+        Scheduling a key again does not remove its earlier entry, so callers
+        compare the key's current deadline when it is reported.
+        """
+        deadline_tick = max(self._tick_of(deadline), self._current) + 1
+        self._slots[deadline_tick % len(self._slots)][key] = deadline_tick
+
+    def advance(self, now=None):
+        """Return the keys whose deadline passed since the previous call."""
+        target = self._tick_of(time.time() if now is None else now)
+        if target <= self._current:
+            return []
+        # A gap longer than one revolution visits every slot exactly once
+        ticks = range(self._current + 1, target + 1)
+        if len(ticks) > len(self._slots):
+            ticks = range(target - len(self._slots) + 1, target + 1)
+        expired = []
+        for tick in ticks:
+            slot = self._slots[tick % len(self._slots)]
+            due = [key for key, deadline_tick in slot.items() if deadline_tick <= target]
+            for key in due:
+                del slot[key]
+            expired.extend(due)
+        self._current = target
+        return expired
+
+    def __len__(self):
+        return sum(len(slot) for slot in self._slots)
+
+
+class AttemptSession:
+    """Server-side state of one quiz attempt."""
+
+    __slots__ = ("attempt_id", "user_id", "quiz_id", "started_at", "deadline", "expires_at", "question_ids",
+                 "answers", "saved_at")
+
+    def __init__(self, attempt_id, user_id, quiz_id, started_at, deadline, expires_at, question_ids,
+                 answers=None, saved_at=None):
+        self.attempt_id = attempt_id
+        self.user_id = user_id
+        self.quiz_id = quiz_id
+        self.started_at = started_at  # epoch seconds, server clock
+        self.deadline = deadline  # epoch seconds the time limit runs out, None for untimed quizzes
+        self.expires_at = expires_at  # when the session is evicted (deadline plus grace, or idle timeout)
+        self.question_ids = question_ids  # presentation order for this attempt
+        self.answers = answers or {}  # autosaved {question_id (str): option}
+        self.saved_at = saved_at
+
+    def remaining(self, now=None):
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - (time.time() if now is None else now))
+
+    def elapsed(self, now=None):
+        return max(0.0, (time.time() if now is None else now) - self.started_at)
+
+    def document(self, now=None):
+        remaining = self.remaining(now)
+        return {
+            "attempt_id": self.attempt_id,
+            "quiz_id": self.quiz_id,
+            "started_at": timestamp(self.started_at),
+            "deadline": timestamp(self.deadline),
+            "remaining_seconds": round(remaining, 1) if remaining is not None else None,
+            "question_ids": self.question_ids,
+            "answers": self.answers,
+            "saved_at": timestamp(self.saved_at)
+        }
+
+    def to_row(self):
+        return (self.attempt_id, self.user_id, self.quiz_id, self.started_at, self.deadline, self.expires_at,
+                json.dumps(self.question_ids), json.dumps(self.answers), self.saved_at)
+
+    @classmethod
+    def from_row(cls, row):
+        attempt_id, user_id, quiz_id, started_at, deadline, expires_at, question_ids, answers, saved_at = row
+        return cls(attempt_id, user_id, quiz_id, started_at, deadline, expires_at,
+                   json.loads(question_ids), json.loads(answers), saved_at)
+
+
+class LocalSessionStore:
+    """Journal of live attempts in a SQLite file on the worker's host.
+
+    Lets attempts survive a worker restart and be picked up by any worker on
+    the same host, so an attempt started on one worker can be autosaved and
+    submitted through another. It is a local file opened without fsync, so autosaves never
+    reach the application database.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS attempt_session ("
+                " attempt_id TEXT PRIMARY KEY, user_id INTEGER, quiz_id INTEGER, started_at REAL,"
+                " deadline REAL, expires_at REAL, question_ids TEXT, answers TEXT, saved_at REAL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS ix_attempt_session_expires ON attempt_session (expires_at)")
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            self._local.connection = connection
+        return connection
+
+    def save(self, session):
+        with self._connection() as connection:
+            connection.execute("INSERT OR REPLACE INTO attempt_session VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               session.to_row())
+
+    def load(self, attempt_id):
+        row = self._connection().execute(
+            "SELECT * FROM attempt_session WHERE attempt_id = ?", (attempt_id,)
+        ).fetchone()
+        return AttemptSession.from_row(row) if row else None
+
+    def find(self, user_id, quiz_id, now):
+        row = self._connection().execute(
+            "SELECT * FROM attempt_session WHERE user_id = ? AND quiz_id = ? AND expires_at > ?"
+            " ORDER BY started_at DESC LIMIT 1", (user_id, quiz_id, now)
+        ).fetchone()
+        return AttemptSession.from_row(row) if row else None
+
+    def delete(self, attempt_id):
+        """Remove an attempt; False when it was already gone (e.g. submitted through another worker)."""
+        with self._connection() as connection:
+            return connection.execute("DELETE FROM attempt_session WHERE attempt_id = ?", (attempt_id,)).rowcount > 0
+
+    def purge(self, now):
+        with self._connection() as connection:
+            return connection.execute("DELETE FROM attempt_session WHERE expires_at <= ?", (now,)).rowcount
+
+
+class AttemptSessionManager:
+    """In-memory registry of live quiz attempts, timed by the server.
+
+    Sessions are found by attempt id (and by user and quiz, to resume) with
+    dictionary lookups, and autosaves only touch memory and the host-local
+    journal shared by the workers. Every operation first advances a timing
+    wheel, which evicts the sessions whose time ran out without scanning the
+    others.
+    """
+
+    def __init__(self):
+        self.grace = 30  # seconds after the deadline a submission is still accepted (network latency)
+        self.untimed_ttl = 4 * 3600  # lifetime of attempts on quizzes without a time limit
+        self.max_sessions = 100000
+        self.store = None
+        self._sessions = {}  # attempt_id -> AttemptSession
+        self._active = {}  # (user_id, quiz_id) -> attempt_id
+        self._wheel = TimingWheel()
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        self.started = 0
+        self.resumed = 0
+        self.autosaves = 0
+        self.submitted = 0
+        self.expired = 0
+
+    def init_app(self, app):
+        self.grace = app.config.get("ATTEMPT_SUBMIT_GRACE", self.grace)
+        self.untimed_ttl = app.config.get("ATTEMPT_UNTIMED_TTL", self.untimed_ttl)
+        self.max_sessions = app.config.get("ATTEMPT_MAX_SESSIONS", self.max_sessions)
+        self._wheel = TimingWheel(slots=app.config.get("ATTEMPT_WHEEL_SLOTS", 512))
+        path = app.config.get("ATTEMPT_SESSION_STORE")
+        if not path or path == "memory":
+            logging.warning("Attempt sessions are kept in this worker's memory only; run a single worker "
+                            "or point ATTEMPT_SESSION_STORE at a journal file")
+            return
+        if not os.path.isabs(path):
+            os.makedirs(app.instance_path, exist_ok=True)
+            path = os.path.join(app.instance_path, path)
+        self.store = LocalSessionStore(path)
+        logging.info(f"Attempt sessions journaled to {path}")
+
+    # Expiry
+    def _expire(self, now):
+        """Evict the sessions the wheel reports as due (caller holds the lock)."""
+        for attempt_id in self._wheel.advance(now):
+            session = self._sessions.get(attempt_id)
+            if session is None or session.expires_at > now:
+                continue  # already submitted, or rescheduled with a later expiry
+            del self._sessions[attempt_id]
+            if self._active.get((session.user_id, session.quiz_id)) == attempt_id:
+                del self._active[(session.user_id, session.quiz_id)]
+            self.expired += 1
+        if self.store is not None and now - self._last_purge > 60:
+            self._last_purge = now
+            self.store.purge(now)
+
+    def _track(self, session):
+        self._sessions[session.attempt_id] = session
+        self._active[(session.user_id, session.quiz_id)] = session.attempt_id
+        self._wheel.schedule(session.attempt_id, session.expires_at)
+
+    def _lookup(self, attempt_id, user_id, now):
+        if self.store is not None:
+            # The journal is authoritative: the attempt may have been started or autosaved through another worker
+            session = self.store.load(attempt_id)
+            if session is not None and session.expires_at > now:
+                self._track(session)
+        else:
+            session = self._sessions.get(attempt_id)
+        if session is None or session.expires_at <= now or session.user_id != user_id:
+            raise AttemptError("Attempt not found or expired.", 404)
+        return session
+
+    # Operations
+    def start(self, user_id, quiz_id, question_ids, time_limit=None):
+        """Begin an attempt, or return the user's attempt on this quiz that is still running.
+
+        ``time_limit`` is in seconds; the question order is shuffled once per attempt.
+        Returns ``(session, resumed)``.
+        """
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            if self.store is not None:
+                session = self.store.find(user_id, quiz_id, now)  # may have been submitted through another worker
+                if session is not None:
+                    self._track(session)
+            else:
+                attempt_id = self._active.get((user_id, quiz_id))
+                session = self._sessions.get(attempt_id) if attempt_id else None
+            if session is not None and (session.deadline is None or session.deadline > now):
+                self.resumed += 1
+                return session, True
+
+            if len(self._sessions) >= self.max_sessions:
+                raise AttemptError("Too many attempts in progress, try again shortly.", 503)
+            order = list(question_ids)
+            random.shuffle(order)
+            deadline = now + time_limit if time_limit else None
+            expires_at = deadline + self.grace if deadline else now + self.untimed_ttl
+            session = AttemptSession(secrets.token_urlsafe(16), user_id, quiz_id, now, deadline, expires_at, order)
+            self._track(session)
+            self.started += 1
+        if self.store is not None:
+            self.store.save(session)
+        return session, False
+
+    def get(self, attempt_id, user_id):
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            return self._lookup(attempt_id, user_id, now)
+
+    def autosave(self, attempt_id, user_id, answers):
+        """Merge partial answers into the attempt; rejected once its time limit has run out."""
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            session = self._lookup(attempt_id, user_id, now)
+            if session.deadline is not None and now > session.deadline:
+                raise AttemptError("Time limit exceeded.", 410)
+            allowed = set(map(str, session.question_ids))
+            session.answers.update(
+                {str(question_id): answer for question_id, answer in answers.items() if str(question_id) in allowed}
+            )
+            session.saved_at = now
+            if session.deadline is None:
+                # Untimed attempts stay alive while the student keeps working
+                session.expires_at = now + self.untimed_ttl
+                self._wheel.schedule(session.attempt_id, session.expires_at)
+            self.autosaves += 1
+        if self.store is not None:
+            self.store.save(session)
+        return session
+
+    def finish(self, attempt_id, user_id, quiz_id, answers=None):
+        """Close an attempt for grading and return ``(session, answers, elapsed seconds)``.
+
+        Submitted answers override the autosaved ones. The elapsed time comes from
+        the server clock and is capped at the time limit.
+        """
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            session = self._lookup(attempt_id, user_id, now)
+            if session.quiz_id != quiz_id:
+                raise AttemptError("Attempt belongs to another quiz.", 400)
+            if session.deadline is not None and now > session.deadline + self.grace:
+                raise AttemptError("Time limit exceeded.", 410)
+            del self._sessions[attempt_id]
+            if self._active.get((user_id, session.quiz_id)) == attempt_id:
+                del self._active[(user_id, session.quiz_id)]
+        if self.store is not None and not self.store.delete(attempt_id):
+            raise AttemptError("Attempt already submitted.", 409)
+        with self._lock:
+            self.submitted += 1
+
+        final_answers = dict(session.answers)
+        final_answers.update({str(question_id): answer for question_id, answer in (answers or {}).items()})
+        elapsed = session.elapsed(now)
+        if session.deadline is not None:
+            elapsed = min(elapsed, session.deadline - session.started_at)
+        return session, final_answers, elapsed
+
+    def stats(self):
+        return {
+            "active": len(self._sessions),
+            "scheduled": len(self._wheel),
+            "started": self.started,
+            "resumed": self.resumed,
+            "autosaves": self.autosaves,
+            "submitted": self.submitted,
+            "expired": self.expired,
+            "journaled": self.store is not None
+        }
+
+
+def time_limit_seconds(quiz):
+    """A quiz's time limit in seconds: ``time_limit`` (minutes), else ``duration`` (a time of day), else None."""
+    if quiz.time_limit:
+        return quiz.time_limit * 60
+    if quiz.duration is not None:
+        seconds = quiz.duration.hour * 3600 + quiz.duration.minute * 60 + quiz.duration.second
+        return seconds or None
+    return None
+
+
+def minutes(seconds):
+    """Round elapsed seconds up to whole minutes, the unit of Score.total_time_taken."""
+    return math.ceil(seconds / 60)
+
+
+attempt_sessions = AttemptSessionManager()
@@ -3,18 +3,28 @@ from flask import request, jsonify
 from applications.model import User
 from applications.database import db
 from applications.user_datastore import user_datastore
+from applications.token_cache import TokenCache, strip_bearer
+from applications.config import Config
+from applications.hashing import hashing_pool, login_throttle, PoolSaturated
+from applications.permissions import token_claims, permissions_required
+from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta
-from werkzeug.security import generate_password_hash, check_password_hash
 import jwt
 import re
 import logging
 
-logging.basicConfig(level=logging.INFO)
-
 # JWT Configuration
 SECRET_KEY = "your_secret_key"  # Replace with a secure secret key
 TOKEN_EXPIRY_HOURS = 24
 
+# Verified payloads are shared by every decorator that checks a token
+token_cache = TokenCache(
+    SECRET_KEY,
+    max_size=Config.TOKEN_CACHE_SIZE,
+    max_ttl=Config.TOKEN_CACHE_MAX_TTL,
+    negative_ttl=Config.TOKEN_CACHE_NEGATIVE_TTL
+)
+
 # Utility functions
 def is_valid_email(email):
     """Validate email format."""
@@ -34,25 +44,22 @@ def validate_password(password):
     return True, ""
 
 def generate_jwt(user):
-    """Generate JWT token."""
+    """Generate JWT token (roles and permission bits are resolved here, once per login)."""
     payload = {
         "user_id": user.id,
         "email": user.email,
-        "role": user.roles[0].name if user.roles else "user",
+        **token_claims(user),
         "exp": datetime.utcnow() + timedelta(hours=TOKEN_EXPIRY_HOURS)
     }
     token = jwt.encode(payload, SECRET_KEY, algorithm="HS256")
     return token
 
 def decode_jwt(token):
-    """Decode JWT token."""
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-        return payload
-    except jwt.ExpiredSignatureError:
-        return {"error": "Token has expired."}
-    except jwt.InvalidTokenError:
-        return {"error": "Invalid token."}
+    """Decode JWT token (served from the verified-token cache when possible)."""
+    payload, error = token_cache.decode(strip_bearer(token))
+    if error:
+        return {"error": error}
+    return payload
 
 # Resource for user login
 class Login(Resource):
@@ -65,15 +72,33 @@ class Login(Resource):
         if not email or not password:
             return {"message": "Email and password are required"}, 400
 
-        # Find user and verify credentials
-        user = user_datastore.find_user(email=email)
+        # Refuse throttled account/address pairs before spending a hash on them. Keyed on the
+        # client address too, so failures from one source cannot lock the account for everyone.
+        identifier = (email.strip().lower(), request.remote_addr)
+        retry_after = login_throttle.retry_after(identifier)
+        if retry_after:
+            logging.warning(f"Throttled login attempt for email: {email}")
+            return {"message": "Too many failed login attempts. Please try again later."}, 429, {
+                "Retry-After": str(retry_after)
+            }
+
+        # Find user (with roles, for the token claims) and verify credentials in the bounded hashing pool
+        user = User.query.options(joinedload(User.roles)).filter_by(email=email).first()
         if user:
-            logging.info(f"User found: {email}")
-            if check_password_hash(user.password, password):
+            logging.debug(f"User found: {email}")
+            try:
+                password_ok = hashing_pool.verify(user.password, password)
+            except PoolSaturated as e:
+                return {"message": "Server is busy. Please try again shortly."}, 503, {
+                    "Retry-After": str(e.retry_after)
+                }
+            if password_ok:
                 logging.info(f"Password verified for user: {email}")
+                login_throttle.succeeded(identifier)
                 token = generate_jwt(user)
                 return {"message": "Logged in successfully", "auth_token": token}, 200
 
+        login_throttle.failed(identifier)
         logging.warning(f"Failed login attempt for email: {email}")
         return {"message": "Invalid email or password"}, 401
 
@@ -108,12 +133,20 @@ class Register(Resource):
             logging.warning(f"Registration attempt with existing email: {email}")
             return {"message": "Email already exists"}, 400
 
+        # Hash in the bounded pool; a saturated pool answers 503 instead of stalling the worker
+        try:
+            password_hash = hashing_pool.generate(password)
+        except PoolSaturated as e:
+            return {"message": "Server is busy. Please try again shortly."}, 503, {
+                "Retry-After": str(e.retry_after)
+            }
+
         # Create user with hashed password
         try:
             user = user_datastore.create_user(
                 username=username,
                 email=email,
-                password=generate_password_hash(password),
+                password=password_hash,
                 full_name=data.get('full_name', ''),
                 qualification=data.get('qualification', ''),
                 dob=dob,
@@ -143,21 +176,33 @@ class Logout(Resource):
                 return {"message": "An error occurred during logout."}, 500
         return {"message": "No token provided for logout."}, 400
 
-# Middleware for role-based access control
-def role_required(required_role):
-    def decorator(func):
-        def wrapper(*args, **kwargs):
-            token = request.headers.get("Authorization")
-            if not token:
-                return {"message": "Authorization token is required"}, 401
+# Middleware for JWT authentication (check permissions with permissions_required underneath)
+def token_required(func):
+    def wrapper(*args, **kwargs):
+        token = request.headers.get("Authorization")
+        if not token:
+            return {"message": "Authorization token is required"}, 401
+
+        token_data = decode_jwt(token)
+        if "error" in token_data:
+            return {"message": token_data["error"]}, 401
+
+        request.user = token_data
+        return func(*args, **kwargs)
+    return wrapper
+
 
-            token_data = decode_jwt(token)
-            if "error" in token_data:
-                return {"message": token_data["error"]}, 401
+# Resource exposing verified-token cache counters
+class TokenCacheStats(Resource):
+    @token_required
+    @permissions_required('system:read')
+    def get(self):
+        return token_cache.stats(), 200
 
-            if token_data.get("role") != required_role:
-                return {"message": "Access denied: insufficient privileges"}, 403
 
-            return func(*args, **kwargs)
-        return wrapper
-    return decorator
+# Resource exposing password hashing pool and login throttle metrics
+class HashingPoolStats(Resource):
+    @token_required
+    @permissions_required('system:read')
+    def get(self):
+        return {"pool": hashing_pool.stats(), "login_throttle": login_throttle.stats()}, 200
@@ -0,0 +1,102 @@
+from applications import migrations, query_audit
+from applications.database import db
+from applications.user_datastore import user_datastore
+from applications.permissions import DEFAULT_ROLE_PERMISSIONS
+from werkzeug.security import generate_password_hash
+import click
+import logging
+import os
+
+
+def bootstrap(admin_email, admin_password):
+    """Create the tables, apply pending migrations and seed the default roles and admin user."""
+    db.create_all()
+    applied = migrations.upgrade()
+
+    admin_role = user_datastore.find_or_create_role(name='admin', description='Administrator')
+    user_role = user_datastore.find_or_create_role(name='user', description='Quiz User')
+    for role in (admin_role, user_role):
+        # Set directly: Flask-Security would turn a permissions string into a list
+        if role.permissions is None:
+            role.permissions = DEFAULT_ROLE_PERMISSIONS[role.name]
+    if not user_datastore.find_user(email=admin_email):
+        user_datastore.create_user(
+            email=admin_email,
+            username="admin",
+            password=generate_password_hash(admin_password),
+            roles=[admin_role]
+        )
+        logging.info(f"Created default admin user {admin_email}")
+    db.session.commit()
+    return applied
+
+
+def register_commands(app):
+    """Attach the maintenance commands to ``flask`` (run with FLASK_APP=app)."""
+
+    @app.cli.command("bootstrap")
+    def bootstrap_command():
+        """Create the schema, apply migrations and seed the default roles and admin user."""
+        applied = bootstrap(app.config["ADMIN_EMAIL"], app.config["ADMIN_PASSWORD"])
+        click.echo(f"Database ready at schema version {migrations.LATEST_VERSION}"
+                   + (f" (applied migrations: {', '.join(map(str, applied))})." if applied else "."))
+
+    @app.cli.command("migrate")
+    def migrate_command():
+        """Apply pending schema migrations."""
+        applied = migrations.upgrade()
+        if applied:
+            click.echo(f"Applied migrations: {', '.join(map(str, applied))}")
+        else:
+            click.echo(f"Schema is up to date (version {migrations.LATEST_VERSION}).")
+
+    @app.cli.command("enroll-users")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--format", "fmt", type=click.Choice(["csv", "ndjson"]), default=None,
+                  help="Input format (default: from the file extension).")
+    @click.option("--job", "job_id", default=None, help="Job id to resume (or to name a new job).")
+    @click.option("--workers", type=int, default=None, help="Password hashing processes (default: one per CPU).")
+    @click.option("--chunk-size", type=int, default=None, help="Users per transaction.")
+    def enroll_users_command(path, fmt, job_id, workers, chunk_size):
+        """Enroll users from a CSV or NDJSON file; rerun with --job to resume after an interruption."""
+        from applications.enrollment import Enrollment, ENROLLMENT_CHUNK_SIZE
+        from applications.hashing import HashingPool
+        from applications.question_bulk_api import _iter_rows
+
+        fmt = fmt or ("csv" if path.lower().endswith(".csv") else "ndjson")
+        pool = HashingPool(workers=workers if workers is not None else os.cpu_count() or 1, max_queue=0)
+
+        def progress(report, line_number):
+            click.echo(f"  line {line_number}: {report['inserted']} inserted, {report['rejected']} rejected")
+
+        enrollment = Enrollment(job_id, source=os.path.basename(path), chunk_size=chunk_size or ENROLLMENT_CHUNK_SIZE,
+                                pool=pool, progress=progress)
+        click.echo(f"Enrollment job {enrollment.report['job_id']}"
+                   + (f", resuming after line {enrollment.resumed_from}" if enrollment.resumed_from else ""))
+        try:
+            with open(path, "rb") as stream:
+                report = enrollment.run(_iter_rows(fmt, stream))
+        finally:
+            pool.shutdown()
+
+        for error in report["errors"][:20]:
+            click.echo(f"  line {error['line']}: {'; '.join(error['errors'])}")
+        if len(report["errors"]) > 20:
+            click.echo(f"  ... {report['rejected'] - 20} more rejected rows")
+        click.echo(f"Inserted {report['inserted']}, rejected {report['rejected']}, skipped {report['skipped']} "
+                   f"(already committed).")
+
+    @app.cli.command("audit-queries")
+    @click.option("--verbose", is_flag=True, help="Print the full plan of every query.")
+    def audit_queries_command(verbose):
+        """EXPLAIN the endpoint queries and fail if any falls back to a full table scan."""
+        failures = 0
+        for name, plan, scans in query_audit.audit():
+            status = "SCAN " + ", ".join(scans) if scans else "ok"
+            click.echo(f"[{status}] {name}")
+            if verbose or scans:
+                for line in plan:
+                    click.echo(f"    {line}")
+            failures += bool(scans)
+        if failures:
+            raise click.ClickException(f"{failures} query(s) fall back to a full table scan.")
@@ -1,4 +1,44 @@
 import os
+from sqlalchemy.engine import make_url
+
+# SQLite connection settings of the production profile, applied with PRAGMA on every new connection
+PRODUCTION_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',  # readers no longer block the writer (and vice versa)
+    'synchronous': 'NORMAL',  # fsync at checkpoints only; safe with WAL
+    'busy_timeout': 5000,  # ms to wait for a lock instead of failing with "database is locked"
+    'mmap_size': 268435456,  # 256 MiB memory-mapped reads
+    'cache_size': -65536,  # 64 MiB page cache per connection (negative = KiB)
+    'temp_store': 'MEMORY',
+}
+
+
+def _engine_options(url, profile):
+    """Pool settings for the database behind ``url``."""
+    if make_url(url).get_backend_name() == 'sqlite':
+        # The pysqlite timeout is its own busy handler; pool connections may move between threads
+        return {'connect_args': {'timeout': 30 if profile == 'production' else 5, 'check_same_thread': False}}
+    if profile != 'production':
+        return {'pool_pre_ping': True}
+    return {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),  # below typical server idle timeouts
+        'pool_pre_ping': True,
+    }
+
+
+def _read_only_url(url):
+    """Read-only counterpart of a SQLite URL (a second connection opened with mode=ro)."""
+    sqlite_url = make_url(url)
+    if sqlite_url.get_backend_name() != 'sqlite' or sqlite_url.database in (None, '', ':memory:'):
+        return None
+    if sqlite_url.query.get('uri'):
+        return sqlite_url.update_query_dict({'mode': 'ro'}).render_as_string(hide_password=False)
+    return sqlite_url.set(database=f'file:{sqlite_url.database}').update_query_dict(
+        {'mode': 'ro', 'uri': 'true'}
+    ).render_as_string(hide_password=False)
+
 
 class Config:
     # Flask Settings
@@ -12,12 +52,83 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Database profile: "default" (development) or "production" (WAL, tuned pools, read-only engine)
+    DB_PROFILE = os.environ.get('DB_PROFILE', 'default')
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(SQLALCHEMY_DATABASE_URI, DB_PROFILE)
+    SQLITE_PRAGMAS = PRODUCTION_SQLITE_PRAGMAS if DB_PROFILE == 'production' else {'busy_timeout': 5000}
+
+    # Optional read-only engine (bind "readonly"): DATABASE_READ_URL, e.g. a replica, or for
+    # SQLite a mode=ro connection to the primary file (on by default in the production profile)
+    DATABASE_READ_URL = os.environ.get('DATABASE_READ_URL') or (
+        _read_only_url(SQLALCHEMY_DATABASE_URI)
+        if os.environ.get('READ_ONLY_ENGINE', 'true' if DB_PROFILE == 'production' else 'false').lower() == 'true'
+        else None
+    )
+    SQLALCHEMY_BINDS = {
+        'readonly': {'url': DATABASE_READ_URL, **_engine_options(DATABASE_READ_URL, DB_PROFILE)}
+    } if DATABASE_READ_URL else {}
+    READ_YOUR_WRITES_WINDOW = float(os.environ.get('READ_YOUR_WRITES_WINDOW', 5))  # Seconds a writer's reads stay on the primary
+
+    # Start-up: workers only check the schema version; `flask bootstrap` creates and seeds the database.
+    # AUTO_BOOTSTRAP runs that on start-up instead when the schema is missing or behind (development).
+    AUTO_BOOTSTRAP = os.environ.get('AUTO_BOOTSTRAP', 'false' if DB_PROFILE == 'production' else 'true').lower() == 'true'
+    ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'admin@quizmaster.com')
+    ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'admin123')
+
     # JWT Configuration
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'your_default_jwt_secret_key')  # Separate secret key for JWT
     JWT_ACCESS_TOKEN_EXPIRES = int(os.environ.get('JWT_ACCESS_TOKEN_EXPIRES', 86400))  # Token expiration in seconds (default: 1 day)
 
-    # Logging Configuration
+    # Verified-token cache (see applications/token_cache.py)
+    TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))  # Max cached tokens per process
+    TOKEN_CACHE_MAX_TTL = int(os.environ.get('TOKEN_CACHE_MAX_TTL', 3600))  # Upper bound for a positive entry in seconds
+    TOKEN_CACHE_NEGATIVE_TTL = int(os.environ.get('TOKEN_CACHE_NEGATIVE_TTL', 30))  # How long invalid tokens are remembered
+
+    # Write-behind score persistence (see applications/score_writer.py)
+    SCORE_WRITE_BEHIND = os.environ.get('SCORE_WRITE_BEHIND', 'false').lower() == 'true'  # Opt-in
+    SCORE_BATCH_SIZE = int(os.environ.get('SCORE_BATCH_SIZE', 200))  # Rows per bulk commit
+    SCORE_FLUSH_INTERVAL = float(os.environ.get('SCORE_FLUSH_INTERVAL', 0.5))  # Max seconds a row waits
+    SCORE_SPOOL_DIR = os.environ.get('SCORE_SPOOL_DIR')  # Defaults to <instance>/score_spool
+    SCORE_SPOOL_FSYNC = os.environ.get('SCORE_SPOOL_FSYNC', 'true').lower() == 'true'
+
+    # Leaderboards (see applications/leaderboard.py)
+    LEADERBOARD_MAX_BOARDS = int(os.environ.get('LEADERBOARD_MAX_BOARDS', 1000))  # Quizzes kept in memory
+    LEADERBOARD_SYNC_INTERVAL = float(os.environ.get('LEADERBOARD_SYNC_INTERVAL', 2.0))  # Seconds between catch-ups
+
+    # Password hashing pool and login throttling (see applications/hashing.py)
+    HASH_POOL_WORKERS = int(os.environ.get('HASH_POOL_WORKERS', min(4, os.cpu_count() or 1)))  # 0 hashes inline
+    HASH_POOL_QUEUE = int(os.environ.get('HASH_POOL_QUEUE', 32))  # Hashes allowed to wait for a worker
+    HASH_POOL_TIMEOUT = float(os.environ.get('HASH_POOL_TIMEOUT', 10))  # Seconds before a hash is abandoned
+    LOGIN_MAX_FAILURES = int(os.environ.get('LOGIN_MAX_FAILURES', 5))  # Failed logins per account and client address per window
+    LOGIN_FAILURE_WINDOW = int(os.environ.get('LOGIN_FAILURE_WINDOW', 300))  # Window in seconds
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 0))  # Trusted proxies setting X-Forwarded-For (client address for throttling)
+
+    # Background bulk enrollment (see applications/enrollment.py)
+    ENROLLMENT_UPLOAD_DIR = os.environ.get('ENROLLMENT_UPLOAD_DIR')  # Defaults to <instance>/enrollment_uploads
+    ENROLLMENT_HASH_WORKERS = int(os.environ.get('ENROLLMENT_HASH_WORKERS', 0))  # Pool workers an enrollment may occupy (0: half of HASH_POOL_WORKERS)
+
+    # Per-request SQL and latency instrumentation (see applications/instrumentation.py)
+    INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', 'false').lower() == 'true'  # Opt-in
+    INSTRUMENTATION_QUERY_WARN = int(os.environ.get('INSTRUMENTATION_QUERY_WARN', 20))  # Log requests running more queries
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # If set, /metrics requires "Authorization: Bearer <token>"
+
+    # Response encoding (see applications/encoding.py)
+    RESPONSE_COMPRESSION = os.environ.get('RESPONSE_COMPRESSION', 'true').lower() == 'true'  # gzip/brotli per Accept-Encoding
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))  # Smaller bodies are sent as they are
+
+    # Logging Configuration (see applications/log_pipeline.py)
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')  # json (structured) or text
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))  # Records buffered before new ones are dropped
+    ATTEMPT_DETAIL_SAMPLE_RATE = float(os.environ.get('ATTEMPT_DETAIL_SAMPLE_RATE', 0))  # Share of submissions logged in detail
+    ATTEMPT_DETAIL_RATE_LIMIT = float(os.environ.get('ATTEMPT_DETAIL_RATE_LIMIT', 20))  # Max detail records per second
+
+    # Server-timed quiz attempts (see applications/attempt_sessions.py)
+    ATTEMPT_SUBMIT_GRACE = int(os.environ.get('ATTEMPT_SUBMIT_GRACE', 30))  # Seconds past the time limit a submission is accepted
+    ATTEMPT_UNTIMED_TTL = int(os.environ.get('ATTEMPT_UNTIMED_TTL', 4 * 3600))  # Idle lifetime of attempts on untimed quizzes
+    ATTEMPT_MAX_SESSIONS = int(os.environ.get('ATTEMPT_MAX_SESSIONS', 100000))  # Attempts in progress per process
+    ATTEMPT_WHEEL_SLOTS = int(os.environ.get('ATTEMPT_WHEEL_SLOTS', 512))  # One-second slots of the expiry wheel
+    ATTEMPT_SESSION_STORE = os.environ.get('ATTEMPT_SESSION_STORE', 'attempts.db')  # Local SQLite journal shared by the workers (relative to instance/); "memory" keeps attempts per worker
 
     # CORS Configuration
     CORS_HEADERS = 'Content-Type'
@@ -1,3 +1,79 @@
+from flask import g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from contextlib import contextmanager
 
-db = SQLAlchemy()
+# Bind key of the optional read-only engine (see Config.SQLALCHEMY_BINDS)
+READ_ONLY_BIND = "readonly"
+
+
+class RoutingSession(Session):
+    """Session that sends the reads of a request marked ``g.read_only_bind`` to the read-only engine.
+
+    Flushes, explicit binds and models with their own bind key keep the
+    normal Flask-SQLAlchemy routing, so writes always reach the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_request_context() and g.get("read_only_bind"):
+            engine = self._db.engines.get(READ_ONLY_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+@contextmanager
+def use_primary():
+    """Run the enclosed queries on the primary engine even inside a read-only request.
+
+    Used where results outlive the request (shared caches, leaderboards), so a
+    lagging replica can never be frozen into them.
+    """
+    if not has_request_context() or not g.get("read_only_bind"):
+        yield
+        return
+    g.read_only_bind = False
+    try:
+        yield
+    finally:
+        g.read_only_bind = True
+
+
+def _pragma_listener(pragmas):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+    return set_pragmas
+
+
+def configure_engines(app):
+    """Apply the SQLITE_PRAGMAS of the active profile to every SQLite engine on connect.
+
+    Must run right after ``db.init_app`` (before any connection is opened). The
+    read-only engine skips ``journal_mode``, which needs write access, and is
+    additionally put in ``query_only`` mode.
+    """
+    pragmas = app.config.get("SQLITE_PRAGMAS") or {}
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            if engine.dialect.name != "sqlite":
+                continue
+            engine_pragmas = dict(pragmas)
+            if bind_key == READ_ONLY_BIND:
+                engine_pragmas.pop("journal_mode", None)
+                engine_pragmas["query_only"] = "ON"
+            if engine_pragmas:
+                event.listen(engine, "connect", _pragma_listener(engine_pragmas))
+
+
+def read_only_engine():
+    """The read-only engine if one is configured, else the primary engine."""
+    return db.engines.get(READ_ONLY_BIND, db.engine)
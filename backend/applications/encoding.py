@@ -0,0 +1,275 @@
+from flask import request, make_response
+from flask.json.provider import JSONProvider
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+import gzip
+import json
+import logging
+import threading
+import zlib
+
+# orjson, msgpack and brotli are in requirements.txt. A trimmed install still
+# serves JSON (stdlib encoder, gzip only); init_app logs which ones are missing.
+try:
+    import orjson
+except ImportError:  # the standard library encoder is the fallback
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # without msgpack every client is answered in JSON
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # gzip and identity are always available
+    brotli = None
+
+MSGPACK_MIMETYPE = "application/msgpack"
+COMPRESSIBLE_MIMETYPES = frozenset((
+    "application/json", "application/x-ndjson", "text/csv", "text/plain", MSGPACK_MIMETYPE, "application/x-msgpack"
+))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def timestamp(value):
+    """The API's one timestamp format: ISO 8601 in UTC with an explicit offset, e.g. 2024-10-01T10:00:00+00:00.
+
+    Accepts datetimes (naive ones are UTC, as stored) and epoch seconds; None stays None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc).isoformat()
+    return (value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)).isoformat()
+
+
+def _default(obj):
+    """Values the encoders do not handle natively; datetimes go through timestamp()."""
+    if isinstance(obj, datetime):
+        return timestamp(obj)
+    if isinstance(obj, (date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "tolist"):  # numpy arrays and scalars
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+if orjson is not None:
+    # Datetimes are passed through to _default so every encoder writes timestamp()'s format
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def json_bytes(obj, default=_default):
+        """Compact UTF-8 JSON for ``obj``."""
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS)
+
+    def json_loads(data):
+        return orjson.loads(data)
+else:
+    def json_bytes(obj, default=_default):
+        """Compact UTF-8 JSON for ``obj``."""
+        return json.dumps(obj, default=default, separators=(",", ":")).encode("utf-8")
+
+    def json_loads(data):
+        return json.loads(data)
+
+
+def msgpack_bytes(obj):
+    return msgpack.packb(obj, default=_default, use_bin_type=True, datetime=False)
+
+
+def negotiate_mediatype():
+    """MSGPACK_MIMETYPE when the client prefers MessagePack (and msgpack is installed), else JSON.
+
+    For responses built outside Flask-RESTful's representations, e.g. the caches.
+    """
+    if msgpack is None:
+        return "application/json"
+    best = request.accept_mimetypes.best_match(
+        ("application/json", MSGPACK_MIMETYPE, "application/x-msgpack"), default="application/json"
+    )
+    return "application/json" if best == "application/json" else MSGPACK_MIMETYPE
+
+
+def encode_body(obj, mediatype):
+    return msgpack_bytes(obj) if mediatype == MSGPACK_MIMETYPE else json_bytes(obj)
+
+
+class FastJSONProvider(JSONProvider):
+    """``app.json`` backed by json_bytes, so jsonify and the response caches share one encoder."""
+
+    default = staticmethod(_default)  # extended by Flask-Security's provider subclass (lazy strings)
+
+    def dumps(self, obj, **kwargs):
+        return json_bytes(obj, self.default).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return json_loads(s)
+
+
+def negotiate_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return "identity"
+
+
+def compress(body, encoding):
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return body
+
+
+def _stream_compressor(encoding):
+    """(process, finish) callables of an incremental compressor."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    return compressor.compress, compressor.flush
+
+
+def output_json(data, code, headers=None):
+    response = make_response(json_bytes(data), code)
+    response.mimetype = "application/json"
+    response.headers.extend(headers or {})
+    if msgpack is not None:
+        response.vary.add("Accept")
+    return response
+
+
+def output_msgpack(data, code, headers=None):
+    response = make_response(msgpack_bytes(data), code)
+    response.mimetype = MSGPACK_MIMETYPE
+    response.headers.extend(headers or {})
+    response.vary.add("Accept")
+    return response
+
+
+class ResponseEncoding:
+    """Serialization and compression of every API response.
+
+    Resources keep returning plain dicts; Flask-RESTful picks the JSON or
+    MessagePack representation from ``Accept``. After the response is built,
+    bodies of at least ``min_size`` bytes are gzip/brotli compressed per
+    ``Accept-Encoding``, and streamed list responses are compressed chunk by
+    chunk as they are generated. Responses that already carry a
+    Content-Encoding (the quiz payload and catalog caches) pass through.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.min_size = 1024
+        self._lock = threading.Lock()
+        self.compressed = 0
+        self.streamed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def init_app(self, app, api):
+        # Flask-Security builds its provider from json_provider_class, so set both before Security(app)
+        app.json_provider_class = FastJSONProvider
+        app.json = FastJSONProvider(app)
+        api.representations["application/json"] = output_json
+        if msgpack is not None:
+            api.representations[MSGPACK_MIMETYPE] = output_msgpack
+            api.representations["application/x-msgpack"] = output_msgpack
+        missing = [name for name, module in (("orjson", orjson), ("msgpack", msgpack), ("brotli", brotli)) if module is None]
+        if missing:
+            logging.warning(
+                f"Response encoding without {', '.join(missing)} (see requirements.txt): "
+                + ("Accept: application/msgpack is answered with JSON. " if msgpack is None else "")
+                + ("JSON uses the standard library encoder. " if orjson is None else "")
+                + ("Only gzip compression is offered." if brotli is None else "")
+            )
+
+        self.enabled = app.config.get("RESPONSE_COMPRESSION", self.enabled)
+        self.min_size = app.config.get("COMPRESS_MIN_SIZE", self.min_size)
+        if self.enabled:
+            app.after_request(self._compress_response)
+
+    def encoding_for(self, size):
+        """Content encoding for a pre-encoded body of ``size`` bytes, under the same rules as the hook."""
+        if not self.enabled or size < self.min_size:
+            return "identity"
+        return negotiate_encoding()
+
+    def _count(self, raw, encoded, streamed=False):
+        with self._lock:
+            self.compressed += 1
+            self.streamed += streamed
+            self.bytes_in += raw
+            self.bytes_out += encoded
+
+    def _compress_response(self, response):
+        if (not self.enabled or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough or "Content-Encoding" in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = negotiate_encoding()
+        if encoding == "identity":
+            return response
+
+        if response.is_streamed:
+            response.response = self._compress_stream(response.response, encoding)
+            response.headers.pop("Content-Length", None)
+        else:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return response
+            compressed = compress(body, encoding)
+            response.set_data(compressed)
+            self._count(len(body), len(compressed))
+
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)  # same content, different bytes
+        return response
+
+    def _compress_stream(self, chunks, encoding):
+        process, finish = _stream_compressor(encoding)
+        raw = encoded = 0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                raw += len(chunk)
+                output = process(chunk)
+                if output:
+                    encoded += len(output)
+                    yield output
+            output = finish()
+            encoded += len(output)
+            yield output
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+            self._count(raw, encoded, streamed=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "json_encoder": "orjson" if orjson is not None else "json",
+                "msgpack": msgpack is not None,
+                "brotli": brotli is not None,
+                "compressed": self.compressed,
+                "streamed": self.streamed,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "ratio": round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None
+            }
+
+
+response_encoding = ResponseEncoding()
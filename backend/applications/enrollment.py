@@ -0,0 +1,369 @@
+from applications.database import db
+from applications.model import User, EnrollmentJob, roles_users
+from applications.user_datastore import user_datastore
+from applications.auth_api import is_valid_email, validate_password
+from applications.hashing import hashing_pool
+from applications.encoding import timestamp
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime
+import csv
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: uploads are not locked against other workers
+    fcntl = None
+
+ENROLLMENT_CHUNK_SIZE = 500  # users per bulk INSERT / transaction
+MAX_REPORTED_ERRORS = 1000
+UPLOAD_FORMATS = ("csv", "ndjson")
+UPLOAD_COPY_BYTES = 1 << 20
+MAX_LENGTHS = {"username": 80, "email": 255, "full_name": 100, "qualification": 100}
+
+
+def _validate(row):
+    """Return (values_for_insert, password, errors) for one row, with the same rules as Register.post."""
+    errors = []
+    email = str(row.get("email") or "").strip()
+    username = str(row.get("username") or "").strip()
+    password = str(row.get("password") or "")
+
+    if not all([email, password, username]):
+        errors.append("Email, password, and username are required.")
+    if email and not is_valid_email(email):
+        errors.append("Invalid email format.")
+    if password:
+        password_valid, password_message = validate_password(password)
+        if not password_valid:
+            errors.append(password_message)
+
+    dob = None
+    dob_str = str(row.get("dob") or "").strip()
+    if dob_str:
+        try:
+            dob = datetime.strptime(dob_str, '%Y-%m-%d').date()
+        except ValueError:
+            errors.append("Invalid date format for dob. Use 'YYYY-MM-DD'.")
+
+    values = {
+        "email": email,
+        "username": username,
+        "full_name": str(row.get("full_name") or "").strip(),
+        "qualification": str(row.get("qualification") or "").strip(),
+        "dob": dob
+    }
+    for field, limit in MAX_LENGTHS.items():
+        if len(values[field]) > limit:
+            errors.append(f"{field} is longer than {limit} characters.")
+    return values, password, errors
+
+
+class Enrollment:
+    """One bulk enrollment run, checkpointed in an EnrollmentJob row.
+
+    Rows are validated as they stream in and collected into chunks. Each chunk
+    is checked against existing accounts with two IN queries, its passwords are
+    hashed across the process pool, and its users and role links are inserted
+    with one executemany each, in the same transaction as the job checkpoint.
+    Running again with the same job id skips every line already committed.
+    """
+
+    def __init__(self, job_id=None, source=None, chunk_size=ENROLLMENT_CHUNK_SIZE, pool=None, progress=None,
+                 hash_concurrency=None):
+        self.chunk_size = chunk_size
+        self.pool = pool or hashing_pool
+        self.hash_concurrency = hash_concurrency  # pool workers this run may occupy (default: all)
+        self.progress = progress  # called with the report after every committed chunk
+
+        self.job = db.session.get(EnrollmentJob, job_id) if job_id else None
+        if self.job is None:
+            self.job = EnrollmentJob(id=job_id or uuid.uuid4().hex, source=source, status="running")
+            db.session.add(self.job)
+        self.job.status = "running"
+        role = user_datastore.find_or_create_role(name="user")
+        db.session.commit()
+        self.role_id = role.id
+
+        self.resumed_from = self.job.committed_line
+        self.report = {
+            "job_id": self.job.id, "resumed_from_line": self.resumed_from,
+            "inserted": 0, "rejected": 0, "skipped": 0, "chunks": 0, "errors": []
+        }
+        self._chunk = []  # (line_number, values, password)
+        self._emails = set()
+        self._usernames = set()
+        self._last_line = self.resumed_from
+        self._uncommitted_rejections = 0
+
+    def reject(self, line_number, messages):
+        self.report["rejected"] += 1
+        self._uncommitted_rejections += 1
+        if len(self.report["errors"]) < MAX_REPORTED_ERRORS:
+            self.report["errors"].append({"line": line_number, "errors": messages})
+
+    def add(self, line_number, row, parse_error=None):
+        """Validate one input row and queue it; a full chunk is written straight away."""
+        if line_number <= self.resumed_from:
+            self.report["skipped"] += 1
+            return
+        self._last_line = max(self._last_line, line_number)
+        if parse_error:
+            self.reject(line_number, [parse_error])
+            return
+        values, password, errors = _validate(row)
+        if values["email"] in self._emails:
+            errors.append("Email appears earlier in this upload.")
+        if values["username"] in self._usernames:
+            errors.append("Username appears earlier in this upload.")
+        if errors:
+            self.reject(line_number, errors)
+            return
+        self._emails.add(values["email"])
+        self._usernames.add(values["username"])
+        self._chunk.append((line_number, values, password))
+        if len(self._chunk) >= self.chunk_size:
+            self.flush()
+
+    def run(self, rows):
+        """Consume (line_number, row, parse_error) tuples, e.g. from question_bulk_api._iter_rows."""
+        for line_number, row, parse_error in rows:
+            self.add(line_number, row, parse_error)
+        return self.finish()
+
+    def finish(self, status="completed"):
+        self.flush()
+        self.job.status = status
+        self.job.errors = json.dumps(self.report["errors"]) if self.report["errors"] else None
+        db.session.commit()
+        return self.report
+
+    def fail(self, message):
+        """Commit the rows read so far and mark the job failed with ``message``."""
+        self.report["errors"].append({"line": None, "errors": [message]})
+        return self.finish("failed")
+
+    def _drop_existing(self, chunk):
+        """Reject rows whose email or username is already taken (two set-based queries)."""
+        emails = {values["email"] for _, values, _ in chunk}
+        usernames = {values["username"] for _, values, _ in chunk}
+        taken_emails = {email for email, in db.session.query(User.email).filter(User.email.in_(emails))}
+        taken_usernames = {
+            username for username, in db.session.query(User.username).filter(User.username.in_(usernames))
+        }
+        kept = []
+        for entry in chunk:
+            line_number, values, _ = entry
+            errors = []
+            if values["email"] in taken_emails:
+                errors.append("Email already exists")
+            if values["username"] in taken_usernames:
+                errors.append("Username already exists")
+            if errors:
+                self.reject(line_number, errors)
+            else:
+                kept.append(entry)
+        return kept
+
+    def _commit_checkpoint(self, inserted):
+        """Record progress and commit it together with whatever the chunk inserted."""
+        self.job.committed_line = self._last_line
+        self.job.inserted += inserted
+        self.job.rejected += self._uncommitted_rejections
+        db.session.commit()
+        self._uncommitted_rejections = 0
+
+    def flush(self):
+        chunk, self._chunk = self._chunk, []
+        chunk = self._drop_existing(chunk) if chunk else []
+        hashes = self.pool.generate_many(
+            [password for _, _, password in chunk], concurrency=self.hash_concurrency
+        ) if chunk else []
+        rows = [
+            {**values, "password": password_hash, "active": True,
+             "fs_uniquifier": str(uuid.uuid4()), "created_at": datetime.utcnow()}
+            for (_, values, _), password_hash in zip(chunk, hashes)
+        ]
+
+        for attempt in range(2):
+            try:
+                if rows:
+                    db.session.execute(insert(User), rows)
+                    ids = db.session.query(User.id).filter(User.email.in_([row["email"] for row in rows])).all()
+                    db.session.execute(insert(roles_users), [{"user_id": user_id, "role_id": self.role_id} for user_id, in ids])
+                self._commit_checkpoint(len(rows))
+                break
+            except IntegrityError as e:
+                db.session.rollback()
+                if attempt:
+                    logging.error(f"Enrollment {self.job.id} chunk failed: {e}")
+                    for line_number, _, _ in chunk:
+                        self.reject(line_number, [f"Chunk insert failed: {e.orig}"])
+                    rows = []
+                    self._commit_checkpoint(0)
+                    break
+                # Someone registered one of these accounts meanwhile; drop the clashes and retry once
+                kept = {id(entry) for entry in self._drop_existing(chunk)}
+                rows = [row for entry, row in zip(chunk, rows) if id(entry) in kept]
+                chunk = [entry for entry in chunk if id(entry) in kept]
+
+        if rows:
+            self.report["inserted"] += len(rows)
+            self.report["chunks"] += 1
+            logging.info(f"Enrollment {self.job.id}: committed through line {self._last_line}")
+        if self.progress:
+            self.progress(self.report, self._last_line)
+
+
+def job_status(job_id):
+    job = db.session.get(EnrollmentJob, job_id)
+    if job is None:
+        return None
+    return {
+        "job_id": job.id,
+        "source": job.source,
+        "status": job.status,
+        "committed_line": job.committed_line,
+        "inserted": job.inserted,
+        "rejected": job.rejected,
+        "errors": json.loads(job.errors) if job.errors else [],
+        "created_at": timestamp(job.created_at),
+        "updated_at": timestamp(job.updated_at)
+    }
+
+
+class EnrollmentBusy(Exception):
+    """Raised when an upload for the same job id is still queued or running."""
+
+
+class EnrollmentQueue:
+    """Runs uploaded enrollments in the background, outside the request.
+
+    ``submit`` saves the upload as ``<upload_dir>/<job_id>.<token>.<format>`` and queues
+    it for a thread of the receiving worker, which runs the Enrollment and then
+    removes the file. The thread starts on first use in each process, so workers
+    forked from a preloaded app run their own. A worker holds a lock on the
+    upload while running it; uploads left behind by a process that died are
+    resumed after their last committed chunk by the next worker to start its thread.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.upload_dir = None
+        self.hash_concurrency = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pid = None  # process that owns the thread
+        self._start_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self.upload_dir = app.config.get("ENROLLMENT_UPLOAD_DIR") or os.path.join(app.instance_path, "enrollment_uploads")
+        os.makedirs(self.upload_dir, exist_ok=True)
+        # Leave the rest of the hashing pool to logins and registrations
+        self.hash_concurrency = app.config.get("ENROLLMENT_HASH_WORKERS") or max(1, hashing_pool.workers // 2)
+
+    def _uploads(self, job_id):
+        return [name for name in os.listdir(self.upload_dir)
+                if name.startswith(f"{job_id}.") and name.rsplit(".", 1)[-1] in UPLOAD_FORMATS]
+
+    def submit(self, stream, fmt, job_id=None, source=None):
+        """Save ``stream`` for a background run and return the job id."""
+        job_id = job_id or uuid.uuid4().hex
+        job = db.session.get(EnrollmentJob, job_id)
+        if job is not None and job.status in ("queued", "running") and self._uploads(job_id):
+            raise EnrollmentBusy(job_id)
+        if job is None:
+            job = EnrollmentJob(id=job_id, source=source)
+            db.session.add(job)
+        job.status = "queued"
+        db.session.commit()
+
+        path = os.path.join(self.upload_dir, f"{job_id}.{uuid.uuid4().hex}.{fmt}")
+        temporary = f"{path}.tmp"
+        try:
+            with open(temporary, "wb") as upload:
+                shutil.copyfileobj(stream, upload, UPLOAD_COPY_BYTES)
+            os.replace(temporary, path)  # only complete uploads carry the final name
+        except Exception:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            job.status = "failed"
+            db.session.commit()
+            raise
+
+        self._ensure_started()
+        self._queue.put(path)
+        return job_id
+
+    def status(self, job_id):
+        self._ensure_started()  # also picks up uploads orphaned by a dead worker
+        return job_status(job_id)
+
+    def _ensure_started(self):
+        # Threads do not survive a fork, so every process starts its own
+        if self._pid != os.getpid():
+            with self._start_lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue()
+                    for name in sorted(os.listdir(self.upload_dir)):
+                        if name.rsplit(".", 1)[-1] in UPLOAD_FORMATS:
+                            self._queue.put(os.path.join(self.upload_dir, name))
+                    self._thread = threading.Thread(target=self._run, name="enrollment", daemon=True)
+                    self._thread.start()
+                    self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            path = self._queue.get()
+            try:
+                self._process(path)
+            except Exception as e:
+                logging.error(f"Enrollment upload {path} failed: {e}")
+
+    def _process(self, path):
+        job_id, _, fmt = os.path.basename(path).split(".")
+        try:
+            upload = open(path, "rb")
+        except FileNotFoundError:
+            return  # already finished by another worker
+        with upload:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(upload.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return  # being run by another worker
+            if not os.path.exists(path):
+                return  # finished by the worker that held the lock before us
+
+            with self.app.app_context():
+                self._run_job(job_id, fmt, upload)
+            # Remove while still holding the lock so no other worker runs it twice
+            os.remove(path)
+
+    def _run_job(self, job_id, fmt, upload):
+        from applications.question_bulk_api import _iter_rows
+
+        try:
+            enrollment = Enrollment(job_id, hash_concurrency=self.hash_concurrency)
+            try:
+                enrollment.run(_iter_rows(fmt, upload))
+            except (UnicodeDecodeError, csv.Error) as e:
+                enrollment.fail(f"Could not read the upload: {e}")
+        except Exception as e:
+            logging.error(f"Enrollment {job_id} failed: {e}")
+            db.session.rollback()
+            job = db.session.get(EnrollmentJob, job_id)
+            if job is not None:
+                job.status = "failed"
+                job.errors = json.dumps([{"line": None, "errors": [str(e)]}])
+                db.session.commit()
+
+
+enrollment_queue = EnrollmentQueue()
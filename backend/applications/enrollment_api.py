@@ -0,0 +1,51 @@
+from flask_restful import Resource
+from flask import request
+from applications.enrollment import enrollment_queue, job_status, EnrollmentBusy, UPLOAD_FORMATS
+from applications.question_bulk_api import _request_format
+from applications.quizmanagement_api import auth_token_required
+from applications.permissions import permissions_required
+import logging
+import re
+
+# Job ids name the saved upload, so they are limited to file-name-safe characters
+JOB_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+# Bulk user enrollment (CSV or NDJSON, run in the background, resumable)
+class BulkEnrollment(Resource):
+    @auth_token_required
+    @permissions_required('users:manage')
+    def post(self):
+        """Queue an enrollment from a CSV or NDJSON body and answer 202 with its job.
+
+        The upload is saved and enrolled in the background, so passwords are not
+        hashed inside the request; poll ``GET /users/bulk/<job_id>`` for progress
+        and row errors. Pass ``job_id`` (any id of your choosing) to make the
+        upload resumable: sending the same file again with the same id skips the
+        committed lines.
+        """
+        fmt = _request_format()
+        if fmt not in UPLOAD_FORMATS:
+            return {"message": "format must be csv or ndjson."}, 400
+        job_id = request.args.get("job_id")
+        if job_id is not None and not JOB_ID_PATTERN.match(job_id):
+            return {"message": "job_id must be 1-64 letters, digits, '-' or '_'."}, 400
+
+        try:
+            job_id = enrollment_queue.submit(request.stream, fmt, job_id, source=request.args.get("source"))
+        except EnrollmentBusy:
+            return {"message": "This enrollment job is already queued or running."}, 409
+        except Exception as e:
+            logging.error(f"Error queueing enrollment: {e}")
+            return {"error": str(e)}, 500
+
+        return job_status(job_id), 202, {"Location": f"{request.path.rstrip('/')}/{job_id}"}
+
+    @auth_token_required
+    @permissions_required('users:manage')
+    def get(self, job_id=None):
+        """Progress of an enrollment job."""
+        status = enrollment_queue.status(job_id) if job_id else None
+        if status is None:
+            return {"message": "Enrollment job not found."}, 404
+        return status, 200
@@ -0,0 +1,195 @@
+from applications.database import db, use_primary
+from applications.model import Question, AnswerKeySnapshot, DEFAULT_QUESTION_MARKS
+from applications.response_cache import SharedVersion
+from applications.startup import lazy_import
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
+import hashlib
+import logging
+import threading
+
+np = lazy_import("numpy")  # imported on first use, not at worker start-up
+
+# Accepted spellings for each of the four options, all mapped to codes 1-4.
+# 0 is reserved for "unanswered / unrecognised" so it never matches a key entry.
+_OPTION_CODES = {}
+for _code, _aliases in enumerate(
+    (("1", "a", "option1"), ("2", "b", "option2"), ("3", "c", "option3"), ("4", "d", "option4")), start=1
+):
+    for _alias in _aliases:
+        _OPTION_CODES[_alias] = _code
+
+
+def option_code(value):
+    """Normalise a stored or submitted option (1, "1", "B", "option3", ...) to its code."""
+    if value is None:
+        return 0
+    return _OPTION_CODES.get(str(value).strip().lower(), 0)
+
+
+class AnswerKey:
+    """Compact, array-based answer key for one quiz."""
+
+    __slots__ = ("quiz_id", "question_ids", "correct", "marks", "total_marks", "digest", "snapshot_id", "_positions")
+
+    def __init__(self, quiz_id, rows):
+        rows = sorted(rows)
+        self.quiz_id = quiz_id
+        self.question_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.correct = np.array([option_code(row[1]) for row in rows], dtype=np.uint8)
+        self.marks = np.array(
+            [row[2] if row[2] is not None else DEFAULT_QUESTION_MARKS for row in rows], dtype=np.int64
+        )
+        self.total_marks = int(self.marks.sum())
+        self.digest = hashlib.blake2b(
+            self.packed_question_ids() + self.correct.tobytes() + self.packed_marks(), digest_size=16
+        ).hexdigest()
+        self.snapshot_id = None  # AnswerKeySnapshot row that packed attempt answers refer to
+        self._positions = {str(question_id): index for index, (question_id, _, _) in enumerate(rows)}
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def packed_question_ids(self):
+        return self.question_ids.astype("<i8").tobytes()
+
+    def packed_marks(self):
+        return self.marks.astype("<i8").tobytes()
+
+    def encode(self, answers):
+        """Turn a ``{question_id: option}`` mapping into a code array aligned with the key."""
+        submitted = np.zeros(len(self.question_ids), dtype=np.uint8)
+        positions = self._positions
+        for question_id, answer in answers.items():
+            index = positions.get(str(question_id))
+            if index is not None:
+                submitted[index] = option_code(answer)
+        return submitted
+
+    def grade(self, answers):
+        """Grade a submission with one vectorised comparison against the key."""
+        submitted = self.encode(answers)
+        correct_mask = submitted == self.correct
+        return GradeResult(self, submitted, correct_mask)
+
+
+class GradeResult:
+    """Outcome of grading one submission against an AnswerKey."""
+
+    __slots__ = ("key", "submitted", "correct_mask")
+
+    def __init__(self, key, submitted, correct_mask):
+        self.key = key
+        self.submitted = submitted
+        self.correct_mask = correct_mask
+
+    @property
+    def score(self):
+        return int(self.key.marks[self.correct_mask].sum())
+
+    @property
+    def correct_count(self):
+        return int(np.count_nonzero(self.correct_mask))
+
+    @property
+    def unanswered_count(self):
+        return int(np.count_nonzero(self.submitted == 0))
+
+    @property
+    def incorrect_count(self):
+        return len(self.key) - self.correct_count - self.unanswered_count
+
+    def packed_answers(self):
+        """The submitted option codes, one byte per question in answer key order."""
+        return self.submitted.tobytes()
+
+    def detail(self):
+        """Question ids answered wrongly and left unanswered, for attempt-detail records."""
+        unanswered = self.submitted == 0
+        return {
+            "incorrect": self.key.question_ids[~self.correct_mask & ~unanswered].tolist(),
+            "unanswered": self.key.question_ids[unanswered].tolist()
+        }
+
+
+class AnswerKeyCache:
+    """Per-quiz answer keys, built on first use and dropped when a quiz's questions change.
+
+    Once ``init_app`` has run, invalidations are shared through a SharedVersion
+    file: an edit handled by one worker makes every worker on the host drop its
+    keys before grading the next submission.
+    """
+
+    def __init__(self):
+        self._keys = {}
+        self._generation = 0  # bumped on every invalidation so in-flight builds are not stored stale
+        self._shared = SharedVersion("answer_keys")
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self._shared.init_app(app)
+
+    def get(self, quiz_id):
+        """Return the AnswerKey for a quiz, or None if it has no questions."""
+        quiz_id = int(quiz_id)
+        if self._shared.changed():
+            with self._lock:
+                self._generation += 1
+                self._keys.clear()
+
+        key = self._keys.get(quiz_id)
+        if key is not None:
+            return key
+
+        generation = self._generation
+        with use_primary():
+            rows = db.session.query(
+                Question.id, Question.correct_option, Question.marks
+            ).filter(Question.quiz_id == quiz_id).all()
+        if not rows:
+            return None
+
+        key = AnswerKey(quiz_id, [tuple(row) for row in rows])
+        key.snapshot_id = self._snapshot_id(key)
+        with self._lock:
+            if generation == self._generation:
+                self._keys[quiz_id] = key
+        return key
+
+    @staticmethod
+    def _snapshot_id(key):
+        """Find or store the AnswerKeySnapshot for ``key`` in its own short transaction."""
+        table = AnswerKeySnapshot.__table__
+        lookup = select(table.c.id).where(table.c.quiz_id == key.quiz_id, table.c.digest == key.digest)
+        try:
+            with db.engine.begin() as connection:
+                snapshot_id = connection.execute(lookup).scalar()
+                if snapshot_id is None:
+                    snapshot_id = connection.execute(insert(table).values(
+                        quiz_id=key.quiz_id,
+                        digest=key.digest,
+                        question_ids=key.packed_question_ids(),
+                        correct_options=key.correct.tobytes(),
+                        marks=key.packed_marks()
+                    )).inserted_primary_key[0]
+                return snapshot_id
+        except IntegrityError:
+            # Another worker stored the same key first
+            with db.engine.connect() as connection:
+                return connection.execute(lookup).scalar()
+        except Exception as e:
+            logging.error(f"Could not store answer key snapshot for quiz {key.quiz_id}: {e}")
+            return None
+
+    def invalidate(self, quiz_id=None):
+        """Forget the key of one quiz (or all) here and tell the other workers to drop everything."""
+        with self._lock:
+            self._generation += 1
+            if quiz_id is None:
+                self._keys.clear()
+            else:
+                self._keys.pop(int(quiz_id), None)
+            self._shared.bump(self._generation)
+
+
+answer_keys = AnswerKeyCache()
@@ -0,0 +1,239 @@
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from collections import deque
+from werkzeug.security import generate_password_hash, check_password_hash
+import math
+import os
+import threading
+import time
+
+# Upper bounds (seconds) of the hash latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class PoolSaturated(Exception):
+    """Raised when no hashing slot is free; ``retry_after`` is a hint in seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__("Password hashing pool is saturated.")
+        self.retry_after = retry_after
+
+
+class HashingPool:
+    """Bounded process pool for the deliberately slow password KDFs.
+
+    At most ``workers + max_queue`` hashes are admitted at once; any request
+    beyond that fails fast with PoolSaturated instead of tying up a web worker.
+    With ``workers=0`` hashing runs inline but admission control still applies.
+    """
+
+    def __init__(self, workers=None, max_queue=None, timeout=10.0):
+        self.workers = workers if workers is not None else min(4, os.cpu_count() or 1)
+        self.max_queue = max_queue if max_queue is not None else self.workers * 8
+        self.timeout = timeout
+        self._executor = None
+        self._executor_pid = None
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.bulk_completed = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.latency_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def init_app(self, app):
+        self.workers = app.config.get("HASH_POOL_WORKERS", self.workers)
+        self.max_queue = app.config.get("HASH_POOL_QUEUE", self.max_queue)
+        self.timeout = app.config.get("HASH_POOL_TIMEOUT", self.timeout)
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+
+    def _get_executor(self):
+        # Created lazily (and re-created after a fork) so every server worker owns its pool
+        if self._executor is None or self._executor_pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._executor_pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    self._executor_pid = os.getpid()
+        return self._executor
+
+    def _retry_after(self):
+        average = self.latency_sum / self.completed if self.completed else 0.5
+        backlog = self.in_flight / max(self.workers, 1)
+        return max(1, math.ceil(average * backlog))
+
+    def _observe(self, elapsed):
+        with self._lock:
+            self.completed += 1
+            self.latency_sum += elapsed
+            self.latency_max = max(self.latency_max, elapsed)
+            bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if elapsed <= bound), len(LATENCY_BUCKETS))
+            self.latency_counts[bucket] += 1
+
+    def _release(self, _future=None):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def run(self, func, *args):
+        """Run ``func(*args)`` in the pool, or raise PoolSaturated if no slot is free or it times out."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturated(self._retry_after())
+
+        with self._lock:
+            self.in_flight += 1
+        started = time.perf_counter()
+        if self.workers == 0:
+            try:
+                return func(*args)
+            finally:
+                self._observe(time.perf_counter() - started)
+                self._release()
+
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is held until the hash actually finishes, so abandoned work still counts against admission
+        future.add_done_callback(self._release)
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()  # drops it if still queued; a running hash keeps its slot until it ends
+            with self._lock:
+                self.timeouts += 1
+            raise PoolSaturated(self._retry_after())
+        self._observe(time.perf_counter() - started)
+        return result
+
+    def generate(self, password):
+        return self.run(generate_password_hash, password)
+
+    def verify(self, password_hash, password):
+        return self.run(check_password_hash, password_hash, password)
+
+    def generate_many(self, passwords, concurrency=None):
+        """Hash a batch for a bulk job, in input order.
+
+        Unlike run(), this waits for free slots instead of failing, and keeps at
+        most ``concurrency`` (default ``workers``) of them so interactive logins
+        can still use the queue.
+        """
+        if self.workers == 0:
+            return [generate_password_hash(password) for password in passwords]
+
+        concurrency = min(concurrency or self.workers, self.workers)
+        executor = self._get_executor()
+        hashes = [None] * len(passwords)
+        pending = deque()
+
+        def release(_):
+            self._slots.release()
+            with self._lock:
+                self.in_flight -= 1
+                self.bulk_completed += 1
+
+        for index, password in enumerate(passwords):
+            if len(pending) >= concurrency:
+                done, future = pending.popleft()
+                hashes[done] = future.result()
+            self._slots.acquire()
+            with self._lock:
+                self.in_flight += 1
+            future = executor.submit(generate_password_hash, password)
+            future.add_done_callback(release)
+            pending.append((index, future))
+        for index, future in pending:
+            hashes[index] = future.result()
+        return hashes
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "queue_depth": max(self.in_flight - max(self.workers, 1), 0),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "bulk_completed": self.bulk_completed,
+                "latency_avg": round(self.latency_sum / self.completed, 4) if self.completed else None,
+                "latency_max": round(self.latency_max, 4),
+                "latency_buckets": {
+                    **{str(bound): count for bound, count in zip(LATENCY_BUCKETS, self.latency_counts)},
+                    "+Inf": self.latency_counts[-1]
+                }
+            }
+
+
+class LoginThrottle:
+    """Sliding-window limit on failed logins per identifier, e.g. (account, client address).
+
+    Once an identifier collects ``max_failures`` failures within ``window``
+    seconds, further attempts are refused before any hashing happens until
+    the oldest failure leaves the window.
+    """
+
+    def __init__(self, max_failures=5, window=300, max_tracked=100000):
+        self.max_failures = max_failures
+        self.window = window
+        self.max_tracked = max_tracked
+        self._failures = {}  # identifier -> deque of failure timestamps
+        self._lock = threading.Lock()
+        self.blocked = 0
+
+    def init_app(self, app):
+        self.max_failures = app.config.get("LOGIN_MAX_FAILURES", self.max_failures)
+        self.window = app.config.get("LOGIN_FAILURE_WINDOW", self.window)
+
+    def retry_after(self, identifier):
+        """Seconds until ``identifier`` may try again, or 0 if it is not throttled."""
+        now = time.monotonic()
+        with self._lock:
+            failures = self._failures.get(identifier)
+            if not failures:
+                return 0
+            while failures and failures[0] <= now - self.window:
+                failures.popleft()
+            if not failures:
+                del self._failures[identifier]
+                return 0
+            if len(failures) < self.max_failures:
+                return 0
+            self.blocked += 1
+            return max(1, math.ceil(failures[0] + self.window - now))
+
+    def failed(self, identifier):
+        now = time.monotonic()
+        with self._lock:
+            if identifier not in self._failures and len(self._failures) >= self.max_tracked:
+                self._prune(now)
+            failures = self._failures.setdefault(identifier, deque(maxlen=self.max_failures))
+            failures.append(now)
+
+    def succeeded(self, identifier):
+        with self._lock:
+            self._failures.pop(identifier, None)
+
+    def _prune(self, now):
+        expired = [key for key, failures in self._failures.items() if not failures or failures[-1] <= now - self.window]
+        for key in expired:
+            del self._failures[key]
+
+    def stats(self):
+        with self._lock:
+            return {"tracked": len(self._failures), "blocked": self.blocked}
+
+
+hashing_pool = HashingPool()
+login_throttle = LoginThrottle()
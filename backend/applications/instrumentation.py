@@ -0,0 +1,240 @@
+from flask import request, Response, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from contextvars import ContextVar
+import logging
+import os
+import threading
+import time
+
+# Histogram bucket upper bounds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)  # seconds
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)  # statements per request
+
+# Timing of the request being handled by the current thread (None outside requests)
+_current = ContextVar("request_timing", default=None)
+
+
+class RequestTiming:
+    """Per-request counters filled in by the engine events and the response representations."""
+
+    __slots__ = ("started", "queries", "db_time", "serialize_time", "status", "streamed", "_query_started")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.status = 500  # replaced in after_request; stays 500 if the request blew up first
+        self.streamed = False
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self._query_started = None
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense (not thread-safe on its own)."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.bounds):
+            if value <= bound:
+                break
+        else:
+            index = len(self.bounds)
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {round(self.sum, 6)}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class Instrumentation:
+    """Opt-in per-request SQL and latency instrumentation.
+
+    Every request gets a RequestTiming; SQLAlchemy cursor events add the
+    statement count and database time, and the Flask-RESTful
+    representations add serialization time. The totals are returned in a
+    ``Server-Timing`` header and folded into per-resource histograms served as
+    Prometheus text on ``/metrics`` (one set of series per worker process).
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.query_warn_threshold = 20
+        self.metrics_token = None
+        self._collectors = {}
+        self._series = {}  # (resource, method) -> {"duration": ..., "db": ..., "queries": ..., "statuses": {}}
+        self._resources = {}  # Flask endpoint -> resource class name
+        self._lock = threading.Lock()
+
+    def init_app(self, app, api=None):
+        self.enabled = app.config.get("INSTRUMENTATION_ENABLED", False)
+        if not self.enabled:
+            return
+        self.query_warn_threshold = app.config.get("INSTRUMENTATION_QUERY_WARN", self.query_warn_threshold)
+        self.metrics_token = app.config.get("METRICS_TOKEN")
+
+        # Class-level listeners cover every engine, including ones created later
+        event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule("/metrics", "metrics", self.metrics_view)
+        if api is not None:
+            self._wrap_representation(api)
+
+    def register_collector(self, name, stats):
+        """Export the numeric values of ``stats()`` as ``quiz_<name>_<key>`` gauges on /metrics."""
+        self._collectors[name] = stats
+
+    # SQLAlchemy engine events
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        timing = _current.get()
+        if timing is not None:
+            timing._query_started = time.perf_counter()
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        timing = _current.get()
+        if timing is not None and timing._query_started is not None:
+            timing.db_time += time.perf_counter() - timing._query_started
+            timing.queries += 1
+            timing._query_started = None
+
+    def _wrap_representation(self, api):
+        if "application/json" not in api.representations:
+            from flask_restful.representations.json import output_json
+            api.representations["application/json"] = output_json
+
+        def timed(output):
+            def timed_output(data, code, headers=None):
+                started = time.perf_counter()
+                response = output(data, code, headers)
+                timing = _current.get()
+                if timing is not None:
+                    timing.serialize_time += time.perf_counter() - started
+                return response
+            return timed_output
+
+        for mediatype, output in list(api.representations.items()):
+            api.representations[mediatype] = timed(output)
+
+    # Flask request lifecycle
+    def _before_request(self):
+        _current.set(RequestTiming())
+
+    def _resource_name(self, endpoint):
+        name = self._resources.get(endpoint)
+        if name is None:
+            view = current_app.view_functions.get(endpoint)
+            name = getattr(getattr(view, "view_class", None), "__name__", None) or endpoint or "unmatched"
+            self._resources[endpoint] = name
+        return name
+
+    def _after_request(self, response):
+        timing = _current.get()
+        if timing is None:
+            return response
+        total = time.perf_counter() - timing.started
+        handler = max(total - timing.db_time - timing.serialize_time, 0.0)
+        response.headers["Server-Timing"] = (
+            f'db;dur={timing.db_time * 1000:.2f};desc="{timing.queries} queries", '
+            f"ser;dur={timing.serialize_time * 1000:.2f}, "
+            f"app;dur={handler * 1000:.2f}, "
+            f"total;dur={total * 1000:.2f}"
+        )
+        timing.status = response.status_code
+        timing.streamed = response.is_streamed
+        return response
+
+    def _teardown_request(self, exc=None):
+        timing = _current.get()
+        if timing is None:
+            return
+        if timing.streamed:
+            # stream_with_context tears the request down again once the body is exhausted;
+            # record then so the queries issued while streaming are counted too
+            timing.streamed = False
+            return
+        _current.set(None)
+        self._record(self._resource_name(request.endpoint), request.method, timing.status, timing)
+
+    def _record(self, resource, method, status, timing):
+        total = time.perf_counter() - timing.started
+        with self._lock:
+            series = self._series.get((resource, method))
+            if series is None:
+                series = self._series[(resource, method)] = {
+                    "duration": Histogram(DURATION_BUCKETS),
+                    "db": Histogram(DURATION_BUCKETS),
+                    "serialize": Histogram(DURATION_BUCKETS),
+                    "queries": Histogram(QUERY_BUCKETS),
+                    "statuses": {}
+                }
+            series["duration"].observe(total)
+            series["db"].observe(timing.db_time)
+            series["serialize"].observe(timing.serialize_time)
+            series["queries"].observe(timing.queries)
+            series["statuses"][status] = series["statuses"].get(status, 0) + 1
+        if timing.queries > self.query_warn_threshold:
+            logging.warning(f"{method} {resource} ran {timing.queries} queries ({timing.db_time * 1000:.1f} ms in the database)")
+
+    # /metrics
+    def metrics_view(self):
+        if self.metrics_token and request.headers.get("Authorization") != f"Bearer {self.metrics_token}":
+            return Response("Unauthorized\n", status=401, mimetype="text/plain")
+        return Response(self.render(), mimetype="text/plain; version=0.0.4")
+
+    def render(self):
+        """Render every series and collector in the Prometheus text exposition format."""
+        histograms = (
+            ("duration", "quiz_request_duration_seconds", "Wall time per request."),
+            ("db", "quiz_request_db_seconds", "Time spent executing SQL per request."),
+            ("serialize", "quiz_request_serialize_seconds", "Time spent serializing the JSON body per request."),
+            ("queries", "quiz_request_queries", "SQL statements per request."),
+        )
+        lines = []
+        with self._lock:
+            series = sorted(self._series.items())
+            for key, name, description in histograms:
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+                for (resource, method), values in series:
+                    lines.extend(values[key].samples(name, f'resource="{resource}",method="{method}"'))
+            lines += ["# HELP quiz_requests_total Responses by resource, method and status.",
+                      "# TYPE quiz_requests_total counter"]
+            for (resource, method), values in series:
+                for status, count in sorted(values["statuses"].items()):
+                    lines.append(f'quiz_requests_total{{resource="{resource}",method="{method}",status="{status}"}} {count}')
+
+        for collector, stats in sorted(self._collectors.items()):
+            try:
+                values = stats()
+            except Exception as e:
+                logging.error(f"Metrics collector {collector} failed: {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if isinstance(value, (int, float)):
+                    lines.append(f"# TYPE quiz_{collector}_{key} gauge")
+                    lines.append(f"quiz_{collector}_{key} {value}")
+        lines.append(f"quiz_process_info{{pid=\"{os.getpid()}\"}} 1")
+        return "\n".join(lines) + "\n"
+
+
+instrumentation = Instrumentation()
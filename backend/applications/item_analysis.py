@@ -0,0 +1,113 @@
+from applications.database import db
+from applications.model import Question, AnswerKeySnapshot, AttemptAnswers
+from applications.startup import lazy_import
+
+np = lazy_import("numpy")  # imported on first use, not at worker start-up
+
+# Share of attempts in each of the upper and lower groups of the discrimination index
+GROUP_FRACTION = 0.27
+ANALYSIS_CHUNK_ROWS = 10000
+OPTION_CODES = range(5)  # 0 = unanswered, 1-4 = the options
+
+
+class _Snapshot:
+    """A stored answer key plus the matrix of attempts recorded against it."""
+
+    def __init__(self, row):
+        self.question_ids = np.frombuffer(row.question_ids, dtype="<i8")
+        self.correct = np.frombuffer(row.correct_options, dtype=np.uint8)
+        self.marks = np.frombuffer(row.marks, dtype="<i8")
+        self.total_marks = int(self.marks.sum())
+        self.buffer = bytearray()
+
+    def matrix(self):
+        if not len(self.question_ids):
+            return None
+        return np.frombuffer(bytes(self.buffer), dtype=np.uint8).reshape(-1, len(self.question_ids))
+
+
+def analyse_quiz(quiz_id):
+    """Per-question difficulty, discrimination index and option distribution over every attempt.
+
+    The packed answers of each answer key version are loaded into one
+    (attempts x questions) byte matrix; everything else is vectorised numpy
+    over those matrices. Questions are merged across key versions by id.
+    """
+    snapshots = {
+        row.id: _Snapshot(row)
+        for row in db.session.query(
+            AnswerKeySnapshot.id, AnswerKeySnapshot.question_ids, AnswerKeySnapshot.correct_options,
+            AnswerKeySnapshot.marks
+        ).filter(AnswerKeySnapshot.quiz_id == quiz_id).order_by(AnswerKeySnapshot.id)
+    }
+    for answer_key_id, answers in db.session.query(AttemptAnswers.answer_key_id, AttemptAnswers.answers).filter(
+        AttemptAnswers.quiz_id == quiz_id
+    ).yield_per(ANALYSIS_CHUNK_ROWS):
+        snapshot = snapshots.get(answer_key_id)
+        if snapshot is not None and len(answers) == len(snapshot.question_ids):
+            snapshot.buffer += answers
+
+    matrices = []
+    for snapshot in snapshots.values():
+        matrix = snapshot.matrix()
+        if matrix is not None and len(matrix):
+            correct = matrix == snapshot.correct
+            scores = correct @ snapshot.marks / snapshot.total_marks if snapshot.total_marks else np.zeros(len(matrix))
+            matrices.append((snapshot, matrix, correct, scores))
+
+    attempts = sum(len(matrix) for _, matrix, _, _ in matrices)
+    if not attempts:
+        return {"quiz_id": quiz_id, "attempts": 0, "group_size": 0, "questions": []}
+
+    # Upper and lower groups by score, ranked across all key versions together
+    group_size = max(1, int(round(attempts * GROUP_FRACTION)))
+    order = np.argsort(np.concatenate([scores for _, _, _, scores in matrices]), kind="stable")
+    in_lower = np.zeros(attempts, dtype=bool)
+    in_upper = np.zeros(attempts, dtype=bool)
+    in_lower[order[:group_size]] = True
+    in_upper[order[-group_size:]] = True
+
+    totals = {}
+    offset = 0
+    for snapshot, matrix, correct, _ in matrices:
+        lower = in_lower[offset:offset + len(matrix)]
+        upper = in_upper[offset:offset + len(matrix)]
+        offset += len(matrix)
+        upper_size, lower_size = int(upper.sum()), int(lower.sum())
+        counts = np.stack([(matrix == code).sum(axis=0) for code in OPTION_CODES], axis=1)
+        columns = zip(
+            snapshot.question_ids.tolist(), snapshot.correct.tolist(), correct.sum(axis=0).tolist(),
+            correct[upper].sum(axis=0).tolist(), correct[lower].sum(axis=0).tolist(), counts.tolist()
+        )
+        for question_id, correct_option, correct_count, upper_correct, lower_correct, options in columns:
+            entry = totals.setdefault(question_id, {
+                "attempts": 0, "correct": 0, "upper": 0, "upper_correct": 0, "lower": 0, "lower_correct": 0,
+                "options": [0] * len(OPTION_CODES), "correct_option": correct_option
+            })
+            entry["attempts"] += len(matrix)
+            entry["correct"] += correct_count
+            entry["upper"] += upper_size
+            entry["upper_correct"] += upper_correct
+            entry["lower"] += lower_size
+            entry["lower_correct"] += lower_correct
+            entry["options"] = [total + count for total, count in zip(entry["options"], options)]
+            entry["correct_option"] = correct_option  # snapshots are in id order, so the latest key wins
+
+    texts = dict(db.session.query(Question.id, Question.question_text).filter(Question.id.in_(list(totals))).all())
+    questions = []
+    for question_id, entry in sorted(totals.items()):
+        upper_p = entry["upper_correct"] / entry["upper"] if entry["upper"] else 0.0
+        lower_p = entry["lower_correct"] / entry["lower"] if entry["lower"] else 0.0
+        questions.append({
+            "question_id": question_id,
+            "text": texts.get(question_id),  # None once the question has been deleted
+            "attempts": entry["attempts"],
+            "correct_option": str(entry["correct_option"]),
+            "difficulty": round(entry["correct"] / entry["attempts"], 4),
+            "discrimination": round(upper_p - lower_p, 4),
+            "options": {
+                "unanswered": entry["options"][0],
+                **{str(code): entry["options"][code] for code in OPTION_CODES if code}
+            }
+        })
+    return {"quiz_id": quiz_id, "attempts": attempts, "group_size": group_size, "questions": questions}
@@ -0,0 +1,266 @@
+from applications.database import db, use_primary
+from applications.model import Score
+from applications.score_writer import on_scores_committed
+from sqlalchemy import func, and_
+from collections import OrderedDict
+import math
+import threading
+import time
+
+
+class FenwickTree:
+    """Binary indexed tree of counts over non-negative integer scores."""
+
+    def __init__(self, size=64):
+        self.size = size
+        self._tree = [0] * (size + 1)
+
+    def _grow(self, needed):
+        counts = [self.count_at(score) for score in range(self.size)]
+        size = self.size
+        while size <= needed:
+            size *= 2
+        self.size = size
+        self._tree = [0] * (size + 1)
+        for score, count in enumerate(counts):
+            if count:
+                self.add(score, count)
+
+    def add(self, score, delta):
+        if score >= self.size:
+            self._grow(score)
+        index = score + 1
+        while index <= self.size:
+            self._tree[index] += delta
+            index += index & -index
+
+    def prefix(self, score):
+        """Number of entries with a score <= ``score``."""
+        index = min(score, self.size - 1) + 1
+        total = 0
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+
+    def count_at(self, score):
+        return self.prefix(score) - (self.prefix(score - 1) if score > 0 else 0)
+
+
+class QuizBoard:
+    """Incrementally maintained rankings and statistics for one quiz.
+
+    Rankings use each user's best score; count/mean/variance and the histogram
+    cover every attempt. Ranks come from a Fenwick tree over best scores, so a
+    lookup is O(log max_score) however many users took the quiz.
+    """
+
+    def __init__(self, quiz_id):
+        self.quiz_id = quiz_id
+        self.attempts = 0
+        self._mean = 0.0
+        self._m2 = 0.0  # Welford's running sum of squared deviations
+        self.histogram = {}  # score -> attempts
+        self.best = {}  # user_id -> (score, reached_at)
+        self._buckets = {}  # score -> {user_id: reached_at} for users whose best is that score
+        self._ranks = FenwickTree()
+        self.lock = threading.Lock()
+
+    def add_attempt(self, user_id, score, reached_at):
+        """Fold one attempt into the statistics and rankings."""
+        if score is None:
+            return
+        score = max(int(score), 0)
+        self.attempts += 1
+        delta = score - self._mean
+        self._mean += delta / self.attempts
+        self._m2 += delta * (score - self._mean)
+        self.histogram[score] = self.histogram.get(score, 0) + 1
+        if user_id is not None:
+            self.offer_best(user_id, score, reached_at)
+
+    def add_histogram(self, score, count):
+        """Bulk-load ``count`` attempts of one score (no ranking information)."""
+        if score is None or count <= 0:
+            return
+        score = max(int(score), 0)
+        # Chan et al. parallel merge of (count, mean, M2) with a constant group
+        total = self.attempts + count
+        delta = score - self._mean
+        self._mean += delta * count / total
+        self._m2 += delta * delta * self.attempts * count / total
+        self.attempts = total
+        self.histogram[score] = self.histogram.get(score, 0) + count
+
+    def offer_best(self, user_id, score, reached_at):
+        """Raise a user's best score (used for ranking) if ``score`` beats it."""
+        score = max(int(score), 0)
+        current = self.best.get(user_id)
+        if current is not None:
+            if score <= current[0]:
+                return
+            old_score = current[0]
+            bucket = self._buckets[old_score]
+            del bucket[user_id]
+            if not bucket:
+                del self._buckets[old_score]
+            self._ranks.add(old_score, -1)
+        self.best[user_id] = (score, reached_at)
+        self._buckets.setdefault(score, {})[user_id] = reached_at
+        self._ranks.add(score, 1)
+
+    @property
+    def participants(self):
+        return len(self.best)
+
+    def rank(self, user_id):
+        """Competition rank (1 = best) of a user's best score, or None if they have no attempt."""
+        entry = self.best.get(user_id)
+        if entry is None:
+            return None
+        return self.participants - self._ranks.prefix(entry[0]) + 1
+
+    def top(self, limit):
+        """Best ``limit`` users as (rank, user_id, score); ties broken by who reached the score first."""
+        entries = []
+        rank = 1
+        for score in sorted(self._buckets, reverse=True):
+            bucket = self._buckets[score]
+            for user_id, _ in sorted(bucket.items(), key=lambda item: (item[1] is None, item[1], item[0])):
+                if len(entries) >= limit:
+                    return entries
+                entries.append((rank, user_id, score))
+            rank += len(bucket)
+        return entries
+
+    def stats(self):
+        variance = self._m2 / self.attempts if self.attempts else 0.0
+        return {
+            "quiz_id": self.quiz_id,
+            "attempts": self.attempts,
+            "participants": self.participants,
+            "mean": round(self._mean, 4) if self.attempts else None,
+            "variance": round(variance, 4) if self.attempts else None,
+            "stddev": round(math.sqrt(variance), 4) if self.attempts else None,
+            "min": min(self.histogram) if self.histogram else None,
+            "max": max(self.histogram) if self.histogram else None,
+            "histogram": [[score, self.histogram[score]] for score in sorted(self.histogram)]
+        }
+
+
+class LeaderboardService:
+    """Process-wide registry of QuizBoards.
+
+    A board is loaded from aggregate queries the first time its quiz is read
+    and then updated in place from persist_scores(). Scores committed by other
+    worker processes are picked up by tailing ``score.id`` at most every
+    ``sync_interval`` seconds.
+    """
+
+    def __init__(self, max_boards=1000, sync_interval=2.0):
+        self.max_boards = max_boards
+        self.sync_interval = sync_interval
+        self._boards = OrderedDict()
+        self._lock = threading.Lock()  # guards boards, watermark and recorded ids
+        self._sync_lock = threading.Lock()  # serialises tailing with board loads
+        self._watermark = None  # highest score.id reflected in every loaded board
+        self._recorded_ids = set()  # ids above the watermark already applied by record()
+        self._last_sync = 0.0
+
+    def init_app(self, app):
+        self.max_boards = app.config.get("LEADERBOARD_MAX_BOARDS", self.max_boards)
+        self.sync_interval = app.config.get("LEADERBOARD_SYNC_INTERVAL", self.sync_interval)
+        on_scores_committed(self.record)
+
+    def board(self, quiz_id):
+        """Return the up-to-date QuizBoard for a quiz (loading it on first use)."""
+        quiz_id = int(quiz_id)
+        # Boards outlive the request, so they are built from the primary only
+        with self._sync_lock, use_primary():
+            self._sync()
+            with self._lock:
+                board = self._boards.get(quiz_id)
+                if board is not None:
+                    self._boards.move_to_end(quiz_id)
+                    return board
+
+            board = self._load(quiz_id, self._watermark)
+            with self._lock:
+                self._boards[quiz_id] = board
+                while len(self._boards) > self.max_boards:
+                    self._boards.popitem(last=False)
+            return board
+
+    def record(self, rows):
+        """Apply freshly committed Score rows to the boards that are loaded."""
+        with self._lock:
+            for row in rows:
+                if self._watermark is None or row["id"] <= self._watermark:
+                    continue  # already reflected by a tail or a board load
+                board = self._boards.get(int(row["quiz_id"]))
+                if board is not None:
+                    with board.lock:
+                        board.add_attempt(row["user_id"], row["total_scored"], row["time_stamp_of_attempt"])
+                    self._recorded_ids.add(row["id"])
+
+    def invalidate(self, quiz_id=None):
+        """Forget one board (quiz deleted) or all boards."""
+        with self._lock:
+            if quiz_id is None:
+                self._boards.clear()
+            else:
+                self._boards.pop(int(quiz_id), None)
+
+    def _sync(self):
+        if self._watermark is None:
+            self._watermark = db.session.query(func.max(Score.id)).scalar() or 0
+            self._last_sync = time.monotonic()
+            return
+        now = time.monotonic()
+        if now - self._last_sync < self.sync_interval:
+            return
+        self._last_sync = now
+
+        rows = db.session.query(
+            Score.id, Score.quiz_id, Score.user_id, Score.total_scored, Score.time_stamp_of_attempt
+        ).filter(Score.id > self._watermark).order_by(Score.id).all()
+        if not rows:
+            return
+        with self._lock:
+            for score_id, quiz_id, user_id, total_scored, attempted_at in rows:
+                if score_id in self._recorded_ids:
+                    continue
+                board = self._boards.get(quiz_id)
+                if board is not None:
+                    with board.lock:
+                        board.add_attempt(user_id, total_scored, attempted_at)
+            self._watermark = rows[-1][0]
+            self._recorded_ids = {score_id for score_id in self._recorded_ids if score_id > self._watermark}
+
+    @staticmethod
+    def _load(quiz_id, watermark):
+        board = QuizBoard(quiz_id)
+        histogram = db.session.query(Score.total_scored, func.count(Score.id)).filter(
+            Score.quiz_id == quiz_id, Score.id <= watermark, Score.total_scored.isnot(None)
+        ).group_by(Score.total_scored).all()
+        for score, count in histogram:
+            board.add_histogram(score, count)
+
+        best = db.session.query(
+            Score.user_id, func.max(Score.total_scored).label("best")
+        ).filter(Score.quiz_id == quiz_id, Score.id <= watermark).group_by(Score.user_id).subquery()
+        reached = db.session.query(
+            best.c.user_id, best.c.best, func.min(Score.time_stamp_of_attempt)
+        ).join(Score, and_(
+            Score.quiz_id == quiz_id,
+            Score.user_id == best.c.user_id,
+            Score.total_scored == best.c.best,
+            Score.id <= watermark
+        )).group_by(best.c.user_id, best.c.best).all()
+        for user_id, score, reached_at in reached:
+            if score is not None:
+                board.offer_best(user_id, score, reached_at)
+        return board
+
+
+leaderboards = LeaderboardService()
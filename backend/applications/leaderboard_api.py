@@ -0,0 +1,103 @@
+from flask_restful import Resource
+from flask import request
+from applications.model import Quiz, User
+from applications.database import db
+from applications.leaderboard import leaderboards
+from applications.item_analysis import analyse_quiz
+from applications.quizmanagement_api import auth_token_required
+from applications.permissions import permissions_required
+import logging
+
+MAX_LEADERBOARD_SIZE = 100
+
+
+# Top-N rankings for a quiz
+class QuizLeaderboard(Resource):
+    @auth_token_required
+    def get(self, quiz_id):
+        """Fetch the best users of a quiz (by best attempt) with summary statistics."""
+        try:
+            if not db.session.get(Quiz, quiz_id):
+                return {"message": "Quiz not found."}, 404
+
+            limit = min(request.args.get("limit", 10, type=int) or 10, MAX_LEADERBOARD_SIZE)
+            board = leaderboards.board(quiz_id)
+            with board.lock:
+                top = board.top(limit)
+                stats = board.stats()
+
+            names = dict(
+                db.session.query(User.id, User.username).filter(User.id.in_([user_id for _, user_id, _ in top])).all()
+            ) if top else {}
+            stats.pop("histogram")
+            return {
+                "quiz_id": quiz_id,
+                "entries": [
+                    {"rank": rank, "user_id": user_id, "username": names.get(user_id), "score": score}
+                    for rank, user_id, score in top
+                ],
+                "stats": stats
+            }, 200
+        except Exception as e:
+            logging.error(f"Error fetching leaderboard: {e}")
+            return {"error": str(e)}, 500
+
+
+# Aggregate statistics for a quiz
+class QuizStatistics(Resource):
+    @auth_token_required
+    def get(self, quiz_id):
+        """Fetch attempt count, mean, variance and the score histogram of a quiz."""
+        try:
+            if not db.session.get(Quiz, quiz_id):
+                return {"message": "Quiz not found."}, 404
+
+            board = leaderboards.board(quiz_id)
+            with board.lock:
+                return board.stats(), 200
+        except Exception as e:
+            logging.error(f"Error fetching quiz statistics: {e}")
+            return {"error": str(e)}, 500
+
+
+# A single user's position on a quiz leaderboard
+class QuizRank(Resource):
+    @auth_token_required
+    def get(self, quiz_id):
+        """Fetch the rank of the current user (or ``?user_id=``) on a quiz."""
+        try:
+            user_id = request.args.get("user_id", request.user["user_id"], type=int)
+            board = leaderboards.board(quiz_id)
+            with board.lock:
+                rank = board.rank(user_id)
+                participants = board.participants
+                best = board.best.get(user_id)
+
+            if rank is None:
+                return {"message": "No attempts found for this user on this quiz."}, 404
+            return {
+                "quiz_id": quiz_id,
+                "user_id": user_id,
+                "rank": rank,
+                "best_score": best[0],
+                "participants": participants,
+                "percentile": round(100.0 * (participants - rank) / participants, 2)
+            }, 200
+        except Exception as e:
+            logging.error(f"Error fetching quiz rank: {e}")
+            return {"error": str(e)}, 500
+
+
+# Per-question item analysis from the stored attempt answers
+class QuizItemAnalysis(Resource):
+    @auth_token_required
+    @permissions_required('questions:read')
+    def get(self, quiz_id):
+        """Fetch difficulty, discrimination index and option distribution for every question of a quiz."""
+        try:
+            if not db.session.get(Quiz, quiz_id):
+                return {"message": "Quiz not found."}, 404
+            return analyse_quiz(quiz_id), 200
+        except Exception as e:
+            logging.error(f"Error computing item analysis: {e}")
+            return {"error": str(e)}, 500
@@ -0,0 +1,150 @@
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+
+# Standard LogRecord attributes; anything else on a record is an ``extra`` field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any ``extra`` fields."""
+
+    def format(self, record):
+        document = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name, value in record.__dict__.items():
+            if name not in _RECORD_ATTRIBUTES and not name.startswith("_"):
+                document[name] = value
+        if record.exc_info:
+            document["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(document, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the caller: records are dropped (and counted) when the queue is full."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RateLimiter:
+    """Token bucket per key: ``rate`` events per second with bursts of up to ``burst``."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1)
+        self._buckets = {}  # key -> (tokens, last refill)
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def allow(self, key=None):
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                self.suppressed += 1
+                return False
+            self._buckets[key] = (tokens - 1, now)
+            return True
+
+
+class LogPipeline:
+    """Queue-backed logging: request threads only enqueue records, one background thread writes them.
+
+    ``init_app`` puts a DroppingQueueHandler on the root logger and moves any
+    handlers already installed there (or a stderr handler using LOG_FORMAT)
+    behind a QueueListener, so slow stdout or disk I/O never adds to request latency.
+    """
+
+    def __init__(self):
+        self.handler = None
+        self.listener = None
+
+    def init_app(self, app):
+        if self.listener is not None:
+            return
+        root = logging.getLogger()
+        root.setLevel(app.config.get("LOG_LEVEL", "INFO"))
+
+        targets = [handler for handler in root.handlers if not isinstance(handler, QueueHandler)]
+        if not targets:
+            target = logging.StreamHandler(sys.stderr)
+            if app.config.get("LOG_FORMAT", "json") == "json":
+                target.setFormatter(JsonFormatter())
+            else:
+                target.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+            targets = [target]
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+
+        self.handler = DroppingQueueHandler(queue.Queue(app.config.get("LOG_QUEUE_SIZE", 10000)))
+        root.addHandler(self.handler)
+        self.listener = QueueListener(self.handler.queue, *targets, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.shutdown)
+
+    def shutdown(self):
+        """Write out everything still queued and stop the background thread."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def stats(self):
+        return {
+            "queued": self.handler.queue.qsize() if self.handler else 0,
+            "dropped": self.handler.dropped if self.handler else 0,
+            "attempt_details_suppressed": attempt_details.limiter.suppressed,
+        }
+
+
+class AttemptDetailLog:
+    """Optional per-attempt grading detail, logged as one record per sampled submission.
+
+    Instead of a line per wrong or unanswered question, a sampled attempt
+    produces a single ``attempts`` record listing the question ids, and the
+    number of such records per second is capped.
+    """
+
+    def __init__(self):
+        self.sample_rate = 0.0  # disabled until configured
+        self.limiter = RateLimiter(rate=20)
+        self.logger = logging.getLogger("attempts")
+
+    def init_app(self, app):
+        self.sample_rate = app.config.get("ATTEMPT_DETAIL_SAMPLE_RATE", self.sample_rate)
+        self.limiter = RateLimiter(rate=app.config.get("ATTEMPT_DETAIL_RATE_LIMIT", self.limiter.rate))
+
+    def record(self, user_id, quiz_id, result):
+        """Log the per-question outcome of a graded submission if it is sampled and within the rate limit."""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate or not self.limiter.allow():
+            return
+        self.logger.info("Attempt graded", extra={
+            "user_id": user_id,
+            "quiz_id": quiz_id,
+            "score": result.score,
+            "correct": result.correct_count,
+            **result.detail()
+        })
+
+
+log_pipeline = LogPipeline()
+attempt_details = AttemptDetailLog()
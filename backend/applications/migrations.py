@@ -0,0 +1,161 @@
+from applications.database import db
+from applications.model import (
+    DEFAULT_QUESTION_MARKS, AnswerKeySnapshot, AttemptAnswers, UserQuizProgress, UserProgress,
+    EnrollmentJob
+)
+from sqlalchemy import Column, Integer, MetaData, String, Table, DateTime, select, insert, update, bindparam, func, text, inspect
+from datetime import date, timedelta
+import logging
+
+# Kept out of db.metadata so create_all() never creates it with a misleading version
+_version_metadata = MetaData()
+schema_version = Table(
+    'schema_version',
+    _version_metadata,
+    Column('version', Integer, primary_key=True),
+    Column('description', String(255)),
+    Column('applied_at', DateTime, server_default=func.current_timestamp())
+)
+
+
+# The indexes migration 1 introduced, all on tables of the original schema. Later
+# migrations create the indexes of the tables they add together with those tables.
+SECONDARY_INDEXES = (
+    "ix_score_user_quiz_time", "ix_score_quiz_total", "ix_score_time", "ix_question_quiz_id",
+    "ix_quiz_chapter_id", "ix_chapter_subject_id", "ix_roles_users_user_id",
+)
+
+
+def _create_secondary_indexes(connection):
+    """Add the SECONDARY_INDEXES to tables created before they existed."""
+    indexes = {index.name: index for table in db.metadata.sorted_tables for index in table.indexes}
+    for name in SECONDARY_INDEXES:
+        indexes[name].create(bind=connection, checkfirst=True)
+
+
+def _backfill_quiz_total_marks(connection):
+    """Populate the denormalized quiz.total_marks from the marks of existing questions."""
+    connection.execute(text(
+        "UPDATE quiz SET total_marks = ("
+        " SELECT COALESCE(SUM(COALESCE(question.marks, :default_marks)), 0)"
+        " FROM question WHERE question.quiz_id = quiz.id)"
+        " WHERE EXISTS (SELECT 1 FROM question WHERE question.quiz_id = quiz.id)"
+    ), {"default_marks": DEFAULT_QUESTION_MARKS})
+
+
+def _create_attempt_answer_tables(connection):
+    """Add the answer key snapshot and packed attempt answer tables."""
+    db.metadata.create_all(
+        bind=connection, tables=[AnswerKeySnapshot.__table__, AttemptAnswers.__table__], checkfirst=True
+    )
+
+
+def _create_progress_tables(connection):
+    """Add the per-user progress tables and fill them from the existing score history.
+
+    Percentages use the current quiz totals; streaks are replayed from the
+    distinct UTC days each user attempted a quiz on.
+    """
+    db.metadata.create_all(
+        bind=connection, tables=[UserQuizProgress.__table__, UserProgress.__table__], checkfirst=True
+    )
+    percentage = ("CASE WHEN quiz.total_marks > 0 AND score.total_scored"
+                  " THEN score.total_scored * 100.0 / quiz.total_marks ELSE 0 END")
+    connection.execute(text(
+        "INSERT INTO user_quiz_progress (user_id, quiz_id, attempts, best_score, latest_score,"
+        " latest_attempt_at, percentage_sum, best_percentage)"
+        " SELECT score.user_id, score.quiz_id, COUNT(*), COALESCE(MAX(score.total_scored), 0), 0,"
+        f" MAX(score.time_stamp_of_attempt), SUM({percentage}), MAX({percentage})"
+        " FROM score JOIN quiz ON quiz.id = score.quiz_id"
+        " WHERE NOT EXISTS (SELECT 1 FROM user_quiz_progress p WHERE p.user_id = score.user_id AND p.quiz_id = score.quiz_id)"
+        " GROUP BY score.user_id, score.quiz_id"
+    ))
+    connection.execute(text(
+        "UPDATE user_quiz_progress SET latest_score = COALESCE(("
+        " SELECT score.total_scored FROM score"
+        " WHERE score.user_id = user_quiz_progress.user_id AND score.quiz_id = user_quiz_progress.quiz_id"
+        " ORDER BY score.time_stamp_of_attempt DESC, score.id DESC LIMIT 1), 0)"
+    ))
+    connection.execute(text(
+        "INSERT INTO user_progress (user_id, attempts, percentage_sum, last_attempt_at, current_streak, longest_streak)"
+        " SELECT user_id, SUM(attempts), SUM(percentage_sum), MAX(latest_attempt_at), 0, 0"
+        " FROM user_quiz_progress"
+        " WHERE NOT EXISTS (SELECT 1 FROM user_progress p WHERE p.user_id = user_quiz_progress.user_id)"
+        " GROUP BY user_id"
+    ))
+
+    streaks = {}  # user_id -> (last day, current, longest)
+    days = connection.execute(text(
+        "SELECT DISTINCT user_id, date(time_stamp_of_attempt) FROM score ORDER BY 1, 2"
+    ))
+    for user_id, day in days:
+        day = date.fromisoformat(day) if isinstance(day, str) else day
+        last, current, longest = streaks.get(user_id, (None, 0, 0))
+        current = current + 1 if last is not None and day == last + timedelta(days=1) else 1
+        streaks[user_id] = (day, current, max(longest, current))
+    if streaks:
+        progress = UserProgress.__table__
+        connection.execute(
+            update(progress).where(progress.c.user_id == bindparam("uid")).values(
+                last_active_date=bindparam("day"), current_streak=bindparam("current"),
+                longest_streak=bindparam("longest")
+            ),
+            [{"uid": user_id, "day": day, "current": current, "longest": longest}
+             for user_id, (day, current, longest) in streaks.items()]
+        )
+
+
+def _create_enrollment_jobs(connection):
+    """Add the bulk enrollment checkpoint table."""
+    db.metadata.create_all(bind=connection, tables=[EnrollmentJob.__table__], checkfirst=True)
+
+
+def _add_enrollment_job_errors(connection):
+    """Add enrollment_job.errors, where background enrollments leave their row errors."""
+    table = EnrollmentJob.__table__.name
+    # Databases that ran migration 5 after this column joined the model already have it
+    if "errors" not in {column["name"] for column in inspect(connection).get_columns(table)}:
+        connection.execute(text(f"ALTER TABLE {table} ADD COLUMN errors TEXT"))
+
+
+# Ordered (version, description, step) list; append new steps, never reorder
+MIGRATIONS = [
+    (1, "Secondary indexes for score, question, quiz, chapter and role lookups", _create_secondary_indexes),
+    (2, "Backfill quiz.total_marks from question marks", _backfill_quiz_total_marks),
+    (3, "Answer key snapshots and packed attempt answers", _create_attempt_answer_tables),
+    (4, "Per-user progress summaries backfilled from scores", _create_progress_tables),
+    (5, "Bulk enrollment job checkpoints", _create_enrollment_jobs),
+    (6, "Row errors of background enrollment jobs", _add_enrollment_job_errors),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(connection):
+    """Return the highest applied migration version (0 for an unversioned database)."""
+    schema_version.create(bind=connection, checkfirst=True)
+    return connection.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+def installed_version(engine=None):
+    """Return the applied schema version without creating anything (0 for an empty database)."""
+    engine = engine or db.engine
+    with engine.connect() as connection:
+        if not inspect(connection).has_table(schema_version.name):
+            return 0
+        return connection.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+def upgrade(engine=None):
+    """Apply every pending migration, each in its own transaction. Returns the applied versions."""
+    engine = engine or db.engine
+    applied = []
+    for version, description, step in MIGRATIONS:
+        with engine.begin() as connection:
+            if version <= current_version(connection):
+                continue
+            step(connection)
+            connection.execute(insert(schema_version).values(version=version, description=description))
+        logging.info(f"Applied migration {version}: {description}")
+        applied.append(version)
+    return applied
@@ -2,8 +2,12 @@ from applications.database import db
 from datetime import datetime
 from flask_security import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import func, select, update
 import uuid
 
+# Marks used when a question was stored without an explicit weight
+DEFAULT_QUESTION_MARKS = 1
+
 
 class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
@@ -38,7 +42,8 @@ class User(db.Model, UserMixin):
 roles_users = db.Table(
     'roles_users',
     db.Column('user_id', db.Integer, db.ForeignKey('user.id')),
-    db.Column('role_id', db.Integer, db.ForeignKey('role.id'))
+    db.Column('role_id', db.Integer, db.ForeignKey('role.id')),
+    db.Index('ix_roles_users_user_id', 'user_id')
 )
 
 
@@ -63,7 +68,7 @@ class Subject(db.Model):
 
 class Chapter(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False)
+    subject_id = db.Column(db.Integer, db.ForeignKey('subject.id'), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(255), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -72,25 +77,52 @@ class Chapter(db.Model):
 
 class Quiz(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.id'), nullable=False)
+    chapter_id = db.Column(db.Integer, db.ForeignKey('chapter.id'), nullable=False, index=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(255), nullable=True)
     difficulty_level = db.Column(db.String(50), nullable=True)  # Easy, Medium, Hard
     time_limit = db.Column(db.Integer, nullable=True)  # In minutes
-    total_marks = db.Column(db.Integer, nullable=True)  # Total quiz marks
+    total_marks = db.Column(db.Integer, nullable=True)  # Sum of question marks, maintained by refresh_total_marks
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     questions = db.relationship('Question', backref='quiz', lazy=True, cascade="all, delete")
     date = db.Column(db.Date, nullable=True)  # Date of the quiz
     duration = db.Column(db.Time, nullable=True)
 
     def calculate_total_marks(self):
-        """Calculate total marks based on questions."""
-        return sum(question.marks for question in self.questions)
+        """Calculate total marks based on questions (one aggregate query, no lazy load)."""
+        return Quiz.total_marks_for([self.id]).get(self.id, 0)
+
+    @staticmethod
+    def _marks_sum():
+        return func.coalesce(func.sum(func.coalesce(Question.marks, DEFAULT_QUESTION_MARKS)), 0)
+
+    @classmethod
+    def total_marks_for(cls, quiz_ids):
+        """Return {quiz_id: sum of question marks} for many quizzes in a single grouped query."""
+        quiz_ids = list(set(quiz_ids))
+        if not quiz_ids:
+            return {}
+        rows = db.session.query(Question.quiz_id, cls._marks_sum()).filter(
+            Question.quiz_id.in_(quiz_ids)
+        ).group_by(Question.quiz_id).all()
+        return dict(rows)
+
+    @classmethod
+    def refresh_total_marks(cls, quiz_ids):
+        """Recompute the denormalized total_marks column from the questions (no commit)."""
+        quiz_ids = list(set(quiz_ids))
+        if not quiz_ids:
+            return
+        marks = select(cls._marks_sum()).where(Question.quiz_id == cls.id).scalar_subquery()
+        db.session.execute(
+            update(cls).where(cls.id.in_(quiz_ids)).values(total_marks=marks),
+            execution_options={"synchronize_session": False}
+        )
 
 
 class Question(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False, index=True)
     question_text = db.Column(db.String(255), nullable=False)
     option1 = db.Column(db.String(100), nullable=False)
     option2 = db.Column(db.String(100), nullable=False)
@@ -102,6 +134,15 @@ class Question(db.Model):
 
 
 class Score(db.Model):
+    __table_args__ = (
+        # A user's history, optionally narrowed to one quiz, in attempt order
+        db.Index('ix_score_user_quiz_time', 'user_id', 'quiz_id', 'time_stamp_of_attempt'),
+        # Per-quiz filters and leaderboards ordered by score
+        db.Index('ix_score_quiz_total', 'quiz_id', 'total_scored'),
+        # Date-range filters and time-ordered pages across all users
+        db.Index('ix_score_time', 'time_stamp_of_attempt'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -112,10 +153,82 @@ class Score(db.Model):
 
     def percentage_score(self):
         """Calculate the percentage score for the quiz."""
-        quiz = Quiz.query.get(self.quiz_id)
-        if quiz and quiz.total_marks:
-            return (self.total_scored / quiz.total_marks) * 100
-        return 0
+        return Score.percentage_scores([self])[self.id]
+
+    @staticmethod
+    def percentage_scores(scores):
+        """Return {score_id: percentage} for many scores with one query for the quiz totals."""
+        quiz_ids = {score.quiz_id for score in scores}
+        totals = dict(
+            db.session.query(Quiz.id, Quiz.total_marks).filter(Quiz.id.in_(quiz_ids)).all()
+        ) if quiz_ids else {}
+        percentages = {}
+        for score in scores:
+            total = totals.get(score.quiz_id)
+            percentages[score.id] = (score.total_scored / total) * 100 if total and score.total_scored else 0
+        return percentages
+
+
+class AnswerKeySnapshot(db.Model):
+    """The question order and correct options an attempt's packed answers refer to."""
+    __table_args__ = (db.UniqueConstraint('quiz_id', 'digest', name='uq_answer_key_snapshot_quiz_digest'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
+    digest = db.Column(db.String(32), nullable=False)  # fingerprint of question ids, options and marks
+    question_ids = db.Column(db.LargeBinary, nullable=False)  # little-endian int64 per question
+    correct_options = db.Column(db.LargeBinary, nullable=False)  # one option code (1-4) per question
+    marks = db.Column(db.LargeBinary, nullable=False)  # little-endian int64 per question
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class AttemptAnswers(db.Model):
+    """Options picked in one attempt: one byte (0 = unanswered, 1-4) per question in answer key order."""
+    __table_args__ = (
+        # Item analysis reads every attempt of a quiz
+        db.Index('ix_attempt_answers_quiz', 'quiz_id', 'answer_key_id'),
+    )
+
+    score_id = db.Column(db.Integer, db.ForeignKey('score.id'), primary_key=True)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), nullable=False)
+    answer_key_id = db.Column(db.Integer, db.ForeignKey('answer_key_snapshot.id'), nullable=False)
+    answers = db.Column(db.LargeBinary, nullable=False)
+
+
+class UserQuizProgress(db.Model):
+    """Running totals of one user's attempts on one quiz, folded in as scores are committed."""
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quiz.id'), primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    best_score = db.Column(db.Integer, nullable=False, default=0)
+    latest_score = db.Column(db.Integer, nullable=False, default=0)
+    latest_attempt_at = db.Column(db.DateTime, nullable=True)
+    percentage_sum = db.Column(db.Float, nullable=False, default=0.0)  # divided by attempts for the average
+    best_percentage = db.Column(db.Float, nullable=False, default=0.0)
 
 
+class UserProgress(db.Model):
+    """Per-user totals and daily streaks across every quiz."""
 
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    percentage_sum = db.Column(db.Float, nullable=False, default=0.0)
+    last_attempt_at = db.Column(db.DateTime, nullable=True)
+    last_active_date = db.Column(db.Date, nullable=True)  # UTC day of the latest attempt
+    current_streak = db.Column(db.Integer, nullable=False, default=0)  # consecutive days up to last_active_date
+    longest_streak = db.Column(db.Integer, nullable=False, default=0)
+
+
+class EnrollmentJob(db.Model):
+    """Checkpoint of a bulk user enrollment, so an interrupted import resumes after its last committed chunk."""
+
+    id = db.Column(db.String(64), primary_key=True)
+    source = db.Column(db.String(255), nullable=True)  # uploaded file name, when known
+    status = db.Column(db.String(20), nullable=False, default="running")  # queued, running, completed, failed
+    committed_line = db.Column(db.Integer, nullable=False, default=0)  # last input line covered by a commit
+    inserted = db.Column(db.Integer, nullable=False, default=0)
+    rejected = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.Text, nullable=True)  # JSON list of the row errors reported by the last run
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,145 @@
+from flask import request, Response, stream_with_context
+from applications.encoding import json_bytes
+from sqlalchemy import tuple_
+from datetime import datetime
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_ROWS = 500  # rows fetched per round trip while streaming
+
+
+class PaginationError(ValueError):
+    """Raised for malformed pagination, filter or projection parameters."""
+
+
+def encode_cursor(values):
+    """Encode the sort key of the last row as an opaque cursor string."""
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, columns):
+    """Decode a cursor produced by encode_cursor into values matching ``columns``."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError):
+        raise PaginationError("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise PaginationError("Invalid cursor.")
+    try:
+        return [_decode_value(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError):
+        raise PaginationError("Invalid cursor.")
+
+
+def _decode_value(column, value):
+    # Cursors come from clients, so each value must have its column's type before it reaches SQL
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is int and (isinstance(value, bool) or not isinstance(value, int)):
+        raise TypeError(f"{column.key} must be an integer")
+    if python_type is float and (isinstance(value, bool) or not isinstance(value, (int, float))):
+        raise TypeError(f"{column.key} must be a number")
+    if python_type is str and not isinstance(value, str):
+        raise TypeError(f"{column.key} must be a string")
+    return value
+
+
+def parse_fields(allowed, default):
+    """Read ``?fields=a,b`` and return the requested field names in allowed order."""
+    raw = request.args.get("fields")
+    if not raw:
+        return list(default)
+    requested = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise PaginationError(f"Unknown fields: {', '.join(sorted(unknown))}.")
+    return [name for name in allowed if name in requested]
+
+
+def parse_limit():
+    """Read ``?limit=`` and clamp it to MAX_PAGE_SIZE."""
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    if limit is None or limit < 1:
+        raise PaginationError("limit must be a positive integer.")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def parse_datetime_arg(name):
+    """Read an ISO date or datetime query parameter, or None when absent."""
+    raw = request.args.get(name)
+    if not raw:
+        return None
+    try:
+        return datetime.fromisoformat(raw)
+    except ValueError:
+        raise PaginationError(f"{name} must be an ISO date or datetime.")
+
+
+def wants_page():
+    """True when the client asked for paginated or projected output."""
+    return any(name in request.args for name in ("limit", "cursor", "fields"))
+
+
+def keyset_page(query, model, fields, sort_columns, descending=False):
+    """Stream one keyset page of ``query`` as ``{"items": [...], "next_cursor": ...}``.
+
+    Only the requested ``fields`` plus the sort key are selected. ``sort_columns``
+    must end with a unique column (normally the primary key) so the keyset is total.
+    """
+    limit = parse_limit()
+    selected = [getattr(model, name) for name in fields]
+    extra = [column for column in sort_columns if column.key not in fields]
+    query = query.with_entities(*selected, *extra)
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        after = decode_cursor(cursor, sort_columns)
+        key = tuple_(*sort_columns)
+        query = query.filter(key < tuple_(*after) if descending else key > tuple_(*after))
+
+    ordering = [column.desc() if descending else column.asc() for column in sort_columns]
+    query = query.order_by(*ordering).limit(limit + 1)
+    sort_keys = [column.key for column in sort_columns]
+
+    def generate():
+        yield b'{"items":['
+        count = 0
+        last = None
+        has_more = False
+        for row in query.yield_per(STREAM_CHUNK_ROWS):
+            if count == limit:
+                has_more = True  # the extra (limit + 1)th row only signals another page
+                break
+            mapping = row._mapping
+            yield (b"," if count else b"") + json_bytes({name: mapping[name] for name in fields})
+            last = mapping
+            count += 1
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor([last[name] for name in sort_keys])
+        yield b'],"next_cursor":' + json_bytes(next_cursor) + b"}"
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
+
+
+def stream_list(query, fields):
+    """Stream every row of ``query`` as a JSON array without materialising it."""
+
+    def generate():
+        yield b"["
+        first = True
+        for row in query.yield_per(STREAM_CHUNK_ROWS):
+            mapping = row._mapping
+            yield (b"" if first else b",") + json_bytes({name: mapping[name] for name in fields})
+            first = False
+        yield b"]"
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
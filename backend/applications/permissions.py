@@ -0,0 +1,153 @@
+from applications.database import db
+from applications.model import Role
+from applications.response_cache import SharedVersion
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from functools import lru_cache
+import logging
+import threading
+
+# Bit of every permission. Issued tokens carry these bits, so append new
+# permissions with the next free bit and never renumber existing ones.
+PERMISSIONS = {
+    "quiz:attempt": 1 << 0,    # take quizzes, read own scores and progress
+    "catalog:write": 1 << 1,   # create, update and delete subjects, chapters, quizzes and questions
+    "questions:read": 1 << 2,  # correct options, question search, export and item analysis
+    "users:manage": 1 << 3,    # bulk enrollment and other users' progress
+    "system:read": 1 << 4,     # token cache, hashing pool and other operational stats
+}
+ALL_PERMISSIONS = sum(PERMISSIONS.values())
+
+# Used for roles whose permissions column is empty ("*" grants everything)
+DEFAULT_ROLE_PERMISSIONS = {"admin": "*", "user": "quiz:attempt"}
+
+
+@lru_cache(maxsize=256)
+def permission_mask(names):
+    """Compile a tuple of permission names (or "*") into a bitmask; unknown names raise ValueError."""
+    mask = 0
+    for name in names:
+        if name == "*":
+            mask |= ALL_PERMISSIONS
+        elif name in PERMISSIONS:
+            mask |= PERMISSIONS[name]
+        else:
+            raise ValueError(f"Unknown permission: {name}")
+    return mask
+
+
+def _compile_role(name, permissions):
+    names = [part.strip() for part in (permissions or DEFAULT_ROLE_PERMISSIONS.get(name, "")).split(",")]
+    mask = 0
+    for permission in filter(None, names):
+        try:
+            mask |= permission_mask((permission,))
+        except ValueError:
+            logging.warning(f"Role {name} grants unknown permission {permission!r}; ignored")
+    return mask
+
+
+class PermissionRegistry:
+    """Role name -> permission bitmask, compiled from Role.permissions once per process.
+
+    Committing a change to any Role marks the registry stale in this process
+    and bumps a shared version so the other workers recompile too, on their
+    next lookup. Lookups only happen when a token is issued (or for tokens
+    minted before permission claims existed); the request-time check is the
+    AND in permissions_required.
+    """
+
+    def __init__(self):
+        self._masks = None
+        self._lock = threading.Lock()
+        self._version = SharedVersion("roles")
+        self.reloads = 0
+
+    def init_app(self, app):
+        self._version.init_app(app)
+        for change in ("after_insert", "after_update", "after_delete"):
+            event.listen(Role, change, self._role_written)
+        event.listen(Session, "after_commit", self._committed)
+        event.listen(Session, "after_rollback", self._rolled_back)
+        with app.app_context():
+            try:
+                self.reload()
+            except Exception as e:
+                # e.g. `flask bootstrap` on an empty database; compiled on first use instead
+                logging.debug(f"Permission registry not loaded at startup: {e}")
+
+    def _role_written(self, mapper, connection, target):
+        # Flagged on the writing session, so other sessions' commits and rollbacks leave it alone
+        session = object_session(target)
+        if session is not None:
+            session.info["roles_touched"] = True
+
+    def _committed(self, session):
+        if session.info.pop("roles_touched", False):
+            self._masks = None
+            self._version.bump(self.reloads + 1)
+
+    def _rolled_back(self, session):
+        session.info.pop("roles_touched", None)
+
+    def reload(self):
+        masks = {name: _compile_role(name, permissions) for name, permissions in db.session.query(Role.name, Role.permissions)}
+        with self._lock:
+            self._masks = masks
+            self.reloads += 1
+        return masks
+
+    def mask_for(self, role_names):
+        """Union of the permission bits of ``role_names``."""
+        masks = self._masks
+        if masks is None or self._version.changed():
+            masks = self.reload()
+        mask = 0
+        for name in role_names:
+            mask |= masks.get(name, 0)
+        return mask
+
+    def stats(self):
+        masks = self._masks or {}
+        return {"roles": len(masks), "reloads": self.reloads, "loaded": self._masks is not None}
+
+
+permission_registry = PermissionRegistry()
+
+
+def token_claims(user):
+    """Role and permission claims for a token; ``user.roles`` should already be loaded."""
+    role_names = [role.name for role in user.roles] or ["user"]
+    return {
+        "role": "admin" if "admin" in role_names else role_names[0],  # the single role the frontend routes on
+        "roles": role_names,
+        "perms": permission_registry.mask_for(role_names)
+    }
+
+
+def granted(payload):
+    """Permission bits of a verified token payload."""
+    perms = payload.get("perms")
+    if perms is None:
+        # Tokens issued before permission claims: resolve their role in memory
+        perms = permission_registry.mask_for(payload.get("roles") or [payload.get("role", "user")])
+    return perms
+
+
+def has_permission(payload, *names):
+    mask = permission_mask(names)
+    return granted(payload) & mask == mask
+
+
+def permissions_required(*names):
+    """Allow the request only if the token grants every named permission (no database access)."""
+    required = permission_mask(names)
+
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            if granted(request.user) & required != required:
+                return {"message": "Access denied: insufficient privileges"}, 403
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
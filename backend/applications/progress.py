@@ -0,0 +1,146 @@
+from applications.database import db
+from applications.model import Quiz, Chapter, Subject, UserQuizProgress, UserProgress
+from applications.encoding import timestamp
+from datetime import datetime, timedelta
+
+
+def _percentage(score, total_marks):
+    """Same rule as Score.percentage_scores."""
+    return (score / total_marks) * 100 if total_marks and score else 0.0
+
+
+def _advance_streak(progress, day):
+    """Extend, restart or keep the daily streak for an attempt on ``day`` (a UTC date)."""
+    last = progress.last_active_date
+    if last is not None and day <= last:
+        return  # same day, or an older attempt replayed from a spool
+    if last is not None and day == last + timedelta(days=1):
+        progress.current_streak += 1
+    else:
+        progress.current_streak = 1
+    progress.longest_streak = max(progress.longest_streak, progress.current_streak)
+    progress.last_active_date = day
+
+
+def record_attempts(rows):
+    """Fold newly inserted Score rows into the progress tables, in the caller's transaction.
+
+    Called by persist_scores after the scores are flushed, so on SQLite the
+    write lock is already held and the rows read here cannot change underneath.
+    """
+    rows = sorted(rows, key=lambda row: row["time_stamp_of_attempt"])
+    user_ids = {row["user_id"] for row in rows}
+    quiz_ids = {row["quiz_id"] for row in rows}
+    totals = dict(db.session.query(Quiz.id, Quiz.total_marks).filter(Quiz.id.in_(quiz_ids)).all())
+
+    per_quiz = {
+        (progress.user_id, progress.quiz_id): progress
+        for progress in UserQuizProgress.query.filter(
+            UserQuizProgress.user_id.in_(user_ids), UserQuizProgress.quiz_id.in_(quiz_ids)
+        ).with_for_update()
+    }
+    per_user = {
+        progress.user_id: progress
+        for progress in UserProgress.query.filter(UserProgress.user_id.in_(user_ids)).with_for_update()
+    }
+
+    for row in rows:
+        user_id, quiz_id, attempted_at = row["user_id"], row["quiz_id"], row["time_stamp_of_attempt"]
+        score = row.get("total_scored") or 0
+        percentage = _percentage(score, totals.get(quiz_id))
+
+        quiz_progress = per_quiz.get((user_id, quiz_id))
+        if quiz_progress is None:
+            quiz_progress = per_quiz[(user_id, quiz_id)] = UserQuizProgress(
+                user_id=user_id, quiz_id=quiz_id, attempts=0, best_score=score, latest_score=score,
+                percentage_sum=0.0, best_percentage=percentage
+            )
+            db.session.add(quiz_progress)
+        quiz_progress.attempts += 1
+        quiz_progress.percentage_sum += percentage
+        quiz_progress.best_score = max(quiz_progress.best_score, score)
+        quiz_progress.best_percentage = max(quiz_progress.best_percentage, percentage)
+        if quiz_progress.latest_attempt_at is None or attempted_at >= quiz_progress.latest_attempt_at:
+            quiz_progress.latest_score = score
+            quiz_progress.latest_attempt_at = attempted_at
+
+        user_progress = per_user.get(user_id)
+        if user_progress is None:
+            user_progress = per_user[user_id] = UserProgress(
+                user_id=user_id, attempts=0, percentage_sum=0.0, current_streak=0, longest_streak=0
+            )
+            db.session.add(user_progress)
+        user_progress.attempts += 1
+        user_progress.percentage_sum += percentage
+        if user_progress.last_attempt_at is None or attempted_at > user_progress.last_attempt_at:
+            user_progress.last_attempt_at = attempted_at
+        _advance_streak(user_progress, attempted_at.date())
+
+
+def _rollup(entries):
+    attempts = sum(entry["attempts"] for entry in entries)
+    return {
+        "attempts": attempts,
+        "average_percentage": round(sum(entry["_percentage_sum"] for entry in entries) / attempts, 2) if attempts else 0.0,
+        "best_percentage": round(max((entry["best_percentage"] for entry in entries), default=0.0), 2),
+    }
+
+
+def progress_summary(user_id, today=None):
+    """The dashboard document of one user: totals, streaks and a subject > chapter > quiz breakdown.
+
+    Reads the user's UserProgress row by primary key and their UserQuizProgress
+    rows (a primary-key prefix range) joined to the catalog, so the cost depends
+    on the number of quizzes attempted, never on the number of attempts.
+    """
+    today = today or datetime.utcnow().date()
+    summary = db.session.get(UserProgress, user_id)
+    rows = db.session.query(
+        UserQuizProgress, Quiz.name, Chapter.id, Chapter.name, Subject.id, Subject.name
+    ).join(Quiz, Quiz.id == UserQuizProgress.quiz_id).join(
+        Chapter, Chapter.id == Quiz.chapter_id
+    ).join(Subject, Subject.id == Chapter.subject_id).filter(UserQuizProgress.user_id == user_id).all()
+
+    subjects = {}
+    for progress, quiz_name, chapter_id, chapter_name, subject_id, subject_name in rows:
+        subject = subjects.setdefault(subject_id, {"id": subject_id, "name": subject_name, "chapters": {}})
+        chapter = subject["chapters"].setdefault(chapter_id, {"id": chapter_id, "name": chapter_name, "quizzes": []})
+        chapter["quizzes"].append({
+            "id": progress.quiz_id,
+            "name": quiz_name,
+            "attempts": progress.attempts,
+            "best_score": progress.best_score,
+            "latest_score": progress.latest_score,
+            "latest_attempt_at": timestamp(progress.latest_attempt_at),
+            "average_percentage": round(progress.percentage_sum / progress.attempts, 2) if progress.attempts else 0.0,
+            "best_percentage": round(progress.best_percentage, 2),
+            "_percentage_sum": progress.percentage_sum
+        })
+
+    breakdown = []
+    for subject in sorted(subjects.values(), key=lambda subject: subject["id"]):
+        chapters = []
+        subject_quizzes = []
+        for chapter in sorted(subject["chapters"].values(), key=lambda chapter: chapter["id"]):
+            quizzes = sorted(chapter["quizzes"], key=lambda quiz: quiz["id"])
+            subject_quizzes.extend(quizzes)
+            chapters.append({"id": chapter["id"], "name": chapter["name"], **_rollup(quizzes), "quizzes": quizzes})
+        breakdown.append({"id": subject["id"], "name": subject["name"], **_rollup(subject_quizzes), "chapters": chapters})
+    for subject in breakdown:
+        for chapter in subject["chapters"]:
+            for quiz in chapter["quizzes"]:
+                del quiz["_percentage_sum"]
+
+    # A streak is still current if the last attempt was today or yesterday
+    current_streak = 0
+    if summary is not None and summary.last_active_date is not None and summary.last_active_date >= today - timedelta(days=1):
+        current_streak = summary.current_streak
+    return {
+        "user_id": user_id,
+        "attempts": summary.attempts if summary else 0,
+        "average_percentage": round(summary.percentage_sum / summary.attempts, 2) if summary and summary.attempts else 0.0,
+        "last_attempt_at": timestamp(summary.last_attempt_at) if summary else None,
+        "current_streak": current_streak,
+        "longest_streak": summary.longest_streak if summary else 0,
+        "subjects": breakdown
+    }
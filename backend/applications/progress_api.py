@@ -0,0 +1,29 @@
+from flask_restful import Resource
+from flask import request
+from applications.model import User
+from applications.database import db
+from applications.progress import progress_summary
+from applications.quizmanagement_api import auth_token_required
+from applications.permissions import has_permission
+import logging
+
+
+# Dashboard progress summary
+class UserProgressSummary(Resource):
+    @auth_token_required
+    def get(self, user_id=None):
+        """Attempts, average and best percentages, streaks and a per-subject/chapter/quiz breakdown.
+
+        ``/users/me/progress`` for the caller; admins can read any user's at ``/users/<id>/progress``.
+        """
+        try:
+            if user_id is None:
+                user_id = request.user["user_id"]
+            elif user_id != request.user["user_id"] and not has_permission(request.user, "users:manage"):
+                return {"message": "Access denied: insufficient privileges"}, 403
+            elif not db.session.get(User, user_id):
+                return {"message": "User not found."}, 404
+            return progress_summary(user_id), 200
+        except Exception as e:
+            logging.error(f"Error fetching progress summary: {e}")
+            return {"error": str(e)}, 500
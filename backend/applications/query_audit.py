@@ -0,0 +1,53 @@
+from applications.database import db
+from applications.model import Chapter, Quiz, Question, Score, AttemptAnswers, AnswerKeySnapshot, roles_users
+from sqlalchemy import select, text
+from datetime import datetime
+import re
+
+# Representative queries issued by the read endpoints, with placeholder parameters
+AUDITED_QUERIES = {
+    "ChapterManagement.get (chapters of a subject)": lambda: select(Chapter).where(Chapter.subject_id == 1),
+    "QuizManagement.get (quizzes of a chapter)": lambda: select(Quiz).where(Quiz.chapter_id == 1),
+    "SubmitQuiz (answer key of a quiz)": lambda: select(Question.id, Question.correct_option, Question.marks)
+        .where(Question.quiz_id == 1),
+    "QuestionManagement.get (questions of a quiz)": lambda: select(Question).where(Question.quiz_id == 1),
+    "ScoreManagement.get (user history)": lambda: select(Score).where(Score.user_id == 1)
+        .order_by(Score.quiz_id, Score.time_stamp_of_attempt),
+    "ScoreManagement.get (user attempts on a quiz)": lambda: select(Score)
+        .where(Score.user_id == 1, Score.quiz_id == 1).order_by(Score.time_stamp_of_attempt),
+    "ScoreManagement.get (attempts on a quiz)": lambda: select(Score).where(Score.quiz_id == 1)
+        .order_by(Score.id),
+    "ScoreManagement.get (date range)": lambda: select(Score)
+        .where(Score.time_stamp_of_attempt >= datetime(2024, 1, 1))
+        .order_by(Score.time_stamp_of_attempt, Score.id),
+    "Leaderboard (top scores of a quiz)": lambda: select(Score.user_id, Score.total_scored)
+        .where(Score.quiz_id == 1).order_by(Score.total_scored.desc()),
+    "QuizItemAnalysis (answer key snapshots of a quiz)": lambda: select(AnswerKeySnapshot.id)
+        .where(AnswerKeySnapshot.quiz_id == 1),
+    "QuizItemAnalysis (attempt answers of a quiz)": lambda: select(AttemptAnswers.answer_key_id, AttemptAnswers.answers)
+        .where(AttemptAnswers.quiz_id == 1),
+    "Role lookup (roles of a user)": lambda: select(roles_users.c.role_id).where(roles_users.c.user_id == 1),
+}
+
+# "SCAN score" (SQLite >= 3.36) or "SCAN TABLE score" (older); index scans mention an index
+_FULL_SCAN = re.compile(r"^SCAN (TABLE )?(?P<table>\w+)(?!.*\bINDEX\b)")
+
+
+def explain(statement, connection):
+    """Return the EXPLAIN QUERY PLAN detail lines for a statement."""
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def audit(queries=None):
+    """Explain each audited query; returns a list of (name, plan lines, scanned tables)."""
+    queries = queries or AUDITED_QUERIES
+    results = []
+    with db.engine.connect() as connection:
+        if connection.dialect.name != "sqlite":
+            raise RuntimeError(f"Query audit supports SQLite only (got {connection.dialect.name}).")
+        for name, build in queries.items():
+            plan = explain(build(), connection)
+            scans = [match.group("table") for match in map(_FULL_SCAN.match, plan) if match]
+            results.append((name, plan, scans))
+    return results
@@ -0,0 +1,241 @@
+from flask_restful import Resource
+from flask import request, Response, stream_with_context
+from applications.model import Chapter, Quiz, Question
+from applications.database import db
+from applications.grading import answer_keys, option_code
+from applications.response_cache import catalog_cache
+from applications.quiz_payload import quiz_payloads
+from applications.search import search_index
+from applications.quizmanagement_api import auth_token_required
+from applications.permissions import permissions_required
+from sqlalchemy import insert
+import csv
+import io
+import json
+import logging
+
+IMPORT_CHUNK_SIZE = 500  # rows per bulk INSERT / transaction
+MAX_REPORTED_ERRORS = 1000
+EXPORT_CHUNK_ROWS = 1000
+EXPORT_COLUMNS = (
+    "id", "quiz_id", "text", "option1", "option2", "option3", "option4", "correct_option", "marks", "explanation"
+)
+MAX_LENGTHS = {"text": 255, "option1": 100, "option2": 100, "option3": 100, "option4": 100}
+
+
+def _request_format(default="ndjson"):
+    fmt = request.args.get("format")
+    if fmt:
+        return fmt.lower()
+    mimetype = request.mimetype or ""
+    if "csv" in mimetype:
+        return "csv"
+    if "ndjson" in mimetype or "jsonl" in mimetype or "json" in mimetype:
+        return "ndjson"
+    return default
+
+
+def _iter_rows(fmt, stream=None):
+    """Yield (line_number, row_dict_or_None, parse_error) from a binary stream (the request body by default)."""
+    text_stream = io.TextIOWrapper(stream or request.stream, encoding="utf-8", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text_stream)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+
+    for line_number, line in enumerate(text_stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "Each line must be a JSON object."
+            continue
+        yield line_number, row, None
+
+
+class _QuizLookup:
+    """Remembers which quiz ids exist so each id is checked against the database once."""
+
+    def __init__(self):
+        self._known = {}
+
+    def exists(self, quiz_id):
+        if quiz_id not in self._known:
+            self._known[quiz_id] = db.session.query(Quiz.id).filter(Quiz.id == quiz_id).first() is not None
+        return self._known[quiz_id]
+
+
+def _validate(row, default_quiz_id, quizzes):
+    """Return (values_for_insert, errors) for one imported row."""
+    errors = []
+    values = {}
+
+    raw_quiz_id = row.get("quiz_id") or default_quiz_id
+    try:
+        quiz_id = int(raw_quiz_id)
+    except (TypeError, ValueError):
+        quiz_id = None
+        errors.append("quiz_id is required and must be an integer.")
+    if quiz_id is not None and not quizzes.exists(quiz_id):
+        errors.append(f"Quiz {quiz_id} does not exist.")
+    values["quiz_id"] = quiz_id
+
+    text = (row.get("text") or row.get("question_text") or "").strip()
+    if not text:
+        errors.append("text is required.")
+    values["question_text"] = text
+
+    for field in ("option1", "option2", "option3", "option4"):
+        value = row.get(field)
+        value = str(value).strip() if value is not None else ""
+        if not value:
+            errors.append(f"{field} is required.")
+        values[field] = value
+
+    for field, limit in MAX_LENGTHS.items():
+        value = values["question_text"] if field == "text" else values[field]
+        if len(value) > limit:
+            errors.append(f"{field} is longer than {limit} characters.")
+
+    correct_option = row.get("correct_option")
+    if not option_code(correct_option):
+        errors.append("correct_option must be 1-4 (or A-D).")
+    values["correct_option"] = str(correct_option).strip() if correct_option is not None else None
+
+    marks = row.get("marks")
+    if marks in (None, ""):
+        values["marks"] = 1
+    else:
+        try:
+            values["marks"] = int(marks)
+            if values["marks"] < 0:
+                errors.append("marks must not be negative.")
+        except (TypeError, ValueError):
+            errors.append("marks must be an integer.")
+
+    values["explanation"] = row.get("explanation") or None
+    return values, errors
+
+
+# Bulk question import (CSV or NDJSON, streamed)
+class BulkQuestionImport(Resource):
+    @auth_token_required
+    @permissions_required('catalog:write')
+    def post(self):
+        """Import questions from a streamed CSV or NDJSON body, committing in chunks."""
+        fmt = _request_format()
+        if fmt not in ("csv", "ndjson"):
+            return {"message": "format must be csv or ndjson."}, 400
+
+        default_quiz_id = request.args.get("quiz_id")
+        quizzes = _QuizLookup()
+        chunk = []
+        touched = set()
+        report = {"inserted": 0, "rejected": 0, "chunks": 0, "errors": []}
+
+        def reject(line_number, messages):
+            report["rejected"] += 1
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                report["errors"].append({"line": line_number, "errors": messages})
+
+        def flush():
+            lines = [line_number for line_number, _ in chunk]
+            rows = [values for _, values in chunk]
+            chunk.clear()
+            quiz_ids = {row["quiz_id"] for row in rows}
+            try:
+                db.session.execute(insert(Question), rows)
+                Quiz.refresh_total_marks(quiz_ids)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logging.error(f"Bulk question import chunk failed: {e}")
+                for line_number in lines:
+                    reject(line_number, [f"Chunk insert failed: {e}"])
+                return
+            touched.update(quiz_ids)
+            report["inserted"] += len(rows)
+            report["chunks"] += 1
+
+        try:
+            for line_number, row, parse_error in _iter_rows(fmt):
+                if parse_error:
+                    reject(line_number, [parse_error])
+                    continue
+                values, errors = _validate(row, default_quiz_id, quizzes)
+                if errors:
+                    reject(line_number, errors)
+                    continue
+                chunk.append((line_number, values))
+                if len(chunk) >= IMPORT_CHUNK_SIZE:
+                    flush()
+            if chunk:
+                flush()
+        except (UnicodeDecodeError, csv.Error) as e:
+            report["errors"].append({"line": None, "errors": [f"Could not read the upload: {e}"]})
+        finally:
+            for quiz_id in touched:
+                answer_keys.invalidate(quiz_id)
+                quiz_payloads.invalidate(quiz_id)
+            if touched:
+                catalog_cache.invalidate()  # question counts changed
+                search_index.refresh("quiz_questions", touched)
+
+        status = 201 if report["inserted"] and not report["rejected"] else 207 if report["inserted"] else 400
+        return report, status
+
+
+# Streaming question export for a quiz, chapter or subject
+class QuestionExport(Resource):
+    @auth_token_required
+    @permissions_required('questions:read')
+    def get(self):
+        """Stream questions as CSV or NDJSON, selected by quiz_id, chapter_id or subject_id."""
+        fmt = (request.args.get("format") or "csv").lower()
+        if fmt not in ("csv", "ndjson"):
+            return {"message": "format must be csv or ndjson."}, 400
+
+        query = db.session.query(
+            Question.id, Question.quiz_id, Question.question_text, Question.option1, Question.option2,
+            Question.option3, Question.option4, Question.correct_option, Question.marks, Question.explanation
+        )
+        quiz_id = request.args.get("quiz_id", type=int)
+        chapter_id = request.args.get("chapter_id", type=int)
+        subject_id = request.args.get("subject_id", type=int)
+        if quiz_id is not None:
+            query = query.filter(Question.quiz_id == quiz_id)
+        elif chapter_id is not None:
+            query = query.join(Quiz, Quiz.id == Question.quiz_id).filter(Quiz.chapter_id == chapter_id)
+        elif subject_id is not None:
+            query = query.join(Quiz, Quiz.id == Question.quiz_id).join(
+                Chapter, Chapter.id == Quiz.chapter_id
+            ).filter(Chapter.subject_id == subject_id)
+        else:
+            return {"message": "One of quiz_id, chapter_id or subject_id is required."}, 400
+        query = query.order_by(Question.quiz_id, Question.id)
+
+        def generate_csv():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(EXPORT_COLUMNS)
+            for row in query.yield_per(EXPORT_CHUNK_ROWS):
+                writer.writerow(row)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+
+        def generate_ndjson():
+            for row in query.yield_per(EXPORT_CHUNK_ROWS):
+                yield json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n"
+
+        if fmt == "csv":
+            return Response(stream_with_context(generate_csv()), mimetype="text/csv", headers={
+                "Content-Disposition": "attachment; filename=questions.csv"
+            })
+        return Response(stream_with_context(generate_ndjson()), mimetype="application/x-ndjson")
@@ -0,0 +1,195 @@
+from flask import request, Response
+from applications.database import db, use_primary
+from applications.model import Quiz, Question
+from applications.response_cache import SharedVersion
+from applications.encoding import encode_body, compress, negotiate_mediatype, response_encoding
+import hashlib
+import random
+import threading
+
+# Renderings served from the cache
+STUDENT_QUESTIONS = "questions"  # QuestionManagement.get for students: no correct_option
+ADMIN_QUESTIONS = "questions_admin"  # QuestionManagement.get for admins
+STUDENT_DETAILS = "details"  # QuizDetails.get
+
+
+class QuizPayload:
+    """Everything needed to render one quiz without touching the database."""
+
+    def __init__(self, quiz_id, quiz, questions):
+        self.quiz_id = quiz_id
+        self.quiz = quiz  # dict, or None when the quiz does not exist
+        self.questions = questions  # list of dicts in id order, including correct_option
+        # Content fingerprint: identical across workers, changes with any edit
+        self.digest = hashlib.blake2b(repr((quiz, questions)).encode("utf-8"), digest_size=8).hexdigest()
+        self._bodies = {}  # (rendering, mediatype, encoding) -> bytes
+        self._lock = threading.Lock()
+
+    def document(self, rendering, order=None):
+        """Build the JSON document for a rendering, optionally in a shuffled order."""
+        questions = self.questions
+        option_orders = {}
+        if order is not None:
+            question_order, option_orders = order
+            questions = [questions[index] for index in question_order]
+
+        def options(question):
+            option_ids = option_orders.get(question["id"])
+            if option_ids is None:
+                return {"options": list(question["options"])}
+            return {
+                "options": [question["options"][option_id - 1] for option_id in option_ids],
+                "option_ids": option_ids  # original 1-4 numbering to submit back
+            }
+
+        if rendering == ADMIN_QUESTIONS:
+            return [
+                {
+                    "id": question["id"],
+                    "text": question["text"],
+                    "options": list(question["options"]),
+                    "correct_option": question["correct_option"],
+                    "marks": question["marks"]
+                }
+                for question in questions
+            ]
+        if rendering == STUDENT_QUESTIONS:
+            return [
+                {"id": question["id"], "text": question["text"], **options(question), "marks": question["marks"]}
+                for question in questions
+            ]
+        return {
+            "quiz": self.quiz,
+            "questions": [{"id": question["id"], "text": question["text"], **options(question)} for question in questions]
+        }
+
+    def body(self, rendering, mediatype="application/json", encoding="identity"):
+        """Pre-encoded (and compressed) bytes of an unshuffled rendering, built once."""
+        key = (rendering, mediatype, encoding)
+        body = self._bodies.get(key)
+        if body is None:
+            raw = self._bodies.get((rendering, mediatype, "identity"))
+            if raw is None:
+                raw = encode_body(self.document(rendering), mediatype)
+            body = compress(raw, encoding)
+            with self._lock:
+                self._bodies[(rendering, mediatype, "identity")] = raw
+                self._bodies[key] = body
+        return body
+
+    def shuffle_order(self, user_id):
+        """Deterministic per-user question and option order (stable across workers)."""
+        seed = hashlib.sha256(f"{self.quiz_id}:{user_id}:{self.digest}".encode("utf-8")).digest()
+        rng = random.Random(seed)
+        question_order = list(range(len(self.questions)))
+        rng.shuffle(question_order)
+        option_orders = {}
+        for question in self.questions:
+            option_ids = [1, 2, 3, 4]
+            rng.shuffle(option_ids)
+            option_orders[question["id"]] = option_ids
+        return question_order, option_orders
+
+
+class QuizPayloadCache:
+    """Per-quiz cache of rendered question payloads.
+
+    A quiz is loaded with two queries the first time it is requested; after that
+    every student starting it is served the same pre-encoded blob (gzip and
+    brotli variants are built lazily) until a question or quiz edit invalidates it.
+    """
+
+    def __init__(self, max_quizzes=2000):
+        self.max_quizzes = max_quizzes
+        self._payloads = {}
+        self._version = 0
+        self._shared = SharedVersion("quiz_payload")
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self._shared.init_app(app)
+
+    def invalidate(self, quiz_id=None):
+        """Drop one quiz (or all) here and tell the other workers to drop everything."""
+        with self._lock:
+            self._version += 1
+            if quiz_id is None:
+                self._payloads.clear()
+            else:
+                self._payloads.pop(int(quiz_id), None)
+            self._shared.bump(self._version)
+
+    def get(self, quiz_id):
+        quiz_id = int(quiz_id)
+        if self._shared.changed():
+            with self._lock:
+                self._version += 1
+                self._payloads.clear()
+
+        payload = self._payloads.get(quiz_id)
+        if payload is not None:
+            self.hits += 1
+            return payload
+
+        self.misses += 1
+        version = self._version
+        with use_primary():
+            payload = self._load(quiz_id)
+        with self._lock:
+            if version == self._version:
+                if len(self._payloads) >= self.max_quizzes:
+                    self._payloads.clear()
+                self._payloads[quiz_id] = payload
+        return payload
+
+    @staticmethod
+    def _load(quiz_id):
+        quiz = db.session.query(Quiz.id, Quiz.name, Quiz.description).filter(Quiz.id == quiz_id).first()
+        rows = db.session.query(
+            Question.id, Question.question_text, Question.option1, Question.option2,
+            Question.option3, Question.option4, Question.correct_option, Question.marks
+        ).filter(Question.quiz_id == quiz_id).order_by(Question.id).all()
+        questions = [
+            {
+                "id": row.id,
+                "text": row.question_text,
+                "options": (row.option1, row.option2, row.option3, row.option4),
+                "correct_option": row.correct_option,
+                "marks": row.marks
+            }
+            for row in rows
+        ]
+        quiz_document = {"id": quiz.id, "name": quiz.name, "description": quiz.description} if quiz else None
+        return QuizPayload(quiz_id, quiz_document, questions)
+
+    def respond(self, payload, rendering, user_id=None, shuffle=False):
+        """Serve a rendering as JSON or MessagePack (per Accept) with content-encoding negotiation and ETag/304 support."""
+        mediatype = negotiate_mediatype()
+        representation = "json" if mediatype == "application/json" else "msgpack"
+        if shuffle and rendering != ADMIN_QUESTIONS:
+            raw = encode_body(payload.document(rendering, payload.shuffle_order(user_id)), mediatype)
+            encoding = response_encoding.encoding_for(len(raw))
+            body = compress(raw, encoding)
+            etag = f"quiz-{payload.quiz_id}-{payload.digest}-{rendering}-u{user_id}-{representation}-{encoding}"
+            cache_control = "private, no-cache"
+        else:
+            encoding = response_encoding.encoding_for(len(payload.body(rendering, mediatype)))
+            body = payload.body(rendering, mediatype, encoding)
+            etag = f"quiz-{payload.quiz_id}-{payload.digest}-{rendering}-{representation}-{encoding}"
+            cache_control = "no-cache"
+
+        response = Response(body, status=200, mimetype=mediatype)
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+        response.headers["Vary"] = "Accept, Accept-Encoding"
+        response.headers["Cache-Control"] = cache_control
+        response.set_etag(etag)
+        return response.make_conditional(request)
+
+    def stats(self):
+        return {"quizzes": len(self._payloads), "version": self._version, "hits": self.hits, "misses": self.misses}
+
+
+quiz_payloads = QuizPayloadCache()
@@ -3,17 +3,25 @@ from flask import request, jsonify
 from applications.model import Subject, Chapter, Quiz, Question, Score
 from applications.database import db
 from flask_cors import cross_origin
+from applications.auth_api import token_cache
+from applications.permissions import permissions_required, has_permission
+from applications.grading import answer_keys
+from applications.log_pipeline import attempt_details
+from applications.attempt_sessions import attempt_sessions, AttemptError, minutes, time_limit_seconds
+from applications.score_writer import score_writer, persist_scores
+from applications.response_cache import catalog_cache
+from applications.leaderboard import leaderboards
+from applications.search import search_index
+from applications.quiz_payload import quiz_payloads, STUDENT_QUESTIONS, ADMIN_QUESTIONS, STUDENT_DETAILS
+from applications.pagination import (
+    PaginationError, keyset_page, stream_list, parse_fields, parse_datetime_arg, wants_page
+)
+from sqlalchemy import func
 from datetime import datetime
-import jwt
 import logging
 
-logging.basicConfig(level=logging.INFO)
 
-# JWT Configuration
-SECRET_KEY = "your_secret_key"  # Replace with a secure secret key
-
-
-# Middleware for JWT Authenticationdef auth_token_required(func):
+# Middleware for JWT Authentication
 def auth_token_required(func):
     def wrapper(*args, **kwargs):
         token = request.headers.get("Authorization")
@@ -21,36 +29,21 @@ def auth_token_required(func):
             logging.warning("Missing token in request headers.")
             return {"message": "Authorization token is required"}, 401
 
-        try:
-            token = token.split(" ")[1]  # Remove 'Bearer' prefix
-            payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-            logging.info(f"Decoded token payload: {payload}")
-            request.user = payload
-        except jwt.ExpiredSignatureError:
-            logging.error("Token has expired.")
-            return {"message": "Token has expired"}, 401
-        except jwt.InvalidTokenError as e:
-            logging.error(f"Invalid token: {str(e)}")
+        parts = token.split(" ")
+        if len(parts) != 2:
             return {"message": "Invalid token"}, 401
 
+        # Verified payloads are cached until their exp claim, so polling clients skip jwt.decode
+        payload, error = token_cache.decode(parts[1])
+        if error:
+            logging.debug(f"Rejected token: {error}")
+            return {"message": error.rstrip(".")}, 401
+
+        request.user = payload
         return func(*args, **kwargs)
     return wrapper
 
 
-
-
-# Middleware for Role-Based Access Control
-def roles_required(required_role):
-    def decorator(func):
-        def wrapper(*args, **kwargs):
-            user_role = request.user.get("role")
-            if user_role != required_role:
-                return {"message": "Access denied: insufficient privileges"}, 403
-            return func(*args, **kwargs)
-        return wrapper
-    return decorator
-
-
 # Questions By Quiz
 class QuestionsByQuiz(Resource):
     @auth_token_required
@@ -79,22 +72,26 @@ class AllSubjects(Resource):
     def get(self):
         """Fetch all subjects."""
         try:
-            subjects = Subject.query.all()
-            return jsonify([
-                {
-                    'id': subject.id,
-                    'name': subject.name,
-                    'description': subject.description,
-                    'created_at': subject.created_at
-                }
-                for subject in subjects
-            ])
+            return catalog_cache.respond(("subjects",), self._build)
         except Exception as e:
             logging.error(f"Error fetching subjects: {e}")
             return {"error": "An error occurred while fetching subjects."}, 500
 
+    @staticmethod
+    def _build():
+        subjects = Subject.query.all()
+        return [
+            {
+                'id': subject.id,
+                'name': subject.name,
+                'description': subject.description,
+                'created_at': subject.created_at
+            }
+            for subject in subjects
+        ], 200
+
     @auth_token_required
-    @roles_required('admin')
+    @permissions_required('catalog:write')
     def post(self):
         """Add a new subject."""
         try:
@@ -111,13 +108,15 @@ class AllSubjects(Resource):
             )
             db.session.add(subject)
             db.session.commit()
+            catalog_cache.invalidate()
+            search_index.refresh("subject", [subject.id])
             return {"message": "Subject added successfully"}, 201
         except Exception as e:
             logging.error(f"Error adding subject: {e}")
             return {"error": "An error occurred while adding the subject."}, 500
 
     @auth_token_required
-    @roles_required('admin')
+    @permissions_required('catalog:write')
     def put(self,subject_id):
         """Update an existing subject."""
         try:
@@ -126,13 +125,15 @@ class AllSubjects(Resource):
             subject.name = data.get('name', subject.name)
             subject.description = data.get('description', subject.description)
             db.session.commit()
+            catalog_cache.invalidate()
+            search_index.refresh("subject", [subject_id])
             return {"message": "Subject updated successfully"}, 200
         except Exception as e:
             logging.error(f"Error updating subject: {e}")
             return {"error": "An error occurred while updating the subject."}, 500
 
     @auth_token_required
-    @roles_required('admin')
+    @permissions_required('catalog:write')
     def delete(self):
         """Delete a subject."""
         try:
@@ -144,12 +145,97 @@ class AllSubjects(Resource):
             subject = Subject.query.get_or_404(subject_id, description="Subject not found.")
             db.session.delete(subject)
             db.session.commit()
+            catalog_cache.invalidate()
+            answer_keys.invalidate()
+            leaderboards.invalidate()
+            quiz_payloads.invalidate()
+            search_index.invalidate()
             return {"message": "Subject deleted successfully"}, 200
         except Exception as e:
             logging.error(f"Error deleting subject: {e}")
             return {"error": "An error occurred while deleting the subject."}, 500
 
 
+# Subject -> Chapter -> Quiz tree in one round trip
+class CatalogTree(Resource):
+    @auth_token_required
+    def get(self):
+        """Fetch the catalog tree (``depth`` 1-3), optionally only under ``subject_id`` or ``chapter_id``."""
+        try:
+            depth = request.args.get("depth", 3, type=int)
+            if depth not in (1, 2, 3):
+                return {"message": "depth must be 1 (subjects), 2 (chapters) or 3 (quizzes)."}, 400
+            subject_id = request.args.get("subject_id", type=int)
+            chapter_id = request.args.get("chapter_id", type=int)
+            key = ("catalog", depth, subject_id, chapter_id)
+            return catalog_cache.respond(key, lambda: self._build(depth, subject_id, chapter_id))
+        except Exception as e:
+            logging.error(f"Error fetching catalog: {e}")
+            return {"error": "An error occurred while fetching the catalog."}, 500
+
+    @staticmethod
+    def _build(depth, subject_id, chapter_id):
+        # One statement: subjects outer-joined to chapters, quizzes and per-quiz question counts
+        columns = [Subject.id, Subject.name, Subject.description]
+        if depth >= 2:
+            columns += [Chapter.id, Chapter.name, Chapter.description]
+        if depth >= 3:
+            question_counts = db.session.query(
+                Question.quiz_id.label("quiz_id"), func.count(Question.id).label("question_count")
+            ).group_by(Question.quiz_id).subquery()
+            columns += [
+                Quiz.id, Quiz.name, Quiz.description, Quiz.difficulty_level, Quiz.time_limit,
+                Quiz.total_marks, func.coalesce(question_counts.c.question_count, 0)
+            ]
+
+        query = db.session.query(*columns)
+        if depth >= 2:
+            query = query.outerjoin(Chapter, Chapter.subject_id == Subject.id)
+        if depth >= 3:
+            query = query.outerjoin(Quiz, Quiz.chapter_id == Chapter.id).outerjoin(
+                question_counts, question_counts.c.quiz_id == Quiz.id
+            )
+        if subject_id is not None:
+            query = query.filter(Subject.id == subject_id)
+        if chapter_id is not None:
+            if depth < 2:
+                return {"message": "chapter_id requires depth 2 or 3."}, 400
+            query = query.filter(Chapter.id == chapter_id)
+        query = query.order_by(*(column for column in (Subject.id, Chapter.id, Quiz.id)[:depth]))
+
+        subjects = {}
+        chapters = {}
+        for row in query:
+            subject = subjects.get(row[0])
+            if subject is None:
+                subject = subjects[row[0]] = {"id": row[0], "name": row[1], "description": row[2]}
+                if depth >= 2:
+                    subject["chapters"] = []
+            if depth < 2 or row[3] is None:
+                continue
+            chapter = chapters.get(row[3])
+            if chapter is None:
+                chapter = chapters[row[3]] = {"id": row[3], "name": row[4], "description": row[5]}
+                if depth >= 3:
+                    chapter["quizzes"] = []
+                subject["chapters"].append(chapter)
+            if depth < 3 or row[6] is None:
+                continue
+            chapter["quizzes"].append({
+                "id": row[6],
+                "name": row[7],
+                "description": row[8],
+                "difficulty_level": row[9],
+                "time_limit": row[10],
+                "total_marks": row[11],
+                "question_count": row[12]
+            })
+
+        if not subjects and (subject_id is not None or chapter_id is not None):
+            return {"message": "No matching catalog entries found."}, 404
+        return list(subjects.values()), 200
+
+
 # Chapter Management
 class ChapterManagement(Resource):
     @auth_token_required
@@ -159,20 +245,23 @@ class ChapterManagement(Resource):
             if subject_id is None:
                 return {"message": "Subject ID is required as a URL parameter"}, 400
 
-            chapters = Chapter.query.filter_by(subject_id=subject_id).all()
-            if not chapters:
-                return {"message": "No chapters found for this subject"}, 404
-
-            return jsonify([
-                {"id": chapter.id, "name": chapter.name, "description": chapter.description}
-                for chapter in chapters
-            ])
+            return catalog_cache.respond(("chapters", subject_id), lambda: self._build(subject_id))
         except Exception as e:
             return {"error": str(e)}, 500
 
+    @staticmethod
+    def _build(subject_id):
+        chapters = Chapter.query.filter_by(subject_id=subject_id).all()
+        if not chapters:
+            return {"message": "No chapters found for this subject"}, 404
+
+        return [
+            {"id": chapter.id, "name": chapter.name, "description": chapter.description}
+            for chapter in chapters
+        ], 200
 
     @auth_token_required
-    @roles_required('admin')
+    @permissions_required('catalog:write')
     def post(self):
         """Add a new chapter to a subject."""
         try:
@@ -184,12 +273,14 @@ class ChapterManagement(Resource):
             )
             db.session.add(chapter)
             db.session.commit()
+            catalog_cache.invalidate()
+            search_index.refresh("chapter", [chapter.id])
             return {"message": "Chapter added successfully"}, 201
         except Exception as e:
             return {"error": str(e)}, 500
 
     @auth_token_required
-    @roles_required('admin')
+    @permissions_required('catalog:write')
     def put(self, chapter_id):
         """Update a chapter."""
         try:
@@ -198,18 +289,25 @@ class ChapterManagement(Resource):
             chapter.name = data.get('name', chapter.name)
             chapter.description = data.get('description', chapter.description)
             db.session.commit()
+            catalog_cache.invalidate()
+            search_index.refresh("chapter", [chapter_id])
             return {"message": "Chapter updated successfully"}, 200
         except Exception as e:
             return {"error": str(e)}, 500
 
     @auth_token_required
-    @roles_required('admin')
+    @permissions_required('catalog:write')
     def delete(self, chapter_id):
         """Delete a chapter."""
         try:
             chapter = Chapter.query.get_or_404(chapter_id)
             db.session.delete(chapter)
             db.session.commit()
+            catalog_cache.invalidate()
+            answer_keys.invalidate()
+            leaderboards.invalidate()
+            quiz_payloads.invalidate()
+            search_index.invalidate()
             return {"message": "Chapter deleted successfully"}, 200
         except Exception as e:
             return {"error": str(e)}, 500
@@ -217,35 +315,57 @@ class ChapterManagement(Resource):
 
 # Quiz Management
 class QuizManagement(Resource):
+    FIELDS = (
+        "id", "chapter_id", "name", "description", "difficulty_level",
+        "time_limit", "total_marks", "created_at", "date"
+    )
+    DEFAULT_FIELDS = ("id", "name", "description", "chapter_id")
+
     @auth_token_required
     def get(self):
-        """Fetch quizzes, optionally filter by chapter_id."""
-        try:
-            chapter_id = request.args.get("chapter_id")
-            if chapter_id:
-                quizzes = Quiz.query.filter_by(chapter_id=chapter_id).all()
-            else:
-                quizzes = Quiz.query.all()
+        """Fetch quizzes, optionally filter by chapter_id.
 
-            if not quizzes:
-                return {"message": "No quizzes found."}, 404
+        ``limit``/``cursor``/``fields`` switch to a keyset-paginated, projected page.
+        """
+        try:
+            chapter_id = request.args.get("chapter_id", type=int)
+            if not wants_page():
+                return catalog_cache.respond(("quizzes", chapter_id), lambda: self._build(chapter_id))
 
-            return jsonify([
-                {
-                    "id": quiz.id,
-                    "name": quiz.name,
-                    "description": quiz.description,
-                    "chapter_id": quiz.chapter_id
-                }
-                for quiz in quizzes
-            ])
+            fields = parse_fields(self.FIELDS, self.DEFAULT_FIELDS)
+            query = Quiz.query
+            if chapter_id:
+                query = query.filter(Quiz.chapter_id == chapter_id)
+            return keyset_page(query, Quiz, fields, [Quiz.id])
+        except PaginationError as e:
+            return {"message": str(e)}, 400
         except Exception as e:
             return {"error": str(e)}, 500
 
+    @staticmethod
+    def _build(chapter_id):
+        if chapter_id:
+            quizzes = Quiz.query.filter_by(chapter_id=chapter_id).all()
+        else:
+            quizzes = Quiz.query.all()
+
+        if not quizzes:
+            return {"message": "No quizzes found."}, 404
+
+        return [
+            {
+                "id": quiz.id,
+                "name": quiz.name,
+                "description": quiz.description,
+                "chapter_id": quiz.chapter_id
+            }
+            for quiz in quizzes
+        ], 200
+
     @auth_token_required
-    @roles_required('admin')
+    @permissions_required('catalog:write')
     def post(self):
-        """Add a new quiz to a chapter."""
+        """Add a new quiz to a chapter (total_marks follows its questions and is not accepted here)."""
         try:
             data = request.json
             quiz = Quiz(
@@ -254,18 +374,20 @@ class QuizManagement(Resource):
                 description=data.get('description', ''),
                 difficulty_level=data.get('difficulty_level', 'Medium'),
                 time_limit=data.get('time_limit', 30),
-                total_marks=data.get('total_marks', 100)
+                total_marks=0
             )
             db.session.add(quiz)
             db.session.commit()
+            catalog_cache.invalidate()
+            search_index.refresh("quiz", [quiz.id])
             return {"message": "Quiz added successfully"}, 201
         except Exception as e:
             return {"error": str(e)}, 500
 
     @auth_token_required
-    @roles_required('admin')
+    @permissions_required('catalog:write')
     def put(self, quiz_id):
-        """Update a quiz."""
+        """Update a quiz (total_marks follows its questions and is not accepted here)."""
         try:
             data = request.json
             quiz = Quiz.query.get_or_404(quiz_id)
@@ -273,20 +395,28 @@ class QuizManagement(Resource):
             quiz.description = data.get('description', quiz.description)
             quiz.difficulty_level = data.get('difficulty_level', quiz.difficulty_level)
             quiz.time_limit = data.get('time_limit', quiz.time_limit)
-            quiz.total_marks = data.get('total_marks', quiz.total_marks)
             db.session.commit()
+            catalog_cache.invalidate()
+            quiz_payloads.invalidate(quiz_id)
+            search_index.refresh("quiz", [quiz_id])
             return {"message": "Quiz updated successfully"}, 200
         except Exception as e:
             return {"error": str(e)}, 500
 
     @auth_token_required
-    @roles_required('admin')
+    @permissions_required('catalog:write')
     def delete(self, quiz_id):
         """Delete a quiz."""
         try:
             quiz = Quiz.query.get_or_404(quiz_id)
             db.session.delete(quiz)
             db.session.commit()
+            catalog_cache.invalidate()
+            answer_keys.invalidate(quiz_id)
+            leaderboards.invalidate(quiz_id)
+            quiz_payloads.invalidate(quiz_id)
+            search_index.refresh("quiz", [quiz_id])
+            search_index.refresh("quiz_questions", [quiz_id])
             return {"message": "Quiz deleted successfully"}, 200
         except Exception as e:
             return {"error": str(e)}, 500
@@ -296,24 +426,17 @@ class QuizManagement(Resource):
 class QuestionManagement(Resource):
     @auth_token_required
     def get(self, quiz_id):
-        """Fetch all questions for a quiz."""
+        """Fetch all questions for a quiz (answers only for admins; ``?shuffle=1`` for a per-user order)."""
         try:
-            questions = Question.query.filter_by(quiz_id=quiz_id).all()
-            return jsonify([
-                {
-                    'id': question.id,
-                    'text': question.question_text,
-                    'options': [question.option1, question.option2, question.option3, question.option4],
-                    'correct_option': question.correct_option,
-                    'marks': question.marks
-                }
-                for question in questions
-            ])
+            payload = quiz_payloads.get(quiz_id)
+            rendering = ADMIN_QUESTIONS if has_permission(request.user, "questions:read") else STUDENT_QUESTIONS
+            shuffle = request.args.get("shuffle") in ("1", "true")
+            return quiz_payloads.respond(payload, rendering, request.user.get("user_id"), shuffle)
         except Exception as e:
             return {"error": str(e)}, 500
 
     @auth_token_required
-    @roles_required('admin')
+    @permissions_required('catalog:write')
     def post(self):
         """Add a new question to a quiz."""
         try:
@@ -329,13 +452,19 @@ class QuestionManagement(Resource):
                 marks=data.get('marks', 1)
             )
             db.session.add(question)
+            db.session.flush()
+            Quiz.refresh_total_marks([question.quiz_id])
             db.session.commit()
+            answer_keys.invalidate(question.quiz_id)
+            quiz_payloads.invalidate(question.quiz_id)
+            catalog_cache.invalidate()
+            search_index.refresh("question", [question.id])
             return {"message": "Question added successfully"}, 201
         except Exception as e:
             return {"error": str(e)}, 500
 
     @auth_token_required
-    @roles_required('admin')
+    @permissions_required('catalog:write')
     def put(self, question_id):
         """Update a question."""
         try:
@@ -348,19 +477,32 @@ class QuestionManagement(Resource):
             question.option4 = data.get('option4', question.option4)
             question.correct_option = data.get('correct_option', question.correct_option)
             question.marks = data.get('marks', question.marks)
+            db.session.flush()
+            Quiz.refresh_total_marks([question.quiz_id])
             db.session.commit()
+            answer_keys.invalidate(question.quiz_id)
+            quiz_payloads.invalidate(question.quiz_id)
+            catalog_cache.invalidate()
+            search_index.refresh("question", [question_id])
             return {"message": "Question updated successfully"}, 200
         except Exception as e:
             return {"error": str(e)}, 500
 
     @auth_token_required
-    @roles_required('admin')
+    @permissions_required('catalog:write')
     def delete(self, question_id):
         """Delete a question."""
         try:
             question = Question.query.get_or_404(question_id)
+            quiz_id = question.quiz_id
             db.session.delete(question)
+            db.session.flush()
+            Quiz.refresh_total_marks([quiz_id])
             db.session.commit()
+            answer_keys.invalidate(quiz_id)
+            quiz_payloads.invalidate(quiz_id)
+            catalog_cache.invalidate()
+            search_index.refresh("question", [question_id])
             return {"message": "Question deleted successfully"}, 200
         except Exception as e:
             return {"error": str(e)}, 500
@@ -368,113 +510,133 @@ class QuestionManagement(Resource):
 
 # Score Management
 class ScoreManagement(Resource):
+    FIELDS = ("id", "user_id", "quiz_id", "time_stamp_of_attempt", "total_scored", "total_time_taken")
+    SORT_KEYS = ("id", "time_stamp_of_attempt")
+
     @auth_token_required
     def get(self):
-        """Fetch all scores."""
+        """Fetch scores, streamed.
+
+        Filters: ``user_id``, ``quiz_id``, ``from``/``to`` (ISO dates). ``fields`` limits
+        the columns loaded. ``limit``/``cursor`` return a keyset page ordered by
+        ``order_by`` (``id`` or ``time_stamp_of_attempt``, ``direction=desc`` for newest first).
+        """
         try:
-            scores = Score.query.all()
-            return jsonify([
-                {
-                    'id': score.id,
-                    'user_id': score.user_id,
-                    'quiz_id': score.quiz_id,
-                    'time_stamp_of_attempt': score.time_stamp_of_attempt,
-                    'total_scored': score.total_scored,
-                    'total_time_taken': score.total_time_taken
-                }
-                for score in scores
-            ])
+            fields = parse_fields(self.FIELDS, self.FIELDS)
+            query = Score.query
+            user_id = request.args.get("user_id", type=int)
+            quiz_id = request.args.get("quiz_id", type=int)
+            start = parse_datetime_arg("from")
+            end = parse_datetime_arg("to")
+            if user_id is not None:
+                query = query.filter(Score.user_id == user_id)
+            if quiz_id is not None:
+                query = query.filter(Score.quiz_id == quiz_id)
+            if start is not None:
+                query = query.filter(Score.time_stamp_of_attempt >= start)
+            if end is not None:
+                query = query.filter(Score.time_stamp_of_attempt < end)
+
+            if "limit" not in request.args and "cursor" not in request.args:
+                # Unpaginated callers still get a plain list, streamed in chunks
+                columns = [getattr(Score, name) for name in fields]
+                return stream_list(query.with_entities(*columns).order_by(Score.id), fields)
+
+            order_by = request.args.get("order_by", "id")
+            if order_by not in self.SORT_KEYS:
+                raise PaginationError(f"order_by must be one of: {', '.join(self.SORT_KEYS)}.")
+            sort_columns = [Score.id] if order_by == "id" else [Score.time_stamp_of_attempt, Score.id]
+            descending = request.args.get("direction", "asc") == "desc"
+            return keyset_page(query, Score, fields, sort_columns, descending=descending)
+        except PaginationError as e:
+            return {"message": str(e)}, 400
         except Exception as e:
             return {"error": str(e)}, 500
 
 class QuizDetails(Resource):
     @auth_token_required
     def get(self, quiz_id):
-        """Fetch quiz details and associated questions."""
+        """Fetch quiz details and associated questions (``?shuffle=1`` for a per-user order)."""
         try:
-            # Fetch quiz details
-            quiz = Quiz.query.get(quiz_id)
-            if not quiz:
+            payload = quiz_payloads.get(quiz_id)
+            if payload.quiz is None:
                 return {"message": "Quiz not found."}, 404
 
-            # Fetch associated questions
-            questions = Question.query.filter_by(quiz_id=quiz_id).all()
-            question_list = [
-                {
-                    "id": q.id,
-                    "text": q.question_text,
-                    "options": [q.option1, q.option2, q.option3, q.option4],
-                }
-                for q in questions
-            ]
-
-            return {
-                "quiz": {
-                    "id": quiz.id,
-                    "name": quiz.name,
-                    "description": quiz.description,
-                },
-                "questions": question_list,
-            }, 200
+            shuffle = request.args.get("shuffle") in ("1", "true")
+            return quiz_payloads.respond(payload, STUDENT_DETAILS, request.user.get("user_id"), shuffle)
         except Exception as e:
             return {"error": str(e)}, 500
 
 class SubmitQuiz(Resource):
     @auth_token_required
     def post(self, quiz_id):
-        """Submit quiz answers and calculate score."""
+        """Submit quiz answers and calculate score.
+
+        The time taken always comes from the server clock of an ``attempt_id`` opened
+        with StartAttempt (autosaved answers count too). Quizzes with a time limit
+        require one; untimed quizzes may be submitted without, and then no time is
+        recorded. A client-reported ``time_taken`` is ignored.
+        """
         try:
             # Parse JSON payload
             data = request.json
             answers = data.get("answers", {})
-            time_taken = data.get("time_taken", 0)
+            time_taken = None
 
-            if not answers:
-                return jsonify({"message": "Answers are required."}), 400
+            attempt_id = data.get("attempt_id")
+            if attempt_id:
+                _, answers, elapsed = attempt_sessions.finish(attempt_id, request.user["user_id"], quiz_id, answers)
+                time_taken = minutes(elapsed)
+            else:
+                quiz = db.session.query(Quiz.time_limit, Quiz.duration).filter(Quiz.id == quiz_id).first()
+                if quiz is None:
+                    return {"message": "Quiz not found."}, 404
+                if time_limit_seconds(quiz):
+                    return {"message": "This quiz has a time limit; start it with POST "
+                                       f"/quizzes/{quiz_id}/attempts and submit with its attempt_id."}, 400
+                if not answers:
+                    return jsonify({"message": "Answers are required."}), 400
+
+            # Grade against the cached answer key (one vectorised comparison, weighted by marks)
+            answer_key = answer_keys.get(quiz_id)
+            if answer_key is None:
+                return {"message": "No questions found for this quiz."}, 404
 
-            # Fetch questions for the quiz
-            questions = Question.query.filter_by(quiz_id=quiz_id).all()
-            if not questions:
-                return jsonify({"message": "No questions found for this quiz."}), 404
-
-            # Evaluate answers
-            score = 0
-            total_questions = len(questions)
-
-            for question in questions:
-                question_id = str(question.id)
-                correct_option = str(question.correct_option)
-
-                if question_id in answers:
-                    user_answer = str(answers[question_id])
-                    if user_answer == correct_option:
-                        score += 1
-                    else:
-                        print(f"Incorrect answer for question {question_id}: Expected {correct_option}, got {user_answer}")
-                else:
-                    print(f"Question {question_id} not answered.")
-
-            # Save the score in the database
-            new_score = Score(
-                user_id=request.user["user_id"],  # Assuming JWT middleware sets user info
-                quiz_id=quiz_id,
-                total_scored=score,
-                total_time_taken=time_taken,
-                time_stamp_of_attempt=datetime.utcnow()
-            )
-            db.session.add(new_score)
-            db.session.commit()
+            result = answer_key.grade(answers)
+            score = result.score
+            total_questions = len(answer_key)
+            attempt_details.record(request.user["user_id"], quiz_id, result)
+
+            # Save the score in the database (queued for a bulk commit when write-behind is on)
+            new_score = {
+                "user_id": request.user["user_id"],  # Assuming JWT middleware sets user info
+                "quiz_id": quiz_id,
+                "total_scored": score,
+                "total_time_taken": time_taken,
+                "time_stamp_of_attempt": datetime.utcnow(),
+                # Picked options, one byte per question, kept for item analysis
+                "answer_key_id": answer_key.snapshot_id,
+                "answers": result.packed_answers()
+            }
+            if score_writer.enabled:
+                score_writer.submit(new_score)
+            else:
+                persist_scores([new_score])
 
             # Return the response as JSON
             return {
                 "message": "Quiz submitted successfully",
                 "score": score,
+                "total_marks": answer_key.total_marks,
+                "correct_answers": result.correct_count,
                 "total_questions": total_questions,
                 "time_taken": time_taken,
             }, 200
 
+        except AttemptError as e:
+            return {"message": str(e)}, e.status
         except Exception as e:
-            print(f"Error during quiz submission: {str(e)}")
+            logging.exception(f"Error during quiz submission: {str(e)}")
             return {
                 "message": "Internal server error",
                 "error": str(e),
@@ -0,0 +1,84 @@
+from flask import g, request
+from applications.database import db, READ_ONLY_BIND
+import threading
+import time
+
+READ_METHODS = ("GET", "HEAD")
+CONSISTENCY_HEADER = "X-Read-Consistency"  # "primary" forces a request onto the primary engine
+
+
+class ReadRouter:
+    """Decides per request whether reads may go to the read-only engine.
+
+    GET and HEAD requests are routed to the read-only bind. After a user's
+    successful write (a submission, an admin edit, ...) that user's reads stay
+    on the primary for ``window`` seconds, so a lagging replica never hides
+    their own changes from them. The pins are per process; clients behind a
+    non-sticky balancer can send ``X-Read-Consistency: primary`` instead.
+    """
+
+    def __init__(self, window=5.0, max_tracked=100000):
+        self.window = window
+        self.max_tracked = max_tracked
+        self.enabled = False
+        self._pins = {}  # user_id -> monotonic time until which reads use the primary
+        self._lock = threading.Lock()
+        self.routed = 0
+        self.pinned = 0
+
+    def init_app(self, app):
+        self.window = app.config.get("READ_YOUR_WRITES_WINDOW", self.window)
+        with app.app_context():
+            self.enabled = READ_ONLY_BIND in db.engines
+        if not self.enabled:
+            return
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    @staticmethod
+    def _user_id():
+        from applications.auth_api import token_cache, strip_bearer
+
+        header = request.headers.get("Authorization")
+        if not header:
+            return None
+        payload, error = token_cache.decode(strip_bearer(header))
+        return None if error else payload.get("user_id")
+
+    def _is_pinned(self, user_id):
+        until = self._pins.get(user_id)
+        if until is None:
+            return False
+        if until > time.monotonic():
+            return True
+        with self._lock:
+            self._pins.pop(user_id, None)
+        return False
+
+    def _before_request(self):
+        if request.method not in READ_METHODS or request.headers.get(CONSISTENCY_HEADER) == "primary":
+            return
+        user_id = self._user_id()
+        if user_id is not None and self._is_pinned(user_id):
+            self.pinned += 1
+            return
+        g.read_only_bind = True
+        self.routed += 1
+
+    def _after_request(self, response):
+        if request.method in READ_METHODS or response.status_code >= 400:
+            return response
+        user_id = self._user_id()
+        if user_id is not None:
+            now = time.monotonic()
+            with self._lock:
+                if user_id not in self._pins and len(self._pins) >= self.max_tracked:
+                    self._pins = {key: until for key, until in self._pins.items() if until > now}
+                self._pins[user_id] = now + self.window
+        return response
+
+    def stats(self):
+        return {"enabled": self.enabled, "pinned_users": len(self._pins), "routed": self.routed, "pinned": self.pinned}
+
+
+read_router = ReadRouter()
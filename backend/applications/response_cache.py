@@ -0,0 +1,160 @@
+from flask import request, Response
+from applications.database import use_primary
+from applications.encoding import json_bytes, encode_body, compress, negotiate_mediatype, response_encoding
+import hashlib
+import os
+import secrets
+import threading
+
+
+class CachedResponse:
+    """A cached payload: its JSON body, status and ETag, plus other representations and compressed variants."""
+
+    __slots__ = ("payload", "body", "status", "etag", "encoded")
+
+    def __init__(self, payload, body, status, etag):
+        self.payload = payload
+        self.body = body
+        self.status = status
+        self.etag = etag
+        self.encoded = {("application/json", "identity"): body}  # (mediatype, content encoding) -> bytes
+
+    def body_for(self, mediatype, encoding="identity"):
+        """Bytes of one representation, encoded and compressed on first request."""
+        body = self.encoded.get((mediatype, encoding))
+        if body is None:
+            raw = self.encoded.get((mediatype, "identity"))
+            if raw is None:
+                raw = self.encoded[(mediatype, "identity")] = encode_body(self.payload, mediatype)
+            body = self.encoded[(mediatype, encoding)] = compress(raw, encoding)
+        return body
+
+
+class SharedVersion:
+    """Version stamp shared by the workers on one host through ``<instance>/<name>.version``.
+
+    ``bump`` atomically replaces the file with a new random token; ``changed``
+    reports (once) that another process bumped it since the last check by
+    comparing the file's content, so bumps within one filesystem timestamp
+    tick are never merged.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._path = None
+        self._stamp = None
+
+    def init_app(self, app):
+        os.makedirs(app.instance_path, exist_ok=True)
+        self._path = os.path.join(app.instance_path, f"{self.name}.version")
+        self._stamp = self._read_stamp()
+
+    def _read_stamp(self):
+        try:
+            with open(self._path) as version_file:
+                return version_file.read()
+        except (OSError, TypeError):
+            return None
+
+    def changed(self):
+        if self._path is None:
+            return False
+        stamp = self._read_stamp()
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        return True
+
+    def bump(self, version):
+        if self._path is None:
+            return
+        token = secrets.token_hex(8)
+        stamp = f"{os.getpid()}:{version}:{token}\n"
+        temporary = f"{self._path}.{token}.tmp"
+        with open(temporary, "w") as version_file:
+            version_file.write(stamp)
+        os.replace(temporary, self._path)  # readers see the old or the new token, never a partial one
+        self._stamp = stamp
+
+
+class VersionedResponseCache:
+    """Read cache of pre-serialized JSON responses, invalidated as a whole.
+
+    Every ``invalidate`` bumps the cache version. Once ``init_app`` has run the
+    version is also shared through a SharedVersion file, so an admin edit
+    handled by one worker invalidates the cache of every worker on the host.
+    """
+
+    def __init__(self, name, max_entries=4096):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries = {}
+        self._version = 0
+        self._shared = SharedVersion(name)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        self._shared.init_app(app)
+
+    def _check_shared_version(self):
+        if self._shared.changed():
+            with self._lock:
+                self._version += 1
+                self._entries.clear()
+
+    def invalidate(self):
+        """Drop every cached response (called after an admin mutation)."""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._shared.bump(self._version)
+
+    def get(self, key, build):
+        """Return the CachedResponse for ``key``, calling ``build()`` -> (payload, status) on a miss."""
+        self._check_shared_version()
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        version = self._version
+        with use_primary():
+            payload, status = build()
+        body = json_bytes(payload)
+        digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        # Content-only ETag: every worker derives the same one for the same bytes
+        entry = CachedResponse(payload, body, status, f"{self.name}-{digest}")
+
+        with self._lock:
+            if version == self._version:
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+                self._entries[key] = entry
+        return entry
+
+    def respond(self, key, build):
+        """Serve ``key`` as JSON or MessagePack (per Accept), answering 304 when If-None-Match matches."""
+        entry = self.get(key, build)
+        mediatype = negotiate_mediatype()
+        encoding = response_encoding.encoding_for(len(entry.body_for(mediatype)))
+        response = Response(entry.body_for(mediatype, encoding), status=entry.status, mimetype=mediatype)
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept")
+        response.vary.add("Accept-Encoding")
+        etag = entry.etag if mediatype == "application/json" else f"{entry.etag}-msgpack"
+        response.set_etag(etag if encoding == "identity" else f"{etag}-{encoding}")
+        response.headers["Cache-Control"] = "no-cache"  # clients may store it but must revalidate
+        if entry.status == 200:
+            response.make_conditional(request)
+        return response
+
+    def stats(self):
+        return {"version": self._version, "size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Subjects, chapters and quizzes: changes only when an admin edits the catalog
+catalog_cache = VersionedResponseCache("catalog")
@@ -0,0 +1,284 @@
+from applications.database import db
+from applications.model import Score, AttemptAnswers
+from applications.progress import record_attempts
+from sqlalchemy import insert
+from datetime import datetime
+import atexit
+import base64
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: spool files are not locked, replay trusts the caller
+    fcntl = None
+
+
+# Callables notified with the committed rows (as dicts including "id") after each batch
+score_listeners = []
+
+
+def on_scores_committed(listener):
+    """Register ``listener(rows)`` to run after every successful persist_scores() commit."""
+    if listener not in score_listeners:
+        score_listeners.append(listener)
+    return listener
+
+
+# Row keys that describe the attempt's packed answers rather than Score columns
+ATTEMPT_FIELDS = ("answer_key_id", "answers")
+
+
+def persist_scores(rows):
+    """Insert a batch of Score rows in a single transaction and return them with their ids.
+
+    Rows carrying ``answers`` (packed option codes) and ``answer_key_id`` also get
+    their AttemptAnswers record, and every row is folded into the user's progress
+    summary, all in the same transaction as the Score.
+    """
+    score_rows = [{name: value for name, value in row.items() if name not in ATTEMPT_FIELDS} for row in rows]
+    scores = [Score(**row) for row in score_rows]
+    db.session.add_all(scores)
+    db.session.flush()
+    # Read ids before commit: committed objects are expired and would reload one by one
+    inserted = [dict(row, id=score.id) for row, score in zip(score_rows, scores)]
+    attempts = [
+        {"score_id": score.id, "quiz_id": row["quiz_id"], "answer_key_id": row["answer_key_id"], "answers": row["answers"]}
+        for row, score in zip(rows, scores)
+        if row.get("answers") is not None and row.get("answer_key_id") is not None
+    ]
+    if attempts:
+        db.session.execute(insert(AttemptAnswers), attempts)
+    record_attempts(score_rows)
+    db.session.commit()
+
+    for listener in score_listeners:
+        try:
+            listener(inserted)
+        except Exception as e:
+            logging.error(f"Score listener {listener.__name__} failed: {e}")
+    return inserted
+
+
+def _encode_row(row):
+    record = dict(row)
+    record["time_stamp_of_attempt"] = row["time_stamp_of_attempt"].isoformat()
+    if row.get("answers") is not None:
+        record["answers"] = base64.b64encode(row["answers"]).decode("ascii")
+    return record
+
+
+def _decode_row(record):
+    row = dict(record)
+    row["time_stamp_of_attempt"] = datetime.fromisoformat(record["time_stamp_of_attempt"])
+    if record.get("answers") is not None:
+        row["answers"] = base64.b64decode(record["answers"])
+    return row
+
+
+class ScoreWriter:
+    """Opt-in write-behind queue for Score rows.
+
+    ``submit`` appends the row to a per-process spool file (one JSON object per
+    line) and hands it to a background thread, which commits rows in bulk once
+    ``batch_size`` rows are pending or ``flush_interval`` seconds have passed.
+    The spool is truncated after each batch that empties the queue and is
+    replayed on the next startup if the process dies with rows still pending.
+    The spool and thread are created on the first ``submit`` in each process, so
+    workers forked from a preloaded app each run their own flusher.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.app = None
+        self.batch_size = 200
+        self.flush_interval = 0.5
+        self.fsync = True
+        self._queue = queue.Queue()
+        self._spool = None
+        self._spool_path = None
+        self._spool_dir = None
+        self._spool_lock = threading.Lock()
+        self._pending = 0  # rows written to the spool but not yet committed
+        self._thread = None
+        self._pid = None  # process that owns the spool and thread
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.flushed_rows = 0
+        self.flushed_batches = 0
+        self.failed_batches = 0
+
+    def init_app(self, app):
+        """Enable the write-behind queue if SCORE_WRITE_BEHIND is set, replaying orphaned spools."""
+        if not app.config.get("SCORE_WRITE_BEHIND"):
+            return
+        self.app = app
+        self.batch_size = app.config.get("SCORE_BATCH_SIZE", self.batch_size)
+        self.flush_interval = app.config.get("SCORE_FLUSH_INTERVAL", self.flush_interval)
+        self.fsync = app.config.get("SCORE_SPOOL_FSYNC", self.fsync)
+
+        self._spool_dir = app.config.get("SCORE_SPOOL_DIR") or os.path.join(app.instance_path, "score_spool")
+        os.makedirs(self._spool_dir, exist_ok=True)
+        self._replay(self._spool_dir)
+
+        atexit.register(self.shutdown)
+        self.enabled = True
+
+    def _ensure_started(self):
+        # Threads do not survive a fork, so every process opens its own spool and flusher
+        if self._pid != os.getpid():
+            with self._start_lock:
+                if self._pid != os.getpid():
+                    self._start()
+
+    def _start(self):
+        self._queue = queue.Queue()  # rows queued by a parent process belong to its spool, not ours
+        self._spool_lock = threading.Lock()
+        self._pending = 0
+        self._stopping = threading.Event()
+        self._spool_path = os.path.join(self._spool_dir, f"scores-{os.getpid()}.spool")
+        self._spool = open(self._spool_path, "a+", encoding="utf-8")
+        if fcntl is not None:
+            fcntl.flock(self._spool.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        self._thread = threading.Thread(target=self._run, name="score-writer", daemon=True)
+        self._thread.start()
+        self._pid = os.getpid()
+
+    def submit(self, row):
+        """Durably record a Score row and queue it for the next bulk commit."""
+        self._ensure_started()
+        line = json.dumps(_encode_row(row), separators=(",", ":")) + "\n"
+        with self._spool_lock:
+            self._spool.write(line)
+            self._spool.flush()
+            if self.fsync:
+                os.fsync(self._spool.fileno())
+            self._pending += 1
+        self._queue.put(row)
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "queued": self._queue.qsize(),
+            "pending": self._pending,
+            "flushed_rows": self.flushed_rows,
+            "flushed_batches": self.flushed_batches,
+            "failed_batches": self.failed_batches
+        }
+
+    def shutdown(self):
+        """Stop the worker and commit everything still queued."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        if self._pid != os.getpid():
+            return  # nothing was submitted in this process
+        self._stopping.set()
+        self._thread.join(timeout=30)
+        batch = self._drain()
+        if batch:
+            self._flush(batch)
+        self._spool.close()
+        if self._pending == 0:
+            os.remove(self._spool_path)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            while not self._flush(batch):
+                if self._stopping.wait(min(5.0, self.flush_interval * 4)):
+                    # Leave the batch to shutdown(); the spool still holds it
+                    for row in batch:
+                        self._queue.put(row)
+                    return
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _flush(self, batch):
+        try:
+            with self.app.app_context():
+                persist_scores(batch)
+        except Exception as e:
+            self.failed_batches += 1
+            logging.error(f"Score writer failed to commit {len(batch)} rows: {e}")
+            with self.app.app_context():
+                db.session.rollback()
+            return False
+
+        self.flushed_rows += len(batch)
+        self.flushed_batches += 1
+        with self._spool_lock:
+            self._pending -= len(batch)
+            if self._pending == 0:
+                # Every spooled row is committed, so the spool can start over
+                self._spool.seek(0)
+                self._spool.truncate()
+                self._spool.flush()
+        return True
+
+    def _replay(self, spool_dir):
+        """Commit rows left behind by processes that exited without flushing."""
+        for path in sorted(glob.glob(os.path.join(spool_dir, "*.spool"))):
+            with open(path, "r+", encoding="utf-8") as spool:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(spool.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except OSError:
+                        continue  # owned by a live worker
+                rows = []
+                for line in spool:
+                    try:
+                        rows.append(_decode_row(json.loads(line)))
+                    except ValueError:
+                        logging.warning(f"Skipping torn line in score spool {path}")
+                if rows:
+                    with self.app.app_context():
+                        rows = self._without_committed(rows)
+                        if rows:
+                            persist_scores(rows)
+                    logging.info(f"Replayed {len(rows)} spooled scores from {path}")
+                # Remove while still holding the lock so no other worker replays it twice
+                os.remove(path)
+
+    @staticmethod
+    def _without_committed(rows):
+        # A crash between commit and truncation leaves committed rows in the spool;
+        # (user, quiz, attempt timestamp) identifies an attempt, so skip those already stored.
+        stamps = [row["time_stamp_of_attempt"] for row in rows]
+        existing = set(
+            db.session.query(Score.user_id, Score.quiz_id, Score.time_stamp_of_attempt)
+            .filter(Score.time_stamp_of_attempt.between(min(stamps), max(stamps)))
+            .all()
+        )
+        return [
+            row for row in rows
+            if (row["user_id"], row["quiz_id"], row["time_stamp_of_attempt"]) not in existing
+        ]
+
+
+score_writer = ScoreWriter()
@@ -0,0 +1,529 @@
+from applications.database import db, use_primary
+from applications.model import Subject, Chapter, Quiz, Question
+from applications.response_cache import SharedVersion
+from applications.startup import lazy_import
+from bisect import bisect_left, insort
+from collections import Counter
+import heapq
+import logging
+import re
+import threading
+import time
+
+np = lazy_import("numpy")  # imported on first use, not at worker start-up
+
+KINDS = ("subject", "chapter", "quiz", "question")
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+# Too common to narrow a search down; dropped from the index and from queries
+STOPWORDS = frozenset((
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of", "on", "or",
+    "the", "to", "was", "what", "which", "who", "with"
+))
+BM25_K1 = 1.2
+BM25_B = 0.75
+PREFIX_WEIGHT = 0.8  # a prefix expansion counts a little less than the exact term
+MAX_PREFIX_TERMS = 64  # most frequent expansions of the last query token that are considered
+
+# MinHash signatures of questions, split into MINHASH_BANDS bands of MINHASH_ROWS rows for LSH
+MINHASH_BANDS = 16
+MINHASH_ROWS = 4
+SHINGLE_SIZE = 3  # words per shingle
+MAX_PAIRWISE_BUCKET = 50  # larger LSH buckets are compared against their first member only
+QUESTION_CHUNK = 5000
+
+
+def tokenize(text):
+    return [token for token in _TOKEN.findall((text or "").lower()) if token not in STOPWORDS]
+
+
+def question_features(text, options):
+    """Index terms and MinHash shingles of a question.
+
+    Shingles are the word trigrams of the text plus one per option, so
+    reordered options still count as the same question.
+    """
+    words = _TOKEN.findall((text or "").lower())
+    options = [(option or "").lower() for option in options]
+    terms = Counter([word for word in words + _TOKEN.findall(" ".join(options)) if word not in STOPWORDS])
+    if len(words) >= SHINGLE_SIZE:
+        grams = set(zip(*(words[offset:] for offset in range(SHINGLE_SIZE))))
+    else:
+        grams = {tuple(words)}
+    grams.update(("option", " ".join(option.split())) for option in options)
+    return terms, grams
+
+
+class MinHasher:
+    """MinHash signatures and LSH band keys with multiply-shift hashing, vectorised over many documents."""
+
+    def __init__(self, seed=1):
+        rng = np.random.default_rng(seed)
+        permutations = MINHASH_BANDS * MINHASH_ROWS
+        self.a = rng.integers(1, 2 ** 63, permutations, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, permutations, dtype=np.uint64)
+        self.band_mix = rng.integers(1, 2 ** 63, MINHASH_ROWS, dtype=np.uint64) | np.uint64(1)
+
+    def signatures(self, shingle_sets):
+        """(documents x permutations) uint32 minimums, and the (documents x bands) uint64 band keys."""
+        counts = [len(shingle_set) for shingle_set in shingle_sets]
+        hashes = np.fromiter(
+            (hash(shingle) & 0xFFFFFFFF for shingle_set in shingle_sets for shingle in shingle_set),
+            dtype=np.uint64, count=sum(counts)
+        )
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+        with np.errstate(over="ignore"):
+            permuted = ((hashes[:, None] * self.a + self.b) >> np.uint64(32)).astype(np.uint32)
+            signatures = np.minimum.reduceat(permuted, starts, axis=0)
+            bands = (signatures.reshape(len(counts), MINHASH_BANDS, MINHASH_ROWS).astype(np.uint64)
+                     * self.band_mix).sum(axis=2)
+        return signatures, bands
+
+
+class _Index:
+    """One generation of the index.
+
+    Documents occupy slots; postings map a term to ``{slot: frequency}`` and
+    are turned into numpy arrays the first time a query needs them, so
+    scoring is vectorised. Question signatures live in growable matrices
+    with one row per signed question.
+    """
+
+    def __init__(self):
+        self.slots = {}  # (kind, id) -> slot
+        self.keys = []  # slot -> (kind, id), None once removed
+        self.titles = []
+        self.parents = []  # subject of a chapter, chapter of a quiz, quiz of a question
+        self.doc_terms = []  # slot -> Counter of terms (None once removed)
+        self.lengths = []
+        self.kind_codes = bytearray()
+        self.postings = {}  # term -> {slot: frequency}
+        self.vocabulary = []  # sorted terms, for prefix expansion
+        self.total_length = 0
+        self._arrays = {}  # term -> (slots, frequencies) arrays, dropped when the postings change
+        self._length_array = None
+
+        self.signature_rows = {}  # question id -> row
+        self.signature_ids = []  # row -> question id, -1 once removed
+        self.signatures = None  # rows x permutations (uint32), grown by doubling
+        self.bands = None  # rows x bands (uint64)
+
+    def __len__(self):
+        return len(self.slots)
+
+    def add(self, kind, id, title, parent_id, terms):
+        key = (kind, id)
+        if key in self.slots:
+            self.remove(kind, id)
+        slot = len(self.keys)
+        self.slots[key] = slot
+        self.keys.append(key)
+        self.titles.append(title)
+        self.parents.append(parent_id)
+        self.doc_terms.append(terms)
+        length = sum(terms.values())
+        self.lengths.append(length)
+        self.kind_codes.append(KINDS.index(kind))
+        self.total_length += length
+        self._length_array = None
+        for term, frequency in terms.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = {}
+                insort(self.vocabulary, term)
+            else:
+                self._arrays.pop(term, None)
+            postings[slot] = frequency
+
+    def remove(self, kind, id):
+        slot = self.slots.pop((kind, id), None)
+        if slot is None:
+            return
+        self.keys[slot] = None
+        self.total_length -= self.lengths[slot]
+        self.lengths[slot] = 0
+        self._length_array = None
+        for term in self.doc_terms[slot]:
+            self._arrays.pop(term, None)
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(slot, None)
+                if not postings:
+                    del self.postings[term]
+                    position = bisect_left(self.vocabulary, term)
+                    if position < len(self.vocabulary) and self.vocabulary[position] == term:
+                        del self.vocabulary[position]
+        self.doc_terms[slot] = None
+        if kind == "question":
+            row = self.signature_rows.pop(id, None)
+            if row is not None:
+                self.signature_ids[row] = -1
+
+    def sign(self, question_ids, signatures, bands):
+        """Store the signatures of a batch of (already indexed) questions."""
+        start = len(self.signature_ids)
+        end = start + len(question_ids)
+        if self.signatures is None:
+            self.signatures = np.empty((max(end, 1024), signatures.shape[1]), dtype=np.uint32)
+            self.bands = np.empty((max(end, 1024), bands.shape[1]), dtype=np.uint64)
+        elif end > len(self.signatures):
+            capacity = max(end, 2 * len(self.signatures))
+            self.signatures = np.resize(self.signatures, (capacity, self.signatures.shape[1]))
+            self.bands = np.resize(self.bands, (capacity, self.bands.shape[1]))
+        self.signatures[start:end] = signatures
+        self.bands[start:end] = bands
+        for row, question_id in enumerate(question_ids, start):
+            previous = self.signature_rows.get(question_id)
+            if previous is not None:
+                self.signature_ids[previous] = -1
+            self.signature_rows[question_id] = row
+            self.signature_ids.append(question_id)
+
+    def arrays(self, term):
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            postings = self.postings[term]
+            arrays = self._arrays[term] = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+            )
+        return arrays
+
+    def length_array(self):
+        if self._length_array is None:
+            self._length_array = np.array(self.lengths, dtype=np.float32)
+        return self._length_array
+
+    def expand(self, prefix):
+        """Vocabulary terms starting with ``prefix`` (only the most frequent when there are many)."""
+        start = bisect_left(self.vocabulary, prefix)
+        end = bisect_left(self.vocabulary, prefix + "\U0010ffff")
+        terms = self.vocabulary[start:end]
+        if len(terms) > MAX_PREFIX_TERMS:
+            terms = heapq.nlargest(MAX_PREFIX_TERMS, terms, key=lambda term: len(self.postings[term]))
+        return terms
+
+    def question_entry(self, question_id, similarity=None):
+        slot = self.slots.get(("question", question_id))
+        entry = {
+            "id": question_id,
+            "quiz_id": self.parents[slot] if slot is not None else None,
+            "text": self.titles[slot] if slot is not None else None
+        }
+        if similarity is not None:
+            entry["similarity"] = round(similarity, 4)
+        return entry
+
+
+class SearchIndex:
+    """In-process inverted index over subjects, chapters, quizzes and questions.
+
+    Built on the first search and then kept current by the admin handlers,
+    which call ``refresh`` with the rows they changed. Queries are ranked with
+    BM25 and every token must match; the last one also matches as a prefix
+    (search as you type). Questions additionally get MinHash signatures,
+    bucketed by LSH bands, so near-duplicates are found without comparing
+    every pair.
+
+    Edits made through another worker on the host are announced through a
+    SharedVersion file; the index is then rebuilt in a background thread while
+    the current generation keeps answering.
+    """
+
+    def __init__(self):
+        self._index = None
+        self._hasher = None
+        self._shared = SharedVersion("search_index")
+        self._lock = threading.RLock()
+        self._app = None
+        self._rebuilding = False
+        self._pending = []  # refreshes applied while a rebuild is running, replayed onto its result
+        self.builds = 0
+        self.build_seconds = 0.0
+        self.queries = 0
+
+    def init_app(self, app):
+        self._app = app
+        self._shared.init_app(app)
+
+    @property
+    def hasher(self):
+        if self._hasher is None:
+            self._hasher = MinHasher()
+        return self._hasher
+
+    # Building
+    def _build(self):
+        started = time.perf_counter()
+        index = _Index()
+        with use_primary():
+            for kind in ("subject", "chapter", "quiz"):
+                for row in db.session.query(*self._named_columns(kind)):
+                    self._add_named(index, kind, row)
+            self._add_questions(index, db.session.query(*self._question_columns()).yield_per(QUESTION_CHUNK))
+        self.builds += 1
+        self.build_seconds = time.perf_counter() - started
+        logging.info(f"Search index built: {len(index)} documents in {self.build_seconds * 1000:.0f} ms")
+        return index
+
+    @staticmethod
+    def _named_columns(kind):
+        if kind == "subject":
+            return Subject.id, Subject.name, Subject.description, None
+        if kind == "chapter":
+            return Chapter.id, Chapter.name, Chapter.description, Chapter.subject_id
+        return Quiz.id, Quiz.name, Quiz.description, Quiz.chapter_id
+
+    @staticmethod
+    def _add_named(index, kind, row):
+        identifier, name, description, parent_id = row
+        terms = Counter(tokenize(name))
+        terms.update(tokenize(description))
+        index.add(kind, identifier, name, parent_id, terms)
+
+    @staticmethod
+    def _question_columns():
+        return (Question.id, Question.quiz_id, Question.question_text,
+                Question.option1, Question.option2, Question.option3, Question.option4)
+
+    def _add_questions(self, index, rows):
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= QUESTION_CHUNK:
+                self._add_question_chunk(index, chunk)
+                chunk = []
+        if chunk:
+            self._add_question_chunk(index, chunk)
+
+    def _add_question_chunk(self, index, rows):
+        shingle_sets = []
+        for question_id, quiz_id, text, *options in rows:
+            terms, grams = question_features(text, options)
+            index.add("question", question_id, text, quiz_id, terms)
+            shingle_sets.append(grams)
+        signatures, bands = self.hasher.signatures(shingle_sets)
+        index.sign([row[0] for row in rows], signatures, bands)
+
+    def _current(self):
+        """The index to query: built on first use, rebuilt in the background after edits elsewhere."""
+        if self._shared.changed():
+            self._rebuild_in_background()
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._build()
+        return self._index
+
+    def _rebuild_in_background(self):
+        with self._lock:
+            if self._rebuilding or self._app is None or self._index is None:
+                return
+            self._rebuilding = True
+            self._pending = []
+        threading.Thread(target=self._rebuild, name="search-index", daemon=True).start()
+
+    def _rebuild(self):
+        try:
+            with self._app.app_context():
+                index = self._build()
+                with self._lock:
+                    for kind, ids in self._pending:
+                        self._apply(index, kind, ids)
+                    self._index = index
+        except Exception as e:
+            logging.error(f"Search index rebuild failed: {e}")
+        finally:
+            with self._lock:
+                self._rebuilding = False
+                self._pending = []
+
+    # Incremental updates from the admin handlers
+    def refresh(self, kind, ids):
+        """Re-read the given rows after a commit: re-index the ones that exist, drop the rest.
+
+        ``kind`` is "subject", "chapter", "quiz", "question" or "quiz_questions"
+        (every question of the given quizzes, e.g. after a bulk import or a quiz delete).
+        """
+        ids = [int(id) for id in ids if id is not None]
+        if not ids:
+            return
+        with self._lock:
+            self._shared.bump(self.builds)
+            if self._rebuilding:
+                self._pending.append((kind, ids))
+            if self._index is not None:
+                try:
+                    self._apply(self._index, kind, ids)
+                except Exception as e:
+                    # The edit is committed either way; a full rebuild picks it up
+                    logging.error(f"Search index refresh of {kind} {ids} failed: {e}")
+                    self._rebuild_in_background()
+
+    def invalidate(self):
+        """Rebuild everything (cascading deletes of subjects and chapters)."""
+        with self._lock:
+            self._shared.bump(self.builds)
+            self._rebuild_in_background()
+
+    def _apply(self, index, kind, ids):
+        with use_primary():
+            if kind == "quiz_questions":
+                quiz_ids = set(ids)
+                stale = [key[1] for key, slot in index.slots.items()
+                         if key[0] == "question" and index.parents[slot] in quiz_ids]
+                for question_id in stale:
+                    index.remove("question", question_id)
+                self._add_questions(index, db.session.query(*self._question_columns()).filter(Question.quiz_id.in_(ids)))
+                return
+            if kind == "question":
+                rows = db.session.query(*self._question_columns()).filter(Question.id.in_(ids)).all()
+                self._add_questions(index, rows)
+            else:
+                columns = self._named_columns(kind)
+                rows = db.session.query(*columns).filter(columns[0].in_(ids)).all()
+                for row in rows:
+                    self._add_named(index, kind, row)
+            for missing in set(ids) - {row[0] for row in rows}:
+                index.remove(kind, missing)
+
+    # Queries
+    def search(self, query, kinds=KINDS, limit=20):
+        """Ranked matches for ``query``: every token must match, the last one also as a prefix."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        index = self._current()
+        self.queries += 1
+        with self._lock:
+            # (weight, term) alternatives per token; the last token adds its prefix expansions
+            alternatives = []
+            for position, token in enumerate(tokens):
+                options = [(1.0, token)] if token in index.postings else []
+                if position == len(tokens) - 1:
+                    options.extend((PREFIX_WEIGHT, term) for term in index.expand(token) if term != token)
+                if not options:
+                    return []
+                alternatives.append(options)
+
+            slots = len(index.keys)
+            documents = len(index) or 1
+            lengths = index.length_array()
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / (index.total_length / documents or 1.0))
+            scores = np.zeros(slots, dtype=np.float32)
+            matched = np.zeros(slots, dtype=np.int16)
+            for options in alternatives:
+                # A token with prefix expansions scores its best-matching term per document
+                best = np.zeros(slots, dtype=np.float32)
+                for weight, term in options:
+                    term_slots, frequencies = index.arrays(term)
+                    idf = np.log1p((documents - len(term_slots) + 0.5) / (len(term_slots) + 0.5))
+                    term_scores = weight * idf * frequencies * (BM25_K1 + 1) / (frequencies + norm[term_slots])
+                    best[term_slots] = np.maximum(best[term_slots], term_scores)
+                scores += best
+                matched += best > 0
+
+            mask = matched == len(alternatives)
+            if set(kinds) != set(KINDS):
+                codes = np.frombuffer(bytes(index.kind_codes), dtype=np.uint8)
+                mask &= np.isin(codes, [KINDS.index(kind) for kind in kinds])
+            candidates = np.flatnonzero(mask)
+            if len(candidates) > limit:
+                candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+            ranked = sorted(candidates.tolist(), key=lambda slot: (-scores[slot], slot))
+            return [
+                {
+                    "kind": index.keys[slot][0],
+                    "id": index.keys[slot][1],
+                    "title": index.titles[slot],
+                    "parent_id": index.parents[slot],
+                    "score": round(float(scores[slot]), 4)
+                }
+                for slot in ranked
+            ]
+
+    def similar_questions(self, question_id, threshold=0.8, limit=20):
+        """Questions whose estimated Jaccard similarity to ``question_id`` reaches ``threshold``.
+
+        Returns None when the question is not indexed.
+        """
+        index = self._current()
+        with self._lock:
+            row = index.signature_rows.get(question_id)
+            if row is None:
+                return None
+            rows = len(index.signature_ids)
+            alive = np.array(index.signature_ids) >= 0
+            candidates = np.flatnonzero((index.bands[:rows] == index.bands[row]).any(axis=1) & alive)
+            candidates = candidates[candidates != row]
+            similarity = (index.signatures[candidates] == index.signatures[row]).mean(axis=1)
+            keep = similarity >= threshold
+            matches = heapq.nlargest(limit, zip(similarity[keep].tolist(), candidates[keep].tolist()))
+            return [index.question_entry(index.signature_ids[other], value) for value, other in matches]
+
+    def duplicate_groups(self, threshold=0.8, limit=100):
+        """Groups of near-duplicate questions across the whole bank, largest groups first.
+
+        Candidate pairs are questions sharing an LSH bucket; each pair is
+        confirmed against the full signatures before it joins a group.
+        """
+        index = self._current()
+        with self._lock:
+            alive = np.flatnonzero(np.array(index.signature_ids) >= 0)
+            lefts, rights = [], []
+            for band in range(MINHASH_BANDS if len(alive) > 1 else 0):
+                keys = index.bands[alive, band]
+                order = np.argsort(keys, kind="stable")
+                rows, keys = alive[order], keys[order]
+                # Buckets are runs of equal keys; pair every member with the first one of its run
+                bucket = np.cumsum(np.concatenate(([True], keys[1:] != keys[:-1]))) - 1
+                starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+                sizes = np.diff(np.append(starts, len(keys)))
+                members = sizes[bucket] > 1
+                followers = members & (np.arange(len(keys)) != starts[bucket])
+                lefts.append(rows[starts[bucket[followers]]])
+                rights.append(rows[followers])
+                # Small buckets of three or more also compare the other members with each other
+                for start, size in zip(starts[(sizes > 2) & (sizes <= MAX_PAIRWISE_BUCKET)].tolist(),
+                                       sizes[(sizes > 2) & (sizes <= MAX_PAIRWISE_BUCKET)].tolist()):
+                    others = rows[start + 1:start + size].tolist()
+                    for position, first in enumerate(others):
+                        lefts.append(np.array([first] * (len(others) - position - 1), dtype=rows.dtype))
+                        rights.append(np.array(others[position + 1:], dtype=rows.dtype))
+            if not lefts or not sum(len(side) for side in lefts):
+                return []
+
+            pairs = np.unique(np.stack([np.concatenate(lefts), np.concatenate(rights)], axis=1), axis=0)
+            left, right = pairs[:, 0], pairs[:, 1]
+            similar = (index.signatures[left] == index.signatures[right]).mean(axis=1) >= threshold
+            parent = {}
+
+            def find(row):
+                root = parent.setdefault(row, row)
+                while root != parent[root]:
+                    parent[root] = parent[parent[root]]
+                    root = parent[root]
+                return root
+
+            for first, second in zip(left[similar].tolist(), right[similar].tolist()):
+                parent[find(second)] = find(first)
+
+            groups = {}
+            for row in parent:
+                groups.setdefault(find(row), []).append(index.signature_ids[row])
+            ordered = sorted((sorted(group) for group in groups.values() if len(group) > 1),
+                             key=lambda group: (-len(group), group[0]))
+            return [[index.question_entry(question_id) for question_id in group] for group in ordered[:limit]]
+
+    def stats(self):
+        index = self._index
+        return {
+            "documents": len(index) if index else 0,
+            "terms": len(index.postings) if index else 0,
+            "builds": self.builds,
+            "build_seconds": round(self.build_seconds, 4),
+            "queries": self.queries,
+            "rebuilding": self._rebuilding
+        }
+
+
+search_index = SearchIndex()
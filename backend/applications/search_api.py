@@ -0,0 +1,75 @@
+from flask_restful import Resource
+from flask import request
+from applications.search import search_index, KINDS
+from applications.quizmanagement_api import auth_token_required
+from applications.permissions import permissions_required, has_permission
+import logging
+
+MAX_SEARCH_RESULTS = 50
+MAX_DUPLICATE_GROUPS = 500
+
+
+def _threshold():
+    threshold = request.args.get("threshold", 0.8, type=float)
+    if not 0 < threshold <= 1:
+        raise ValueError("threshold must be between 0 and 1.")
+    return threshold
+
+
+# Ranked search over subjects, chapters, quizzes and (for admins) questions
+class Search(Resource):
+    @auth_token_required
+    def get(self):
+        """Search by ``q``; the last word matches as a prefix. ``kind`` narrows to subject/chapter/quiz/question."""
+        try:
+            query = (request.args.get("q") or "").strip()
+            if not query:
+                return {"message": "q is required."}, 400
+            kinds = [kind.strip() for kind in request.args.get("kind", ",".join(KINDS)).split(",") if kind.strip()]
+            unknown = [kind for kind in kinds if kind not in KINDS]
+            if unknown:
+                return {"message": f"kind must be among: {', '.join(KINDS)}."}, 400
+            if not has_permission(request.user, "questions:read"):
+                kinds = [kind for kind in kinds if kind != "question"]  # question text stays an admin tool
+            limit = min(request.args.get("limit", 20, type=int) or 20, MAX_SEARCH_RESULTS)
+            return {"query": query, "results": search_index.search(query, kinds, limit)}, 200
+        except Exception as e:
+            logging.error(f"Error searching: {e}")
+            return {"error": str(e)}, 500
+
+
+# Near-duplicates of one question
+class SimilarQuestions(Resource):
+    @auth_token_required
+    @permissions_required('questions:read')
+    def get(self, question_id):
+        """Questions whose text and options overlap this one's by at least ``threshold`` (estimated Jaccard)."""
+        try:
+            threshold = _threshold()
+            similar = search_index.similar_questions(question_id, threshold)
+            if similar is None:
+                return {"message": "Question not found."}, 404
+            return {"question_id": question_id, "threshold": threshold, "similar": similar}, 200
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        except Exception as e:
+            logging.error(f"Error finding similar questions: {e}")
+            return {"error": str(e)}, 500
+
+
+# Near-duplicate groups across the question bank
+class DuplicateQuestions(Resource):
+    @auth_token_required
+    @permissions_required('questions:read')
+    def get(self):
+        """Groups of near-duplicate questions, largest first."""
+        try:
+            threshold = _threshold()
+            limit = min(request.args.get("limit", 100, type=int) or 100, MAX_DUPLICATE_GROUPS)
+            groups = search_index.duplicate_groups(threshold, limit)
+            return {"threshold": threshold, "groups": groups}, 200
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        except Exception as e:
+            logging.error(f"Error finding duplicate questions: {e}")
+            return {"error": str(e)}, 500
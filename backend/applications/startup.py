@@ -0,0 +1,62 @@
+from contextlib import contextmanager
+import importlib.util
+import logging
+import os
+import sys
+import time
+
+
+def lazy_import(name):
+    """Return module ``name``, deferring its real import until an attribute is first used.
+
+    Keeps heavy optional dependencies (numpy) off the worker start-up path; the
+    first request that needs them pays the import instead.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named {name!r}")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class StartupProfile:
+    """Wall time of each start-up phase of this worker, logged once and exported on /metrics."""
+
+    def __init__(self):
+        self.phases = {}  # phase -> seconds, in execution order
+        self.modules_at_ready = None
+
+    def record(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def ready(self):
+        self.modules_at_ready = len(sys.modules)
+        phases = ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in self.phases.items())
+        logging.info(f"Worker {os.getpid()} ready in {self.total() * 1000:.1f} ms ({phases}; {self.modules_at_ready} modules loaded)")
+
+    def total(self):
+        return sum(self.phases.values())
+
+    def stats(self):
+        return {
+            "total_seconds": round(self.total(), 4),
+            "modules_loaded": self.modules_at_ready or len(sys.modules),
+            **{f"{name}_seconds": round(seconds, 4) for name, seconds in self.phases.items()}
+        }
+
+
+startup_profile = StartupProfile()
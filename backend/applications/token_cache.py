@@ -0,0 +1,100 @@
+from collections import OrderedDict
+import hashlib
+import threading
+import time
+import jwt
+
+
+class TokenCache:
+    """Process-local LRU cache of verified JWT payloads.
+
+    Entries are keyed by the SHA-256 digest of the raw token so the token itself
+    is never kept in memory. Valid payloads live until their ``exp`` claim (capped
+    at ``max_ttl``); invalid or expired tokens are remembered for ``negative_ttl``
+    seconds so a misbehaving client cannot force a decode on every request.
+    """
+
+    def __init__(self, secret_key, algorithms=("HS256",), max_size=10000, max_ttl=3600, negative_ttl=30):
+        self.secret_key = secret_key
+        self.algorithms = list(algorithms)
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self._entries = OrderedDict()  # digest -> (expires_at, payload, error)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _digest(token):
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def decode(self, token):
+        """Return ``(payload, None)`` for a valid token or ``(None, error)`` otherwise."""
+        key = self._digest(token)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, payload, error = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    if error is None:
+                        self.hits += 1
+                    else:
+                        self.negative_hits += 1
+                    return payload, error
+                del self._entries[key]
+            self.misses += 1
+
+        try:
+            payload = jwt.decode(token, self.secret_key, algorithms=self.algorithms)
+            error = None
+            exp = payload.get("exp")
+            expires_at = min(exp, now + self.max_ttl) if exp else now + self.max_ttl
+        except jwt.ExpiredSignatureError:
+            payload, error = None, "Token has expired."
+            expires_at = now + self.negative_ttl
+        except jwt.InvalidTokenError:
+            payload, error = None, "Invalid token."
+            expires_at = now + self.negative_ttl
+
+        with self._lock:
+            self._entries[key] = (expires_at, payload, error)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return payload, error
+
+    def invalidate(self, token=None):
+        """Drop one token (e.g. on logout) or the whole cache."""
+        with self._lock:
+            if token is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self._digest(token), None)
+
+    def stats(self):
+        """Return hit/miss counters for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0
+            }
+
+
+def strip_bearer(header_value):
+    """Remove an optional ``Bearer`` prefix from an Authorization header value."""
+    if header_value and header_value.startswith("Bearer "):
+        return header_value[len("Bearer "):]
+    return header_value
@@ -0,0 +1 @@
+"""Load-test and benchmark harness for the quiz API (run with ``python -m benchmarks.run``)."""
@@ -0,0 +1,340 @@
+"""Drive concurrent request mixes against create_app() and report per-endpoint latency.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.run --scale small --mix student --concurrency 16
+    python -m benchmarks.run --scale small --mix student --baseline results/previous.json
+
+Each run seeds a temporary SQLite database (or reuses ``--database``), drives the
+selected mix through the Flask test client from ``--concurrency`` threads and
+writes p50/p95/p99 latency, throughput and queries per request for every step
+to a JSON file that later runs can be compared against.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+log = logging.getLogger("benchmarks")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Request mixes: the ordered steps one virtual user repeats every iteration
+MIXES = {
+    "student": ("login", "catalog", "quiz_details", "submit_quiz", "scores"),
+    "login_storm": ("login",),
+    "submission_spike": ("quiz_details", "submit_quiz"),
+    "browse": ("catalog", "quiz_details", "leaderboard", "scores"),
+}
+
+
+class QueryCounter:
+    """Counts the SQL statements issued by the current thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def attach(self, engine):
+        from sqlalchemy import event
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self._local.count = getattr(self._local, "count", 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, "count", 0)
+
+
+class Recorder:
+    """Thread-safe collection of (step, latency, status, queries) samples."""
+
+    def __init__(self):
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, step, latency, status, queries):
+        with self._lock:
+            self.samples.setdefault(step, []).append((latency, status, queries))
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class VirtualUser:
+    """One simulated student walking through a mix with its own test client and RNG."""
+
+    def __init__(self, app, dataset, counter, recorder, account, rng, password):
+        self.client = app.test_client()
+        self.dataset = dataset
+        self.counter = counter
+        self.recorder = recorder
+        self.user_id, self.email = account
+        self.rng = rng
+        self.password = password
+        self.headers = None
+        self.quiz_id = None
+
+    def _call(self, step, method, url, record, **kwargs):
+        self.counter.reset()
+        started = time.perf_counter()
+        response = self.client.open(url, method=method, **kwargs)
+        response.get_data()  # streamed bodies do their queries while being read
+        latency = time.perf_counter() - started
+        if record:
+            self.recorder.add(step, latency, response.status_code, self.counter.count)
+        return response
+
+    def login(self, record):
+        response = self._call("login", "POST", "/api/v1/login", record, json={
+            "email": self.email, "password": self.password
+        })
+        if response.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {response.get_json()['auth_token']}"}
+
+    def catalog(self, record):
+        self._call("catalog", "GET", "/api/v1/catalog", record, headers=self.headers)
+
+    def quiz_details(self, record):
+        self.quiz_id = self.rng.choice(self.dataset.quiz_ids)
+        self._call("quiz_details", "GET", f"/api/v1/quizzes/{self.quiz_id}/details", record, headers={
+            **self.headers, "Accept-Encoding": "gzip"
+        })
+
+    def submit_quiz(self, record):
+        quiz_id = self.quiz_id or self.rng.choice(self.dataset.quiz_ids)
+        answers = {}
+        for question_id, correct_option in self.dataset.quiz_questions[quiz_id]:
+            # Roughly 70% correct, the rest a random (possibly correct) option
+            answers[str(question_id)] = correct_option if self.rng.random() < 0.7 else str(self.rng.randint(1, 4))
+        # Timed quizzes are only accepted through a server-timed attempt
+        attempt = self._call("start_attempt", "POST", f"/api/v1/quizzes/{quiz_id}/attempts", False, headers=self.headers)
+        self._call("submit_quiz", "POST", f"/api/v1/quizzes/{quiz_id}/submit", record, headers=self.headers, json={
+            "answers": answers, "attempt_id": attempt.get_json().get("attempt_id")
+        })
+
+    def scores(self, record):
+        self._call("scores", "GET", f"/api/v1/scores?user_id={self.user_id}&limit=20&direction=desc", record, headers=self.headers)
+
+    def leaderboard(self, record):
+        quiz_id = self.quiz_id or self.rng.choice(self.dataset.quiz_ids)
+        self._call("leaderboard", "GET", f"/api/v1/quizzes/{quiz_id}/leaderboard?limit=10", record, headers=self.headers)
+
+    def run(self, steps, iterations, warmup):
+        if "login" not in steps:
+            self.login(record=False)
+        for iteration in range(warmup + iterations):
+            for step in steps:
+                getattr(self, step)(record=iteration >= warmup)
+
+
+def summarize(recorder, elapsed):
+    endpoints = {}
+    for step, samples in sorted(recorder.samples.items()):
+        latencies = sorted(sample[0] for sample in samples)
+        queries = [sample[2] for sample in samples]
+        statuses = {}
+        for _, status, _ in samples:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        endpoints[step] = {
+            "requests": len(samples),
+            "errors": sum(1 for _, status, _ in samples if status >= 500),
+            "statuses": statuses,
+            "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else None,
+            "latency_ms": {
+                "mean": round(sum(latencies) / len(latencies) * 1000, 3),
+                "p50": round(percentile(latencies, 0.50) * 1000, 3),
+                "p95": round(percentile(latencies, 0.95) * 1000, 3),
+                "p99": round(percentile(latencies, 0.99) * 1000, 3),
+                "max": round(latencies[-1] * 1000, 3),
+            },
+            "queries_per_request": {"mean": round(sum(queries) / len(queries), 2), "max": max(queries)},
+        }
+    total = sum(endpoint["requests"] for endpoint in endpoints.values())
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else None,
+        "endpoints": endpoints,
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Return the steps whose p95 latency regressed by more than ``tolerance`` against ``baseline``."""
+    regressions = []
+    for step, endpoint in result["summary"]["endpoints"].items():
+        previous = baseline.get("summary", {}).get("endpoints", {}).get(step)
+        if not previous:
+            continue
+        before, after = previous["latency_ms"]["p95"], endpoint["latency_ms"]["p95"]
+        change = (after - before) / before if before else 0.0
+        print(f"  {step:<14} p95 {before:>9.2f} ms -> {after:>9.2f} ms ({change:+.1%})"
+              f"  queries {previous['queries_per_request']['mean']} -> {endpoint['queries_per_request']['mean']}")
+        if change > tolerance:
+            regressions.append(step)
+    return regressions
+
+
+def print_summary(summary):
+    print(f"{'step':<14}{'requests':>9}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}")
+    for step, endpoint in summary["endpoints"].items():
+        latency = endpoint["latency_ms"]
+        print(f"{step:<14}{endpoint['requests']:>9}{endpoint['errors']:>8}{endpoint['throughput_rps']:>9}"
+              f"{latency['p50']:>10}{latency['p95']:>10}{latency['p99']:>10}{endpoint['queries_per_request']['mean']:>9}")
+    print(f"total: {summary['requests']} requests in {summary['elapsed_s']} s ({summary['throughput_rps']} req/s)")
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    from benchmarks.seed import SCALES
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for field in ("subjects", "chapters", "quizzes", "questions", "users", "scores"):
+        parser.add_argument(f"--{field}", type=int, help=f"Override the number of {field} of the scale.")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="student")
+    parser.add_argument("--concurrency", type=int, default=16, help="Virtual users running in parallel.")
+    parser.add_argument("--iterations", type=int, default=20, help="Measured iterations per virtual user.")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured iterations per virtual user.")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed for the dataset and the request choices.")
+    parser.add_argument("--database", help="Reuse (or create and keep) this SQLite file instead of a temporary one.")
+    parser.add_argument("--write-behind", action="store_true", help="Enable the write-behind score queue.")
+    parser.add_argument("--hash-workers", type=int, help="Password hashing processes (0 hashes inline).")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<mix>-<scale>-<timestamp>.json).")
+    parser.add_argument("--baseline", help="Earlier result file to compare p95 latencies against.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 regression before failing (0.2 = 20%%).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Keep the per-request application logs out of the way of the report
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(message)s")
+    log.setLevel(logging.INFO)
+
+    from benchmarks.seed import SCALES, BENCHMARK_PASSWORD
+    sizes = {field: getattr(args, field) or value for field, value in SCALES[args.scale].items()}
+
+    temp_dir = None
+    database = args.database
+    if database is None:
+        temp_dir = tempfile.TemporaryDirectory(prefix="quiz-bench-")
+        database = os.path.join(temp_dir.name, "bench.db")
+    reuse = os.path.exists(database)
+
+    # The app reads its configuration at import time, so point it at the benchmark database first
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.abspath(database)}"
+    os.environ["SCORE_WRITE_BEHIND"] = "true" if args.write_behind else "false"
+    if args.hash_workers is not None:
+        os.environ["HASH_POOL_WORKERS"] = str(args.hash_workers)
+    os.environ.setdefault("LOGIN_MAX_FAILURES", "1000000")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ.setdefault("AUTO_BOOTSTRAP", "true")  # the benchmark database is created on the fly
+
+    from app import app
+    from applications.database import db
+    from applications.leaderboard import leaderboards
+    from applications.score_writer import score_writer
+    from benchmarks import seed
+
+    rng = random.Random(args.seed)
+    counter = QueryCounter()
+    with app.app_context():
+        if reuse:
+            log.info(f"Reusing seeded database {database}")
+            dataset = seed.load()
+        else:
+            started = time.perf_counter()
+            dataset = seed.seed(sizes, rng)
+            log.info(f"Seeded {database} in {time.perf_counter() - started:.1f} s")
+            leaderboards.invalidate()
+        counter.attach(db.engine)
+
+    if not dataset.users or not dataset.quiz_ids:
+        log.error("The benchmark database has no benchmark users or quizzes.")
+        return 2
+
+    recorder = Recorder()
+    steps = MIXES[args.mix]
+    virtual_users = [
+        VirtualUser(
+            app, dataset, counter, recorder, dataset.users[index % len(dataset.users)],
+            random.Random(f"{args.seed}:{index}"), BENCHMARK_PASSWORD
+        )
+        for index in range(args.concurrency)
+    ]
+
+    log.info(f"Running mix '{args.mix}' ({' -> '.join(steps)}) with {args.concurrency} virtual users")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [executor.submit(user.run, steps, args.iterations, args.warmup) for user in virtual_users]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+    score_writer.shutdown()
+
+    summary = summarize(recorder, elapsed)
+    result = {
+        "created_at": datetime.utcnow().isoformat(),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            "scale": args.scale, "sizes": sizes, "mix": args.mix, "steps": list(steps),
+            "concurrency": args.concurrency, "iterations": args.iterations, "warmup": args.warmup,
+            "seed": args.seed, "write_behind": args.write_behind, "reused_database": reuse,
+        },
+        "summary": summary,
+    }
+    print_summary(summary)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{args.mix}-{args.scale}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as result_file:
+        json.dump(result, result_file, indent=2)
+    print(f"Results written to {output}")
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        print(f"Compared with {args.baseline}:")
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f"p95 regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+            status = 1
+
+    if temp_dir is not None:
+        with app.app_context():
+            db.engine.dispose()
+        temp_dir.cleanup()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+from applications.database import db
+from applications.model import User, Role, Subject, Chapter, Quiz, Question, Score, roles_users
+from sqlalchemy import insert, select
+from werkzeug.security import generate_password_hash
+from datetime import datetime, timedelta
+import logging
+import uuid
+
+BENCHMARK_PASSWORD = "Bench-Passw0rd"
+INSERT_CHUNK_ROWS = 50000
+
+log = logging.getLogger("benchmarks")
+
+# Named dataset sizes; any field can be overridden from the command line
+SCALES = {
+    "tiny": {"subjects": 2, "chapters": 3, "quizzes": 3, "questions": 10, "users": 50, "scores": 10000},
+    "small": {"subjects": 5, "chapters": 5, "quizzes": 4, "questions": 10, "users": 500, "scores": 100000},
+    "medium": {"subjects": 10, "chapters": 8, "quizzes": 5, "questions": 15, "users": 5000, "scores": 1000000},
+    "large": {"subjects": 20, "chapters": 10, "quizzes": 5, "questions": 20, "users": 20000, "scores": 5000000},
+}
+
+
+class Dataset:
+    """Ids of the seeded rows, used by the scenarios to pick realistic targets."""
+
+    def __init__(self, quiz_questions, users):
+        self.quiz_questions = quiz_questions  # quiz_id -> [(question_id, correct_option), ...]
+        self.quiz_ids = sorted(quiz_questions)
+        self.users = users  # [(user_id, email), ...]
+
+
+def _insert_chunked(connection, table, rows):
+    for start in range(0, len(rows), INSERT_CHUNK_ROWS):
+        connection.execute(insert(table), rows[start:start + INSERT_CHUNK_ROWS])
+
+
+def seed(sizes, rng):
+    """Bulk-insert a synthetic catalog, users and score history. Returns a Dataset.
+
+    Every row is generated from ``rng`` so the same seed reproduces the same
+    database. Users share one password hash, computed once, so seeding cost
+    does not depend on the KDF.
+    """
+    user_role_id = db.session.query(Role.id).filter(Role.name == "user").scalar()
+    password_hash = generate_password_hash(BENCHMARK_PASSWORD)
+    now = datetime.utcnow()
+
+    with db.engine.begin() as connection:
+        subjects = [
+            {"id": s, "name": f"Subject {s}", "description": f"Synthetic subject {s}", "created_at": now}
+            for s in range(1, sizes["subjects"] + 1)
+        ]
+        chapters, quizzes, questions = [], [], []
+        quiz_questions = {}
+        for subject in subjects:
+            for _ in range(sizes["chapters"]):
+                chapter_id = len(chapters) + 1
+                chapters.append({
+                    "id": chapter_id, "subject_id": subject["id"], "name": f"Chapter {chapter_id}",
+                    "description": f"Synthetic chapter {chapter_id}", "created_at": now
+                })
+                for _ in range(sizes["quizzes"]):
+                    quiz_id = len(quizzes) + 1
+                    quizzes.append({
+                        "id": quiz_id, "chapter_id": chapter_id, "name": f"Quiz {quiz_id}",
+                        "description": f"Synthetic quiz {quiz_id}", "difficulty_level": rng.choice(("Easy", "Medium", "Hard")),
+                        "time_limit": rng.choice((10, 15, 30)), "created_at": now
+                    })
+                    keys = quiz_questions.setdefault(quiz_id, [])
+                    for _ in range(sizes["questions"]):
+                        question_id = len(questions) + 1
+                        correct_option = str(rng.randint(1, 4))
+                        questions.append({
+                            "id": question_id, "quiz_id": quiz_id, "question_text": f"Question {question_id}?",
+                            "option1": "Alpha", "option2": "Beta", "option3": "Gamma", "option4": "Delta",
+                            "correct_option": correct_option, "marks": rng.randint(1, 3)
+                        })
+                        keys.append((question_id, correct_option))
+
+        _insert_chunked(connection, Subject.__table__, subjects)
+        _insert_chunked(connection, Chapter.__table__, chapters)
+        _insert_chunked(connection, Quiz.__table__, quizzes)
+        _insert_chunked(connection, Question.__table__, questions)
+
+        first_user_id = (connection.execute(select(db.func.max(User.id))).scalar() or 0) + 1
+        users = [
+            {
+                "id": first_user_id + n, "username": f"bench{n}", "email": f"bench{n}@example.com",
+                "password": password_hash, "active": True, "created_at": now, "fs_uniquifier": str(uuid.UUID(int=rng.getrandbits(128)))
+            }
+            for n in range(sizes["users"])
+        ]
+        _insert_chunked(connection, User.__table__, users)
+        _insert_chunked(connection, roles_users, [{"user_id": user["id"], "role_id": user_role_id} for user in users])
+        log.info(f"Seeded {len(quizzes)} quizzes, {len(questions)} questions and {len(users)} users")
+
+    quiz_marks = {}
+    for question in questions:
+        quiz_marks[question["quiz_id"]] = quiz_marks.get(question["quiz_id"], 0) + question["marks"]
+    Quiz.refresh_total_marks(quiz_marks)
+    db.session.commit()
+
+    # Score history spread over the last year, committed chunk by chunk to bound memory
+    user_ids = [user["id"] for user in users]
+    quiz_ids = sorted(quiz_marks)
+    remaining = sizes["scores"]
+    while remaining > 0:
+        count = min(remaining, INSERT_CHUNK_ROWS)
+        rows = []
+        for _ in range(count):
+            quiz_id = rng.choice(quiz_ids)
+            rows.append({
+                "quiz_id": quiz_id,
+                "user_id": rng.choice(user_ids),
+                "time_stamp_of_attempt": now - timedelta(seconds=rng.randint(0, 365 * 86400)),
+                "total_scored": rng.randint(0, quiz_marks[quiz_id]),
+                "total_time_taken": rng.randint(1, 30)
+            })
+        with db.engine.begin() as connection:
+            connection.execute(insert(Score.__table__), rows)
+        remaining -= count
+        log.info(f"Seeded scores: {sizes['scores'] - remaining}/{sizes['scores']}")
+
+    return Dataset(quiz_questions, [(user["id"], user["email"]) for user in users])
+
+
+def load():
+    """Rebuild the Dataset of an already seeded benchmark database."""
+    quiz_questions = {}
+    for question_id, quiz_id, correct_option in db.session.query(
+        Question.id, Question.quiz_id, Question.correct_option
+    ).order_by(Question.id):
+        quiz_questions.setdefault(quiz_id, []).append((question_id, correct_option))
+    users = db.session.query(User.id, User.email).filter(User.email.like("bench%@example.com")).order_by(User.id).all()
+    return Dataset(quiz_questions, [tuple(user) for user in users])
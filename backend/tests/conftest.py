@@ -0,0 +1,81 @@
+import itertools
+import os
+import tempfile
+
+import pytest
+
+# The application reads its configuration from the environment at import time,
+# so point it at a throwaway database and instance state before anything imports it.
+_STATE_DIR = tempfile.mkdtemp(prefix="quiz-master-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_STATE_DIR, 'quiz_master.db')}")
+os.environ.setdefault("AUTO_BOOTSTRAP", "true")
+os.environ.setdefault("HASH_POOL_WORKERS", "0")  # hash inline; no process pool in tests
+os.environ.setdefault("SCORE_SPOOL_DIR", os.path.join(_STATE_DIR, "score_spool"))
+os.environ.setdefault("ATTEMPT_SESSION_STORE", os.path.join(_STATE_DIR, "attempts.db"))
+os.environ.setdefault("LOG_FORMAT", "text")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+_user_numbers = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import app as flask_app
+    flask_app.config["TESTING"] = True
+    return flask_app
+
+
+@pytest.fixture()
+def app_context(app):
+    with app.app_context():
+        yield
+
+
+@pytest.fixture()
+def client(app):
+    return app.test_client()
+
+
+def _login(client, email, password):
+    response = client.post("/api/v1/login", json={"email": email, "password": password})
+    assert response.status_code == 200, response.get_json()
+    return {"Authorization": f"Bearer {response.get_json()['auth_token']}"}
+
+
+@pytest.fixture(scope="session")
+def admin_headers(app):
+    return _login(app.test_client(), app.config["ADMIN_EMAIL"], app.config["ADMIN_PASSWORD"])
+
+
+@pytest.fixture()
+def user_headers(app, client):
+    """Register a fresh user and return their auth header."""
+    username = f"student{next(_user_numbers)}"
+    email = f"{username}@example.com"
+    client.post("/api/v1/register", json={"email": email, "password": "Passw0rdX", "username": username})
+    return _login(client, email, "Passw0rdX")
+
+
+@pytest.fixture()
+def make_quiz(app):
+    """Create a subject > chapter > quiz with ``[(correct_option, marks), ...]`` questions; returns the quiz id."""
+    from applications.database import db
+    from applications.model import Subject, Chapter, Quiz, Question
+
+    def make(questions, time_limit=None):
+        with app.app_context():
+            subject = Subject(name="Subject", description="")
+            chapter = Chapter(subject=subject, name="Chapter")
+            quiz = Quiz(chapter=chapter, name="Quiz", time_limit=time_limit, total_marks=0)
+            db.session.add_all([subject, chapter, quiz])
+            db.session.flush()
+            for number, (correct, marks) in enumerate(questions, start=1):
+                db.session.add(Question(
+                    quiz_id=quiz.id, question_text=f"Question {number}", option1="a", option2="b",
+                    option3="c", option4="d", correct_option=correct, marks=marks
+                ))
+            db.session.flush()
+            Quiz.refresh_total_marks([quiz.id])
+            db.session.commit()
+            return quiz.id
+    return make
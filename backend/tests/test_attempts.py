@@ -0,0 +1,120 @@
+import pytest
+
+from applications import attempt_sessions as sessions_module
+from applications.attempt_sessions import AttemptError, AttemptSessionManager, TimingWheel
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture()
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(sessions_module.time, "time", clock)
+    return clock
+
+
+def test_timing_wheel_reports_keys_once_their_deadline_passed():
+    wheel = TimingWheel(slots=8, now=100)
+    wheel.schedule("a", 103)
+    wheel.schedule("b", 120)  # more than one revolution ahead
+
+    assert wheel.advance(103) == []
+    assert wheel.advance(104) == ["a"]
+    assert wheel.advance(112) == []
+    assert wheel.advance(121) == ["b"]
+    assert len(wheel) == 0
+
+
+def test_timed_attempt_expires_after_grace(clock):
+    manager = AttemptSessionManager()
+    manager.grace = 5
+    session, resumed = manager.start(1, 10, [1, 2, 3], time_limit=60)
+    assert not resumed
+    assert manager.start(1, 10, [1, 2, 3], time_limit=60) == (session, True)
+
+    clock.now += 30
+    manager.autosave(session.attempt_id, 1, {"1": "A", "99": "B"})
+    assert manager.get(session.attempt_id, 1).answers == {"1": "A"}
+
+    clock.now += 31  # past the deadline, inside the grace period
+    with pytest.raises(AttemptError) as error:
+        manager.autosave(session.attempt_id, 1, {"2": "B"})
+    assert error.value.status == 410
+
+    clock.now += 10  # past deadline + grace: evicted by the wheel
+    with pytest.raises(AttemptError) as error:
+        manager.finish(session.attempt_id, 1, 10, {})
+    assert error.value.status == 404
+    assert manager.stats()["expired"] == 1
+
+
+def test_finish_uses_the_server_clock_capped_at_the_limit(clock):
+    manager = AttemptSessionManager()
+    session, _ = manager.start(1, 10, [1, 2], time_limit=60)
+    manager.autosave(session.attempt_id, 1, {"1": "A"})
+
+    clock.now += 62  # submitted within the grace period
+    _, answers, elapsed = manager.finish(session.attempt_id, 1, 10, {"2": "C"})
+
+    assert answers == {"1": "A", "2": "C"}
+    assert elapsed == 60
+    with pytest.raises(AttemptError):
+        manager.finish(session.attempt_id, 1, 10, {})
+
+
+def test_attempts_belong_to_their_user(clock):
+    manager = AttemptSessionManager()
+    session, _ = manager.start(1, 10, [1], time_limit=None)
+    with pytest.raises(AttemptError) as error:
+        manager.get(session.attempt_id, 2)
+    assert error.value.status == 404
+
+
+def test_timed_quiz_submission_requires_an_attempt(client, user_headers, make_quiz):
+    quiz_id = make_quiz([("A", 1), ("B", 1)], time_limit=10)
+
+    response = client.post(f"/api/v1/quizzes/{quiz_id}/submit", headers=user_headers,
+                           json={"answers": {"1": "A"}, "time_taken": 1})
+    assert response.status_code == 400
+
+    attempt = client.post(f"/api/v1/quizzes/{quiz_id}/attempts", headers=user_headers).get_json()
+    ids = {question["text"]: str(question["id"]) for question in attempt["questions"]}
+    response = client.post(f"/api/v1/quizzes/{quiz_id}/submit", headers=user_headers, json={
+        "attempt_id": attempt["attempt_id"], "answers": {ids["Question 1"]: "A", ids["Question 2"]: "C"}, "time_taken": 99
+    })
+    assert response.status_code == 200
+    assert response.get_json()["score"] == 1
+    assert response.get_json()["time_taken"] == 1  # server clock, rounded up to whole minutes
+
+
+def test_untimed_quiz_without_attempt_records_no_time(client, user_headers, make_quiz):
+    quiz_id = make_quiz([("A", 2)])
+    response = client.post(f"/api/v1/quizzes/{quiz_id}/submit", headers=user_headers,
+                           json={"answers": {"1": "A"}, "time_taken": 99})
+    assert response.status_code == 200
+    assert response.get_json()["time_taken"] is None
+
+
+def test_journal_shares_attempts_between_workers(clock, tmp_path):
+    from applications.attempt_sessions import LocalSessionStore
+
+    worker_a, worker_b = AttemptSessionManager(), AttemptSessionManager()
+    worker_a.store = LocalSessionStore(str(tmp_path / "attempts.db"))
+    worker_b.store = LocalSessionStore(str(tmp_path / "attempts.db"))
+
+    session, _ = worker_a.start(1, 10, [1, 2], time_limit=60)
+    worker_a.autosave(session.attempt_id, 1, {"1": "A"})
+    worker_b.autosave(session.attempt_id, 1, {"2": "B"})
+
+    _, answers, _ = worker_a.finish(session.attempt_id, 1, 10)
+    assert answers == {"1": "A", "2": "B"}
+    with pytest.raises(AttemptError) as error:
+        worker_b.finish(session.attempt_id, 1, 10)
+    assert error.value.status in (404, 409)
+    assert worker_b.start(1, 10, [1, 2], time_limit=60)[1] is False  # a new attempt, not the submitted one
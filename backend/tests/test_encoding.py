@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta, timezone
+
+import msgpack
+from flask import jsonify
+
+from applications.encoding import json_bytes, json_loads, msgpack_bytes, timestamp
+
+NAIVE = datetime(2024, 10, 1, 10, 0, 0)
+EXPECTED = "2024-10-01T10:00:00+00:00"
+
+
+def test_timestamp_is_iso_8601_utc():
+    assert timestamp(NAIVE) == EXPECTED
+    assert timestamp(NAIVE.replace(tzinfo=timezone(timedelta(hours=2))) + timedelta(hours=2)) == EXPECTED
+    assert timestamp(NAIVE.replace(tzinfo=timezone.utc).timestamp()) == EXPECTED
+    assert timestamp(None) is None
+
+
+def test_every_encoder_writes_the_same_timestamps(app):
+    document = {"at": NAIVE, "aware": NAIVE.replace(tzinfo=timezone.utc), "day": NAIVE.date()}
+    expected = {"at": EXPECTED, "aware": EXPECTED, "day": "2024-10-01"}
+
+    assert json_loads(json_bytes(document)) == expected
+    assert msgpack.unpackb(msgpack_bytes(document)) == expected
+    with app.test_request_context():
+        assert jsonify(document).get_json() == expected
@@ -0,0 +1,71 @@
+import os
+import time
+
+from applications.database import db
+from applications.enrollment import enrollment_queue
+from applications.model import EnrollmentJob, User
+
+
+def _wait_for(client, headers, job_id, timeout=10):
+    deadline = time.monotonic() + timeout
+    while True:
+        status = client.get(f"/api/v1/users/bulk/{job_id}", headers=headers).get_json()
+        if status["status"] in ("completed", "failed") or time.monotonic() > deadline:
+            return status
+        time.sleep(0.02)
+
+
+def _upload(client, headers, body, **params):
+    return client.post("/api/v1/users/bulk", headers=headers, query_string={"format": "csv", **params},
+                       data=body, content_type="text/csv")
+
+
+def test_upload_is_queued_and_enrolled_in_the_background(app, client, admin_headers, monkeypatch):
+    hashed = []
+    monkeypatch.setattr(
+        "applications.hashing.HashingPool.generate_many",
+        lambda pool, passwords, concurrency=None: hashed.extend(passwords) or [f"hash-{p}" for p in passwords]
+    )
+    body = (
+        "email,username,password\n"
+        "bulk1@example.com,bulk1,Passw0rdX\n"
+        "not-an-email,bulk2,Passw0rdX\n"
+    )
+    response = _upload(client, admin_headers, body, job_id="import-1")
+
+    assert response.status_code == 202
+    assert response.headers["Location"].endswith("/users/bulk/import-1")
+    assert response.get_json()["job_id"] == "import-1"
+
+    status = _wait_for(client, admin_headers, "import-1")
+    assert status["status"] == "completed"
+    assert (status["inserted"], status["rejected"]) == (1, 1)
+    assert status["errors"] == [{"line": 3, "errors": ["Invalid email format."]}]
+    assert hashed == ["Passw0rdX"]
+    with app.app_context():
+        assert db.session.query(User.password).filter(User.email == "bulk1@example.com").scalar() == "hash-Passw0rdX"
+
+
+def test_resubmitting_a_job_skips_committed_lines(client, admin_headers):
+    body = "email,username,password\nbulk3@example.com,bulk3,Passw0rdX\n"
+    assert _upload(client, admin_headers, body, job_id="import-2").status_code == 202
+    assert _wait_for(client, admin_headers, "import-2")["inserted"] == 1
+
+    assert _upload(client, admin_headers, body, job_id="import-2").status_code == 202
+    status = _wait_for(client, admin_headers, "import-2")
+    assert (status["status"], status["inserted"], status["errors"]) == ("completed", 1, [])
+
+
+def test_queued_job_ids_are_busy_and_must_be_file_safe(app, client, admin_headers):
+    assert _upload(client, admin_headers, "email\n", job_id="import-3").status_code == 202
+    assert _wait_for(client, admin_headers, "import-3")["status"] == "completed"
+    held = os.path.join(enrollment_queue.upload_dir, "import-3.held.csv")  # as if still running in another worker
+    open(held, "w").close()
+    try:
+        with app.app_context():
+            db.session.get(EnrollmentJob, "import-3").status = "running"
+            db.session.commit()
+        assert _upload(client, admin_headers, "email\n", job_id="import-3").status_code == 409
+    finally:
+        os.remove(held)
+    assert _upload(client, admin_headers, "email\n", job_id="../etc").status_code == 400
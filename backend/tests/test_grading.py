@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+import pytest
+
+from applications.database import db
+from applications.grading import AnswerKey, AnswerKeyCache, option_code
+from applications.model import Question
+
+
+@pytest.mark.parametrize("value, code", [
+    (1, 1), ("2", 2), ("C", 3), (" d ", 4), ("option2", 2), ("e", 0), (None, 0), ("", 0)
+])
+def test_option_code(value, code):
+    assert option_code(value) == code
+
+
+def test_grade_weights_each_question_by_its_marks():
+    key = AnswerKey(1, [(10, "A", 1), (11, "2", 3), (12, "option3", None), (13, "D", 5)])
+
+    result = key.grade({"10": "a", 11: "B", "12": "1", "99": "A"})
+
+    assert key.total_marks == 1 + 3 + 1 + 5  # unset marks count as DEFAULT_QUESTION_MARKS (1)
+    assert result.score == 4
+    assert (result.correct_count, result.incorrect_count, result.unanswered_count) == (2, 1, 1)
+    assert result.detail() == {"incorrect": [12], "unanswered": [13]}
+
+
+def test_digest_follows_the_key_contents():
+    rows = [(1, "A", 2), (2, "B", 1)]
+    assert AnswerKey(1, rows).digest == AnswerKey(1, list(reversed(rows))).digest
+    assert AnswerKey(1, rows).digest != AnswerKey(1, [(1, "A", 2), (2, "C", 1)]).digest
+    assert AnswerKey(1, rows).digest != AnswerKey(1, [(1, "A", 3), (2, "B", 1)]).digest
+
+
+def test_invalidation_reaches_other_workers(app, app_context, make_quiz, tmp_path):
+    quiz_id = make_quiz([("A", 1), ("B", 2)])
+    instance = SimpleNamespace(instance_path=str(tmp_path))
+    worker_a, worker_b = AnswerKeyCache(), AnswerKeyCache()
+    worker_a.init_app(instance)
+    worker_b.init_app(instance)
+
+    stale = worker_b.get(quiz_id)
+    assert worker_b.get(quiz_id) is stale
+    assert stale.grade({}).key.total_marks == 3
+
+    question = Question.query.filter_by(quiz_id=quiz_id, correct_option="B").one()
+    question.correct_option, question.marks = "D", 4
+    db.session.commit()
+    worker_a.invalidate(quiz_id)
+
+    fresh = worker_b.get(quiz_id)
+    assert fresh is not stale
+    assert fresh.total_marks == 5
+    assert fresh.grade({str(question.id): "D"}).score == 4
+    assert fresh.snapshot_id != stale.snapshot_id
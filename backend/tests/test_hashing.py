@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from applications.hashing import HashingPool, LoginThrottle, PoolSaturated
+
+
+def test_throttle_blocks_after_max_failures_and_recovers(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    throttle = LoginThrottle(max_failures=3, window=60)
+
+    for _ in range(3):
+        assert throttle.retry_after("ann") == 0
+        throttle.failed("ann")
+    assert throttle.retry_after("ann") == 60
+
+    now[0] += 61
+    assert throttle.retry_after("ann") == 0
+
+
+def test_success_clears_failures():
+    throttle = LoginThrottle(max_failures=2)
+    throttle.failed("ann")
+    throttle.succeeded("ann")
+    throttle.failed("ann")
+    assert throttle.retry_after("ann") == 0
+
+
+def test_inline_pool_still_applies_admission_control():
+    pool = HashingPool(workers=0, max_queue=1)
+    assert pool.run(lambda value: value * 2, 21) == 42
+    pool._slots.acquire()
+    with pytest.raises(PoolSaturated):
+        pool.run(lambda: None)
+    assert pool.stats()["rejected"] == 1
+
+
+def test_failures_from_one_address_do_not_lock_out_others(app, client):
+    from applications.hashing import login_throttle
+
+    email = app.config["ADMIN_EMAIL"]
+    attacker = {"REMOTE_ADDR": "203.0.113.9"}
+    for _ in range(login_throttle.max_failures):
+        client.post("/api/v1/login", json={"email": email, "password": "wrong"}, environ_base=attacker)
+
+    blocked = client.post("/api/v1/login", json={"email": email, "password": "wrong"}, environ_base=attacker)
+    assert blocked.status_code == 429
+    owner = client.post("/api/v1/login", json={"email": email, "password": app.config["ADMIN_PASSWORD"]},
+                        environ_base={"REMOTE_ADDR": "198.51.100.7"})
+    assert owner.status_code == 200
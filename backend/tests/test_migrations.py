@@ -0,0 +1,78 @@
+from datetime import datetime
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.schema import CreateTable
+
+from applications import migrations
+from applications.database import db
+
+# Tables of the schema before any migration existed (created without the later indexes)
+BASELINE_TABLES = ("user", "role", "roles_users", "subject", "chapter", "quiz", "question", "score")
+
+
+def _baseline_engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as connection:
+        for name in BASELINE_TABLES:
+            connection.execute(CreateTable(db.metadata.tables[name]))
+        connection.execute(text(
+            "INSERT INTO user (id, username, email, password, fs_uniquifier, active)"
+            " VALUES (1, 'ann', 'ann@example.com', 'x', 'u1', 1)"
+        ))
+        connection.execute(text("INSERT INTO subject (id, name) VALUES (1, 'Math')"))
+        connection.execute(text("INSERT INTO chapter (id, subject_id, name) VALUES (1, 1, 'Algebra')"))
+        connection.execute(text("INSERT INTO quiz (id, chapter_id, name, total_marks) VALUES (1, 1, 'Q', 100)"))
+        connection.execute(text(
+            "INSERT INTO question (quiz_id, question_text, option1, option2, option3, option4, correct_option, marks)"
+            " VALUES (1, 'q1', 'a', 'b', 'c', 'd', 'A', 2), (1, 'q2', 'a', 'b', 'c', 'd', 'B', NULL)"
+        ))
+        connection.execute(text(
+            "INSERT INTO score (quiz_id, user_id, time_stamp_of_attempt, total_scored) VALUES"
+            " (1, 1, :first, 3), (1, 1, :second, 1)"
+        ), {"first": datetime(2024, 10, 1, 9), "second": datetime(2024, 10, 2, 9)})
+    return engine
+
+
+def test_upgrade_baseline_database_to_head(tmp_path):
+    engine = _baseline_engine(tmp_path / "baseline.db")
+    assert migrations.installed_version(engine) == 0
+
+    applied = migrations.upgrade(engine)
+
+    assert applied == [version for version, _, _ in migrations.MIGRATIONS]
+    assert migrations.installed_version(engine) == migrations.LATEST_VERSION
+    inspector = inspect(engine)
+    for table in db.metadata.sorted_tables:
+        assert inspector.has_table(table.name)
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        assert {index.name for index in table.indexes} <= existing, table.name
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        assert {column.name for column in table.columns} <= columns, table.name
+
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT total_marks FROM quiz WHERE id = 1")).scalar() == 3
+        progress = connection.execute(text(
+            "SELECT attempts, best_score, latest_score FROM user_quiz_progress WHERE user_id = 1 AND quiz_id = 1"
+        )).one()
+        assert tuple(progress) == (2, 3, 1)
+        streak = connection.execute(text(
+            "SELECT current_streak, longest_streak FROM user_progress WHERE user_id = 1"
+        )).one()
+        assert tuple(streak) == (2, 2)
+
+
+def test_upgrade_is_idempotent(tmp_path):
+    engine = _baseline_engine(tmp_path / "baseline.db")
+    migrations.upgrade(engine)
+    assert migrations.upgrade(engine) == []
+
+
+def test_enrollment_errors_column_is_added_to_existing_job_tables(tmp_path):
+    engine = _baseline_engine(tmp_path / "baseline.db")
+    migrations.upgrade(engine)
+    with engine.begin() as connection:  # back to a database that stopped at migration 5
+        connection.execute(text("ALTER TABLE enrollment_job DROP COLUMN errors"))
+        connection.execute(text("DELETE FROM schema_version WHERE version = 6"))
+
+    assert migrations.upgrade(engine) == [6]
+    assert "errors" in {column["name"] for column in inspect(engine).get_columns("enrollment_job")}
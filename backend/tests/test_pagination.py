@@ -0,0 +1,60 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+from applications.model import Score
+from applications.pagination import PaginationError, decode_cursor, encode_cursor
+
+SORT_COLUMNS = [Score.time_stamp_of_attempt, Score.id]
+
+
+def _raw_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def test_cursor_round_trip():
+    values = [datetime(2026, 3, 1, 12, 30, 15, 250), 42]
+    assert decode_cursor(encode_cursor(values), SORT_COLUMNS) == values
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    "é",
+    _raw_cursor({"id": 1}),
+    _raw_cursor([1]),
+    _raw_cursor(["yesterday", 1]),
+    _raw_cursor([20260301, 1]),
+    _raw_cursor(["2026-03-01T12:30:15", "1; drop table score"]),
+    _raw_cursor(["2026-03-01T12:30:15", True]),
+])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(PaginationError):
+        decode_cursor(cursor, SORT_COLUMNS)
+
+
+def test_keyset_pages_cover_every_row_once(client, admin_headers, make_quiz):
+    quiz_ids = {make_quiz([(1, 1)]) for _ in range(3)}
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, "fields": "id"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/v1/quizzes", headers=admin_headers, query_string=params)
+        assert response.status_code == 200
+        page = response.get_json()
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == sorted(set(seen))
+    assert quiz_ids <= set(seen)
+
+
+def test_bad_cursor_is_a_400(client, admin_headers):
+    response = client.get("/api/v1/scores", headers=admin_headers, query_string={
+        "limit": 10, "order_by": "time_stamp_of_attempt", "cursor": _raw_cursor(["yesterday", 1])
+    })
+    assert response.status_code == 400
+    assert response.get_json() == {"message": "Invalid cursor."}
@@ -0,0 +1,62 @@
+import pytest
+from flask import request
+
+from applications.permissions import (
+    ALL_PERMISSIONS, PERMISSIONS, _compile_role, has_permission, permission_mask, permissions_required
+)
+
+
+def test_permission_bits_are_distinct_powers_of_two():
+    bits = list(PERMISSIONS.values())
+    assert len(set(bits)) == len(bits)
+    assert all(bit and bit & (bit - 1) == 0 for bit in bits)
+    assert permission_mask(("*",)) == ALL_PERMISSIONS
+
+
+def test_unknown_permission_names_are_rejected():
+    with pytest.raises(ValueError):
+        permission_mask(("catalog:destroy",))
+
+
+def test_compile_role_uses_defaults_and_ignores_unknown_names():
+    assert _compile_role("admin", None) == ALL_PERMISSIONS
+    assert _compile_role("user", "") == PERMISSIONS["quiz:attempt"]
+    assert _compile_role("editor", "catalog:write, questions:read, bogus") == (
+        PERMISSIONS["catalog:write"] | PERMISSIONS["questions:read"]
+    )
+
+
+def test_has_permission_needs_every_bit():
+    payload = {"perms": PERMISSIONS["quiz:attempt"] | PERMISSIONS["catalog:write"]}
+    assert has_permission(payload, "catalog:write")
+    assert not has_permission(payload, "catalog:write", "users:manage")
+
+
+def test_permissions_required_answers_403_without_the_bit(app):
+    @permissions_required("users:manage")
+    def view():
+        return "ok", 200
+
+    with app.test_request_context():
+        request.user = {"perms": PERMISSIONS["quiz:attempt"]}
+        assert view()[1] == 403
+        request.user = {"perms": ALL_PERMISSIONS}
+        assert view() == ("ok", 200)
+
+
+def test_tokens_issued_before_permission_claims_resolve_their_role(app, app_context):
+    from applications.permissions import granted
+    assert granted({"role": "admin"}) == ALL_PERMISSIONS
+    assert granted({"roles": ["user"]}) == PERMISSIONS["quiz:attempt"]
+
+
+@pytest.mark.parametrize("path", ["/api/v1/auth/token-cache", "/api/v1/auth/hashing"])
+def test_operational_stats_need_system_read(client, admin_headers, user_headers, path):
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers=user_headers).status_code == 403
+    assert client.get(path, headers=admin_headers).status_code == 200
+
+
+def test_catalog_writes_need_catalog_write(client, user_headers):
+    response = client.post("/api/v1/subjects", headers=user_headers, json={"name": "Nope"})
+    assert response.status_code == 403
@@ -0,0 +1,49 @@
+import os
+from types import SimpleNamespace
+
+from applications.response_cache import SharedVersion, VersionedResponseCache
+
+
+def _shared(tmp_path, name="catalog"):
+    version = SharedVersion(name)
+    version.init_app(SimpleNamespace(instance_path=str(tmp_path)))
+    return version
+
+
+def test_shared_version_reports_each_bump_once(tmp_path):
+    writer, reader = _shared(tmp_path), _shared(tmp_path)
+    assert not reader.changed()
+
+    writer.bump(1)
+    assert reader.changed()
+    assert not reader.changed()
+    assert not writer.changed()  # its own bump
+
+
+def test_bumps_within_one_timestamp_tick_are_not_merged(tmp_path):
+    writer, reader = _shared(tmp_path), _shared(tmp_path)
+    writer.bump(1)
+    path = os.path.join(tmp_path, "catalog.version")
+    stat = os.stat(path)
+    assert reader.changed()
+
+    writer.bump(2)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))  # a coarse clock: same mtime as the first bump
+    assert reader.changed()
+
+
+def test_catalog_etag_is_the_same_on_every_worker(app, tmp_path):
+    instance = SimpleNamespace(instance_path=str(tmp_path))
+    worker_a, worker_b = VersionedResponseCache("catalog"), VersionedResponseCache("catalog")
+    worker_a.init_app(instance)
+    worker_b.init_app(instance)
+    worker_b.invalidate()  # the workers' local versions now differ
+
+    with app.app_context():
+        first = worker_a.get("subjects", lambda: ([{"id": 1, "name": "Math"}], 200))
+        second = worker_b.get("subjects", lambda: ([{"id": 1, "name": "Math"}], 200))
+        assert first.etag == second.etag
+
+        worker_a.invalidate()
+        edited = worker_b.get("subjects", lambda: ([{"id": 1, "name": "Maths"}], 200))
+        assert edited.etag != first.etag
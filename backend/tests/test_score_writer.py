@@ -0,0 +1,76 @@
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+from applications.database import db
+from applications.model import Score, User
+from applications.score_writer import ScoreWriter
+
+
+@pytest.fixture()
+def writer_app(app, monkeypatch, tmp_path):
+    monkeypatch.setitem(app.config, "SCORE_WRITE_BEHIND", True)
+    monkeypatch.setitem(app.config, "SCORE_SPOOL_DIR", str(tmp_path))
+    monkeypatch.setitem(app.config, "SCORE_FLUSH_INTERVAL", 0.05)
+    return app
+
+
+def _row(app, quiz_id):
+    with app.app_context():
+        user_id = db.session.query(User.id).filter(User.email == app.config["ADMIN_EMAIL"]).scalar()
+    return {
+        "user_id": user_id,
+        "quiz_id": quiz_id,
+        "total_scored": 1,
+        "total_time_taken": "1",
+        "time_stamp_of_attempt": datetime.utcnow(),
+        "answer_key_id": None,
+        "answers": None
+    }
+
+
+def _score_count(app, quiz_id):
+    with app.app_context():
+        return db.session.query(Score).filter(Score.quiz_id == quiz_id).count()
+
+
+def test_flusher_starts_on_first_submit(writer_app, make_quiz):
+    quiz_id = make_quiz([(1, 1)])
+    writer = ScoreWriter()
+    writer.init_app(writer_app)
+    assert writer.enabled and writer._thread is None
+
+    writer.submit(_row(writer_app, quiz_id))
+    assert writer._thread.is_alive()
+    writer.shutdown()
+    assert _score_count(writer_app, quiz_id) == 1
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_forked_worker_runs_its_own_flusher(writer_app, make_quiz, tmp_path):
+    quiz_id = make_quiz([(1, 1)])
+    writer = ScoreWriter()
+    writer.init_app(writer_app)  # as in the gunicorn master with --preload
+
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            with writer_app.app_context():
+                db.engine.dispose(close=False)  # connections belong to the parent
+            writer.submit(_row(writer_app, quiz_id))
+            deadline = time.monotonic() + 5
+            while writer.flushed_rows == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            status = 0 if writer.flushed_rows == 1 else 2  # committed by the flusher, not by shutdown
+            writer.shutdown()
+        finally:
+            os._exit(status)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert _score_count(writer_app, quiz_id) == 1
+    assert writer._thread is None
+    assert not list(tmp_path.glob("*.spool"))  # the child committed and removed its spool
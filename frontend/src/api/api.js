@@ -100,6 +100,17 @@ export const deleteSubject = async (subjectId) => {
   }
 };
 
+// Catalog API
+export const getCatalog = async (params = {}) => {
+  try {
+    const response = await api.get("/catalog", { params }); // Subject -> Chapter -> Quiz tree in one request
+    return response.data;
+  } catch (error) {
+    console.error("Error fetching catalog:", error.response?.data || error.message);
+    throw error;
+  }
+};
+
 // Chapter API
 export const getChapters = async (subjectId) => {
   try {
@@ -218,6 +229,37 @@ export const deleteQuestion = async (questionId) => {
   }
 };
 
+// Attempt API
+export const startAttempt = async (quizId) => {
+  try {
+    const response = await api.post(`/quizzes/${quizId}/attempts`); // Start (or resume) a server-timed attempt
+    return response.data;
+  } catch (error) {
+    console.error("Error starting attempt:", error.response?.data || error.message);
+    throw error;
+  }
+};
+
+export const saveAttempt = async (attemptId, answers) => {
+  try {
+    const response = await api.put(`/attempts/${attemptId}`, { answers }); // Autosave answers so far
+    return response.data;
+  } catch (error) {
+    console.error("Error saving answers:", error.response?.data || error.message);
+    throw error;
+  }
+};
+
+export const submitQuiz = async (quizId, attemptId, answers) => {
+  try {
+    const response = await api.post(`/quizzes/${quizId}/submit`, { attempt_id: attemptId, answers }); // Graded by the server
+    return response.data;
+  } catch (error) {
+    console.error("Error submitting quiz:", error.response?.data || error.message);
+    throw error;
+  }
+};
+
 // Score API
 export const getScores = async () => {
   try {
@@ -229,6 +271,17 @@ export const getScores = async () => {
   }
 };
 
+// Progress API
+export const getMyProgress = async () => {
+  try {
+    const response = await api.get("/users/me/progress"); // Dashboard summary of the logged-in user
+    return response.data;
+  } catch (error) {
+    console.error("Error fetching progress:", error.response?.data || error.message);
+    throw error;
+  }
+};
+
 // Export all API functions
 export default {
   login,
@@ -250,5 +303,9 @@ export default {
   addQuestion,
   updateQuestion,
   deleteQuestion,
+  startAttempt,
+  saveAttempt,
+  submitQuiz,
   getScores,
+  getMyProgress,
 };